@@ -0,0 +1,97 @@
+"""
+Admission control for the prediction endpoints
+
+At most `max_concurrency` predictions run at once. Further requests wait in a bounded
+queue, and each may wait at most `queue_timeout` seconds. A request that finds the queue
+full, or that times out in it, is shed at once with Overloaded so the caller can answer
+503 + Retry-After. Latency for the admitted requests stays bounded instead of every
+client slowing down together.
+
+All state lives on the event loop thread, so the counters need no locking.
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+import numpy as np
+
+class Overloaded(Exception):
+    """Raised when a request is shed; retry_after is a whole number of seconds"""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+class AdmissionController:
+    """Concurrency limiter with a bounded, deadline-limited wait queue"""
+
+    def __init__(self, max_concurrency: int, max_queue: int, queue_timeout: float):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.in_flight = 0
+        self.queued = 0
+        self.max_queued = 0
+        self.admitted = 0
+        self.shed_queue_full = 0
+        self.shed_deadline = 0
+        self.service_seconds = 0.01  # moving average, used for Retry-After
+        self.queue_waits = deque(maxlen=1000)
+
+    def retry_after(self) -> int:
+        """Seconds until the current queue is expected to drain"""
+        return max(1, math.ceil((self.queued + 1) * self.service_seconds / self.max_concurrency))
+
+    @asynccontextmanager
+    async def admit(self):
+        """Hold one execution slot for the body of the block, or raise Overloaded"""
+        start_time = time.perf_counter()
+        if self._semaphore.locked():
+            if self.queued >= self.max_queue:
+                self.shed_queue_full += 1
+                raise Overloaded("Prediction queue is full", self.retry_after())
+            self.queued += 1
+            self.max_queued = max(self.max_queued, self.queued)
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.shed_deadline += 1
+                raise Overloaded("Timed out waiting in the prediction queue", self.retry_after())
+            finally:
+                self.queued -= 1
+        else:
+            await self._semaphore.acquire()
+
+        self.admitted += 1
+        self.in_flight += 1
+        service_start = time.perf_counter()
+        self.queue_waits.append(service_start - start_time)
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+            self.service_seconds = 0.9 * self.service_seconds + 0.1 * (time.perf_counter() - service_start)
+
+    def metrics(self) -> dict:
+        """Current limits, queue depth and shed counters"""
+        waits = np.asarray(self.queue_waits) * 1000
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "queue_timeout_seconds": self.queue_timeout,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "max_queued": self.max_queued,
+            "admitted": self.admitted,
+            "shed_queue_full": self.shed_queue_full,
+            "shed_deadline": self.shed_deadline,
+            "queue_wait_ms_p50": float(np.percentile(waits, 50)) if len(waits) else 0.0,
+            "queue_wait_ms_p99": float(np.percentile(waits, 99)) if len(waits) else 0.0,
+            "service_ms_avg": self.service_seconds * 1000
+        }
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Benchmark /predict/batch: JSON rows/columns vs msgpack and Arrow IPC columnar payloads
+
+Runs the API in-process with TestClient, so the numbers cover request parsing,
+validation, encoding, model inference and response serialization but not the network.
+
+Usage:
+    MODEL_PATH=hypertension_model.pkl python benchmarks/bench_columnar.py --sizes 1000 100000 1000000
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi.testclient import TestClient
+
+import main
+
+
+def make_columns(n_rows, seed=42):
+    """Random valid inputs as integer columns"""
+    rng = np.random.default_rng(seed)
+    return {
+        'age': rng.integers(30, 101, n_rows),
+        'sex': rng.integers(0, 2, n_rows),
+        'year': rng.integers(2015, 2031, n_rows),
+        'country': rng.integers(0, len(main.COUNTRIES), n_rows)
+    }
+
+
+def json_request(columns):
+    rows = [
+        {'age': int(age), 'sex': 'Men' if sex == 0 else 'Women', 'year': int(year), 'country': main.COUNTRIES[country]}
+        for age, sex, year, country in zip(columns['age'], columns['sex'], columns['year'], columns['country'])
+    ]
+    return json.dumps({'rows': rows}).encode(), main.JSON_CONTENT_TYPE
+
+
+def json_columns_request(columns):
+    payload = {
+        'age': columns['age'].tolist(),
+        'sex': np.array(['Men', 'Women'])[columns['sex']].tolist(),
+        'year': columns['year'].tolist(),
+        'country': np.array(main.COUNTRIES)[columns['country']].tolist()
+    }
+    return json.dumps(payload).encode(), main.JSON_CONTENT_TYPE
+
+
+def msgpack_request(columns):
+    payload = {name: column.astype('<i4').tobytes() for name, column in columns.items()}
+    return main.msgpack.packb(payload), main.MSGPACK_CONTENT_TYPES[0]
+
+
+def arrow_request(columns):
+    pa = main.pa
+    table = pa.table({name: column.astype(np.int32) for name, column in columns.items()})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes(), main.ARROW_CONTENT_TYPE
+
+
+def decode_response(response, content_type):
+    if content_type == main.ARROW_CONTENT_TYPE:
+        return main.pa.ipc.open_stream(response.content).read_all().column('prediction').to_numpy()
+    if content_type in main.MSGPACK_CONTENT_TYPES:
+        payload = main.msgpack.unpackb(response.content)
+        return np.frombuffer(payload['prediction'], dtype=payload['dtype'])
+    return np.asarray(response.json()['predictions'])
+
+
+def run(client, build_request, columns, repeats):
+    """Best-of-N wall time for encode + request + decode"""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        body, content_type = build_request(columns)
+        response = client.post('/predict/batch', content=body, headers={'content-type': content_type})
+        response.raise_for_status()
+        predictions = decode_response(response, content_type)
+        best = min(best, time.perf_counter() - start)
+    return best, len(body), predictions
+
+
+def main_benchmark(sizes, repeats):
+    formats = [('json', json_request), ('json-col', json_columns_request)]
+    if main.msgpack is not None:
+        formats.append(('msgpack', msgpack_request))
+    if main.pa is not None:
+        formats.append(('arrow', arrow_request))
+
+    with TestClient(main.app) as client:
+        if main.model_data is None:
+            sys.exit("Model not loaded - set MODEL_PATH to a trained hypertension_model.pkl")
+
+        print(f"{'rows':>10} {'format':>8} {'seconds':>9} {'rows/s':>12} {'request MB':>11} {'vs json':>8}")
+        for n_rows in sizes:
+            columns = make_columns(n_rows)
+            reference = None
+            json_seconds = None
+            for name, build_request in formats:
+                seconds, body_size, predictions = run(client, build_request, columns, repeats)
+                if reference is None:
+                    reference, json_seconds = predictions, seconds
+                else:
+                    assert np.allclose(predictions, reference), f"{name} predictions differ from JSON"
+                print(f"{n_rows:>10,} {name:>8} {seconds:>9.3f} {n_rows / seconds:>12,.0f} "
+                      f"{body_size / 1e6:>11.2f} {json_seconds / seconds:>7.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100000, 1000000])
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+    main_benchmark(args.sizes, args.repeats)
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark POST /predict/csv: rows per second and peak server memory by upload size
+
+Calls the ASGI app directly. receive() hands over a CSV that is generated while it is
+uploaded, and send() counts and discards the response, so the only thing holding data
+is the endpoint. With --memory, the peak traced Python memory (tracemalloc) is reported
+too. It should stay flat as the upload grows. Tracing slows everything down, so the
+rows/s of a --memory run are not comparable with a plain run.
+
+Usage:
+    MODEL_PATH=hypertension_model.pkl python benchmarks/bench_csv_upload.py --rows 10000 100000 1000000
+    MODEL_PATH=hypertension_model.pkl python benchmarks/bench_csv_upload.py --rows 100000 1000000 --memory
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import main
+
+
+def generate_csv(n_rows, rows_per_piece=5000, seed=42):
+    """CSV bytes in pieces of rows_per_piece rows"""
+    rng = np.random.default_rng(seed)
+    countries, sexes = np.array(main.COUNTRIES), np.array(['Men', 'Women'])
+    yield b'patient_id,age,sex,year,country\n'
+    for start in range(0, n_rows, rows_per_piece):
+        size = min(rows_per_piece, n_rows - start)
+        ages, years = rng.integers(30, 101, size), rng.integers(2000, 2031, size)
+        sex, country = sexes[rng.integers(0, 2, size)], countries[rng.integers(0, len(countries), size)]
+        yield ''.join(
+            f'{i},{a},{s},{y},"{c}"\n' for i, a, s, y, c in zip(range(start, start + size), ages, sex, years, country)
+        ).encode()
+
+
+async def upload(n_rows, trace_memory):
+    """Send one generated upload through the app; returns the throughput and memory stats"""
+    pieces = generate_csv(n_rows)
+    response = {'bytes': 0, 'headers': {}, 'body_sent': False}
+    finished = asyncio.Event()
+
+    async def receive():
+        if response['body_sent']:
+            # Like a server: after the body, receive() waits for the client to go away
+            await finished.wait()
+            return {'type': 'http.disconnect'}
+        piece = next(pieces, None)
+        response['body_sent'] = piece is None
+        return {'type': 'http.request', 'body': piece or b'', 'more_body': piece is not None}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            response['status'] = message['status']
+            response['headers'] = {key.decode(): value.decode() for key, value in message['headers']}
+        elif message['type'] == 'http.response.body':
+            response['bytes'] += len(message.get('body', b''))
+            if not message.get('more_body', False):
+                finished.set()
+
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'POST', 'scheme': 'http',
+        'path': '/predict/csv', 'raw_path': b'/predict/csv', 'query_string': b'', 'root_path': '',
+        'headers': [(b'content-type', b'text/csv')], 'client': ('bench', 0), 'server': ('bench', 80)
+    }
+    if trace_memory:
+        tracemalloc.start()
+    start_time = time.perf_counter()
+    await main.app(scope, receive, send)
+    elapsed = time.perf_counter() - start_time
+    peak = tracemalloc.get_traced_memory()[1] if trace_memory else float('nan')
+    if trace_memory:
+        tracemalloc.stop()
+
+    if response.get('status') != 200:
+        raise RuntimeError(f"Upload failed with status {response.get('status')}")
+    return {
+        'server_rows_per_second': float(response['headers']['x-rows-per-second']),
+        'end_to_end_rows_per_second': n_rows / elapsed,
+        'response_mb': response['bytes'] / 1024 ** 2,
+        'peak_mb': peak / 1024 ** 2
+    }
+
+
+async def benchmark(sizes, trace_memory):
+    async with main.lifespan(main.app):
+        await upload(1000, False)  # warm up
+        for n_rows in sizes:
+            stats = await upload(n_rows, trace_memory)
+            memory = f"  peak traced memory {stats['peak_mb']:6.1f} MB" if trace_memory else ""
+            print(f"{n_rows:>9} rows  server {stats['server_rows_per_second']:>9.0f} rows/s  "
+                  f"end to end {stats['end_to_end_rows_per_second']:>9.0f} rows/s  "
+                  f"response {stats['response_mb']:7.1f} MB{memory}")
+
+
+def parse_args(argv=None):
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Benchmark streaming CSV scoring")
+    parser.add_argument('--rows', nargs='+', type=int, default=[10000, 100000, 500000])
+    parser.add_argument('--chunk-bytes', type=int, default=None, help="CSV_CHUNK_BYTES for the run")
+    parser.add_argument('--memory', action='store_true', help="Trace peak Python memory (slower)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.chunk_bytes:
+        main.CSV_CHUNK_BYTES = args.chunk_bytes
+    print(f"CSV_CHUNK_BYTES={main.CSV_CHUNK_BYTES}, CSV_SPOOL_BYTES={main.CSV_SPOOL_BYTES}")
+    asyncio.run(benchmark(args.rows, args.memory))
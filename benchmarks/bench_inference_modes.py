@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Benchmark INFERENCE_MODE (inline / threadpool / dedicated) at several concurrency levels
+
+Drives the ASGI app in-process with httpx.AsyncClient, so the event loop, the thread
+hops and the model are measured but not the network. For every mode and concurrency
+level it reports throughput, p50/p99 request latency and the p99 latency of
+/health/live polled alongside the load. The last number shows how responsive the
+event loop stays while inference runs.
+
+Usage:
+    MODEL_PATH=hypertension_model.pkl python benchmarks/bench_inference_modes.py --concurrency 1 4 16 64
+    MODEL_PATH=hypertension_model.pkl python benchmarks/bench_inference_modes.py --endpoint batch --batch-rows 2000
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import httpx
+
+import main
+
+MODES = ('inline', 'threadpool', 'dedicated')
+
+
+def make_requests(endpoint, n_requests, batch_rows, seed=42):
+    """(path, json) pairs of random valid inputs"""
+    rng = np.random.default_rng(seed)
+    requests = []
+    for _ in range(n_requests):
+        rows = batch_rows if endpoint == 'batch' else 1
+        columns = {
+            'age': rng.integers(30, 101, rows).tolist(),
+            'sex': np.array(['Men', 'Women'])[rng.integers(0, 2, rows)].tolist(),
+            'year': rng.integers(2015, 2031, rows).tolist(),
+            'country': np.array(main.COUNTRIES)[rng.integers(0, len(main.COUNTRIES), rows)].tolist()
+        }
+        if endpoint == 'batch':
+            requests.append(('/predict/batch', columns))
+        else:
+            requests.append(('/predict', {name: values[0] for name, values in columns.items()}))
+    return requests
+
+
+async def run_level(client, requests, concurrency):
+    """Send all requests with `concurrency` workers while polling the liveness probe"""
+    queue = list(reversed(requests))
+    latencies, probe_latencies = [], []
+    done = asyncio.Event()
+
+    async def worker():
+        while queue:
+            path, payload = queue.pop()
+            start_time = time.perf_counter()
+            response = await client.post(path, json=payload)
+            latencies.append(time.perf_counter() - start_time)
+            response.raise_for_status()
+
+    async def probe():
+        while not done.is_set():
+            start_time = time.perf_counter()
+            await client.get('/health/live')
+            probe_latencies.append(time.perf_counter() - start_time)
+            await asyncio.sleep(0.005)
+
+    probe_task = asyncio.create_task(probe())
+    start_time = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start_time
+    done.set()
+    await probe_task
+
+    latencies = np.asarray(latencies) * 1000
+    probes = np.asarray(probe_latencies) * 1000
+    return {
+        'requests_per_second': len(latencies) / elapsed,
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+        'probe_p99_ms': float(np.percentile(probes, 99)) if len(probes) else float('nan')
+    }
+
+
+async def benchmark(modes, levels, requests):
+    results = []
+    for mode in modes:
+        main.INFERENCE_MODE = mode
+        async with main.lifespan(main.app):
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+                await run_level(client, requests[:50], 4)  # warm up
+                for concurrency in levels:
+                    stats = await run_level(client, requests, concurrency)
+                    results.append({'mode': mode, 'concurrency': concurrency, **stats})
+                    print(f"{mode:<10} c={concurrency:<4} {stats['requests_per_second']:8.0f} req/s  "
+                          f"p50 {stats['p50_ms']:7.2f} ms  p99 {stats['p99_ms']:7.2f} ms  "
+                          f"probe p99 {stats['probe_p99_ms']:7.2f} ms")
+    return results
+
+
+def parse_args(argv=None):
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Compare inference execution modes")
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+    parser.add_argument('--concurrency', nargs='+', type=int, default=[1, 4, 16, 64])
+    parser.add_argument('--requests', type=int, default=2000, help="Requests per mode and concurrency level")
+    parser.add_argument('--endpoint', choices=['predict', 'batch'], default='predict')
+    parser.add_argument('--batch-rows', type=int, default=1000, help="Rows per request with --endpoint batch")
+    parser.add_argument('--threads', type=int, default=None, help="INFERENCE_THREADS for the dedicated pool")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.threads:
+        main.INFERENCE_THREADS = args.threads
+    # Measure execution, not load shedding
+    main.MAX_QUEUED_PREDICTIONS = 10 ** 6
+    main.QUEUE_TIMEOUT_SECONDS = 3600
+
+    print(f"Endpoint: {args.endpoint}, {args.requests} requests per level, "
+          f"{main.INFERENCE_THREADS} dedicated threads, {main.MAX_CONCURRENT_PREDICTIONS} concurrent predictions")
+    asyncio.run(benchmark(args.modes, args.concurrency, make_requests(args.endpoint, args.requests, args.batch_rows)))
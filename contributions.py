@@ -0,0 +1,128 @@
+"""
+Per-feature contributions to a prediction, grouped into year, sex, age group and country
+
+A prediction is split as baseline + one contribution per group, and the parts add up to
+the prediction:
+- linear models (sklearn, SGD, the from-scratch model): the baseline is the intercept,
+  the prediction at the training mean of the scaled features. A column contributes its
+  coefficient times its scaled value.
+- decision trees and random forests: decision-path (Saabas) contributions. The baseline
+  is the mean root value. Every split on the path adds the change in node value to the
+  group of the feature it splits on, averaged over the trees.
+
+The trees are flattened into one set of node arrays when the model is loaded. A batch is
+then explained by walking every (row, tree) path at once, one vectorized step per tree
+level, so the cost stays within a small factor of model.predict. Feature columns outside
+the four groups (the proportion columns of the prevalence model, which the API leaves at
+0) are reported as 'other'.
+"""
+
+import numpy as np
+
+GROUPS = ('year', 'sex', 'age_group', 'country', 'other')
+
+def feature_groups(encoder) -> np.ndarray:
+    """Group index (into GROUPS) of every column of a FeatureEncoder layout"""
+    groups = np.full(encoder.n_features, GROUPS.index('other'), dtype=np.intp)
+    for column, group in ((encoder.year_column, 'year'), (encoder.sex_column, 'sex'), (encoder.age_column, 'age_group')):
+        if column is not None:
+            groups[column] = GROUPS.index(group)
+    groups[encoder.country_columns[encoder.country_columns >= 0]] = GROUPS.index('country')
+    return groups
+
+class ContributionExplainer:
+    """Baseline + grouped contributions for a linear model or a forest of regression trees"""
+
+    def __init__(self, model, groups):
+        self.groups = np.asarray(groups, dtype=np.intp)
+        # Only report 'other' when the layout has such columns
+        self.group_names = [name for i, name in enumerate(GROUPS) if i < len(GROUPS) - 1 or (self.groups == i).any()]
+        self.n_groups = len(GROUPS)
+
+        if hasattr(model, 'estimators_') or hasattr(model, 'tree_'):
+            self.kind = 'trees'
+            self._flatten([estimator.tree_ for estimator in getattr(model, 'estimators_', [model])])
+        else:
+            self.kind = 'linear'
+            coef = getattr(model, 'coef_', getattr(model, 'weights', None))
+            intercept = getattr(model, 'intercept_', getattr(model, 'bias', None))
+            self.coef = np.asarray(coef, dtype=np.float64).reshape(-1)
+            self.baseline = float(np.asarray(intercept, dtype=np.float64).reshape(-1)[0])
+            # (n_features, n_groups) one-hot matrix, so grouping is one matrix product
+            self.group_matrix = np.zeros((len(self.groups), self.n_groups))
+            self.group_matrix[np.arange(len(self.groups)), self.groups] = 1
+
+    @classmethod
+    def for_model(cls, model, encoder):
+        """Explainer for a single-output model of a supported kind, None otherwise"""
+        estimators = getattr(model, 'estimators_', None)
+        if estimators is not None:
+            supported = len(estimators) > 0 and all(hasattr(tree, 'tree_') for tree in estimators)
+            outputs = estimators[0].tree_.n_outputs if supported else 0
+        elif hasattr(model, 'tree_'):
+            supported, outputs = True, model.tree_.n_outputs
+        else:
+            coef = getattr(model, 'coef_', getattr(model, 'weights', None))
+            supported = coef is not None and np.ndim(coef) == 1
+            outputs = 1
+        if not supported or outputs != 1:
+            return None
+        return cls(model, feature_groups(encoder))
+
+    def _flatten(self, trees):
+        """Concatenate the trees' node arrays; leaves point to themselves with a zero delta"""
+        offsets = np.cumsum([0] + [tree.node_count for tree in trees])
+        self.roots = offsets[:-1]
+        self.n_trees = len(trees)
+        self.depth = max(tree.max_depth for tree in trees)
+
+        left, right, feature, threshold, value = [], [], [], [], []
+        for offset, tree in zip(offsets, trees):
+            nodes = np.arange(tree.node_count)
+            is_leaf = tree.children_left < 0
+            left.append(np.where(is_leaf, nodes, tree.children_left) + offset)
+            right.append(np.where(is_leaf, nodes, tree.children_right) + offset)
+            feature.append(np.where(is_leaf, 0, tree.feature))
+            threshold.append(np.where(is_leaf, np.inf, tree.threshold))
+            value.append(tree.value[:, 0, 0])
+        self.left, self.right = np.concatenate(left), np.concatenate(right)
+        self.feature, self.threshold = np.concatenate(feature), np.concatenate(threshold)
+        value = np.concatenate(value).astype(np.float64)
+
+        self.is_leaf = self.left == np.arange(len(self.left))
+        self.left_delta = value[self.left] - value
+        self.right_delta = value[self.right] - value
+        self.node_group = self.groups[self.feature]
+        self.baseline = float(value[self.roots].mean())
+
+    def explain(self, features) -> np.ndarray:
+        """(n_rows, n_groups) contributions of scaled feature rows, in GROUPS order"""
+        features = np.asarray(features)
+        if self.kind == 'linear':
+            return (features * self.coef) @ self.group_matrix
+
+        # Trees compare float32 feature values, like sklearn's predict
+        features = features.astype(np.float32)
+        n_rows = len(features)
+        contributions = np.zeros(n_rows * self.n_groups)
+        rows = np.repeat(np.arange(n_rows), self.n_trees)
+        nodes = np.tile(self.roots, n_rows)
+        for _ in range(self.depth):
+            active = ~self.is_leaf[nodes]
+            rows, nodes = rows[active], nodes[active]
+            if not len(nodes):
+                break
+            go_left = features[rows, self.feature[nodes]] <= self.threshold[nodes]
+            delta = np.where(go_left, self.left_delta[nodes], self.right_delta[nodes])
+            contributions += np.bincount(rows * self.n_groups + self.node_group[nodes], weights=delta,
+                                         minlength=len(contributions))
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return contributions.reshape(n_rows, self.n_groups) / self.n_trees
+
+    def explain_dict(self, features) -> dict:
+        """Baseline and named contributions of a single scaled feature row"""
+        contributions = self.explain(features)[0]
+        return {
+            'baseline': self.baseline,
+            'contributions': {name: float(contributions[GROUPS.index(name)]) for name in self.group_names}
+        }
@@ -0,0 +1,176 @@
+"""
+Incremental parsing of CSV uploads for POST /predict/csv
+
+The request body is consumed as it arrives. A multipart/form-data body goes through
+python-multipart's push parser, which hands over the bytes of the `file` part piece by
+piece. A text/csv body is used as is. CsvChunker then cuts those bytes into blocks of
+about `chunk_bytes` at line boundaries, and each block carries the header line, so every
+block can be parsed and scored on its own. However large the upload, at most one block
+plus one network read is held in memory.
+
+Quoted fields must not contain line breaks, since blocks are cut at line boundaries.
+"""
+
+import numpy as np
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:
+    try:
+        from multipart.multipart import MultipartParser, parse_options_header
+    except ImportError:
+        MultipartParser = parse_options_header = None
+
+CSV_CONTENT_TYPES = ('text/csv', 'application/csv', 'text/plain')
+MULTIPART_CONTENT_TYPE = 'multipart/form-data'
+FILE_FIELD = b'file'
+BLANK_BYTES = np.frombuffer(b' \t\r', dtype=np.uint8)
+
+class UploadError(ValueError):
+    """The upload is not a CSV this endpoint can score"""
+
+class CsvChunker:
+    """Cut a CSV byte stream into header-prefixed blocks of complete lines"""
+
+    def __init__(self, chunk_bytes: int):
+        self.chunk_bytes = chunk_bytes
+        self.header = None
+        self._buffer = bytearray()
+
+    def feed(self, data: bytes) -> list:
+        """Blocks completed by `data` (usually none or one)"""
+        self._buffer += data
+        if self.header is None:
+            end = self._buffer.find(b'\n')
+            if end < 0:
+                return []
+            # Drop a UTF-8 byte order mark so the first column name matches
+            self.header = bytes(self._buffer[:end + 1]).removeprefix(b'\xef\xbb\xbf')
+            del self._buffer[:end + 1]
+
+        blocks = []
+        while len(self._buffer) >= self.chunk_bytes:
+            end = self._buffer.rfind(b'\n', 0, self.chunk_bytes)
+            if end < 0:
+                end = self._buffer.find(b'\n', self.chunk_bytes)  # a line longer than a block
+                if end < 0:
+                    break
+            blocks.append(self.header + bytes(self._buffer[:end + 1]))
+            del self._buffer[:end + 1]
+        return blocks
+
+    def finish(self) -> list:
+        """The last block, if any rows remain"""
+        if self.header is None:
+            if not self._buffer.strip():
+                return []
+            self.feed(b'\n')
+        rows, self._buffer = bytes(self._buffer), bytearray()
+        return [self.header + rows] if rows.strip() else []
+
+def field_counts(block: bytes) -> np.ndarray:
+    """
+    Number of fields on every non-blank line of a CSV block, header included
+
+    Counted with array operations instead of a second parse: a comma separates fields
+    unless an odd number of quotes precede it on its line. Blank and whitespace-only
+    lines are skipped like pandas skips them, so the counts line up with its rows.
+    """
+    data = np.frombuffer(block, dtype=np.uint8)
+    ends = np.flatnonzero(data == ord('\n'))
+    if len(data) and data[-1] != ord('\n'):
+        ends = np.append(ends, len(data))
+    if len(ends) == 0:
+        return np.zeros(0, dtype=np.int64)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+
+    quotes = np.concatenate(([0], np.cumsum(data == ord('"'))))  # quotes before each position
+    commas = np.flatnonzero(data == ord(','))
+    lines = np.searchsorted(ends, commas)
+    separators = (quotes[commas] - quotes[starts[lines]]) % 2 == 0
+    counts = np.bincount(lines[separators], minlength=len(ends)) + 1
+
+    content = np.concatenate(([0], np.cumsum(~np.isin(data, BLANK_BYTES))))
+    return counts[content[ends] > content[starts]]
+
+class MultipartFileReader:
+    """Push parser that extracts the bytes of the `file` field from a multipart body"""
+
+    def __init__(self, content_type_header: str):
+        if MultipartParser is None:
+            raise UploadError("multipart uploads require python-multipart; send the CSV as text/csv instead")
+        _, options = parse_options_header(content_type_header)
+        boundary = options.get(b'boundary')
+        if not boundary:
+            raise UploadError("multipart body without a boundary")
+        self._output = []
+        self._in_file = False
+        self._header_field = b''
+        self._header_value = b''
+        self._disposition = b''
+        self.found = False
+        self._parser = MultipartParser(boundary.strip(b'"'), {
+            'on_part_begin': self._on_part_begin,
+            'on_header_field': self._on_header_field,
+            'on_header_value': self._on_header_value,
+            'on_header_end': self._on_header_end,
+            'on_headers_finished': self._on_headers_finished,
+            'on_part_data': self._on_part_data,
+            'on_part_end': self._on_part_end
+        })
+
+    def _on_part_begin(self):
+        self._disposition = b''
+        self._header_field = self._header_value = b''
+
+    def _on_header_field(self, data, start, end):
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data, start, end):
+        self._header_value += data[start:end]
+
+    def _on_header_end(self):
+        if self._header_field.lower() == b'content-disposition':
+            self._disposition = self._header_value
+        self._header_field = self._header_value = b''
+
+    def _on_headers_finished(self):
+        _, options = parse_options_header(self._disposition)
+        # Only the first `file` part is scored
+        self._in_file = options.get(b'name') == FILE_FIELD and not self.found
+        self.found = self.found or self._in_file
+
+    def _on_part_data(self, data, start, end):
+        if self._in_file:
+            self._output.append(bytes(data[start:end]))
+
+    def _on_part_end(self):
+        self._in_file = False
+
+    def feed(self, data: bytes) -> bytes:
+        """Bytes of the file part contained in this piece of the body"""
+        self._parser.write(data)
+        output, self._output = b''.join(self._output), []
+        return output
+
+    def finish(self):
+        self._parser.finalize()
+        if not self.found:
+            raise UploadError(f"multipart body has no '{FILE_FIELD.decode()}' field")
+
+async def iter_csv_bytes(body_stream, content_type_header: str):
+    """CSV bytes of a multipart/form-data or text/csv request body, as they arrive"""
+    media_type = content_type_header.split(';')[0].strip().lower()
+    if media_type in CSV_CONTENT_TYPES:
+        async for data in body_stream:
+            yield data
+        return
+    if media_type != MULTIPART_CONTENT_TYPE:
+        raise UploadError(f"Unsupported content type: {media_type or 'none'}; send multipart/form-data or text/csv")
+
+    reader = MultipartFileReader(content_type_header)
+    async for data in body_stream:
+        output = reader.feed(data)
+        if output:
+            yield output
+    reader.finish()
@@ -0,0 +1,131 @@
+"""
+Constant-memory sketches of production inputs and predictions, and drift scores
+
+The sketches are plain Python lists of counters: one per country, sex, age group and
+year code, plus a fixed-bin histogram of predictions over [0, 1] (prevalence is a
+proportion). Recording one request is a handful of list increments, a few hundred
+nanoseconds, so no per-request data is ever stored. The histogram doubles as a quantile
+sketch with a resolution of one bin width.
+
+Drift compares the sketches with a reference distribution: the training data recorded in
+the model artifact by model_comparison.py, or the observation store for older artifacts.
+Each dimension gets a population stability index (PSI) and a total variation distance.
+As a rule of thumb, a PSI below 0.1 is stable, 0.1-0.25 is a moderate shift and above
+0.25 is a major shift.
+"""
+
+import numpy as np
+
+PREDICTION_BINS = 100
+PREDICTION_RANGE = (0.0, 1.0)
+FIRST_YEAR, LAST_YEAR = 1990, 2030  # year range accepted by the API
+
+def training_distribution(countries, sexes, age_groups, years, target) -> dict:
+    """
+    Reference distribution, as model_comparison.py saves it in the artifact
+
+    countries/sexes/age_groups/years are the rows' raw values, target their prevalence.
+    Counts are keyed by name so they survive changes to the code order.
+    """
+    def counts(values):
+        names, totals = np.unique(np.asarray(values), return_counts=True)
+        return {str(name): int(total) for name, total in zip(names, totals)}
+
+    return {
+        'country': counts(countries),
+        'sex': counts(sexes),
+        'age_group': counts(age_groups),
+        'year': counts(years),
+        'prediction': {
+            'range': list(PREDICTION_RANGE),
+            'counts': np.histogram(target, bins=PREDICTION_BINS, range=PREDICTION_RANGE)[0].tolist()
+        },
+        'rows': len(target)
+    }
+
+def psi(expected, actual, eps=1e-4) -> float:
+    """Population stability index between two count vectors"""
+    expected = np.asarray(expected, dtype=float)
+    actual = np.asarray(actual, dtype=float)
+    p = np.maximum(expected / max(expected.sum(), 1), eps)
+    q = np.maximum(actual / max(actual.sum(), 1), eps)
+    return float(np.sum((q - p) * np.log(q / p)))
+
+def total_variation(expected, actual) -> float:
+    """Half the L1 distance between the two normalized count vectors"""
+    expected = np.asarray(expected, dtype=float)
+    actual = np.asarray(actual, dtype=float)
+    return float(0.5 * np.abs(expected / max(expected.sum(), 1) - actual / max(actual.sum(), 1)).sum())
+
+def histogram_quantiles(counts, quantiles=(0.1, 0.5, 0.9), value_range=PREDICTION_RANGE) -> dict:
+    """Approximate quantiles (bin midpoints) from a fixed-bin histogram"""
+    counts = np.asarray(counts, dtype=float)
+    if counts.sum() == 0:
+        return {f"p{int(q * 100)}": None for q in quantiles}
+    edges = np.linspace(*value_range, len(counts) + 1)
+    midpoints = (edges[:-1] + edges[1:]) / 2
+    cumulative = np.cumsum(counts) / counts.sum()
+    return {f"p{int(q * 100)}": float(midpoints[np.searchsorted(cumulative, q)]) for q in quantiles}
+
+class DriftMonitor:
+    """Counters per input code and a prediction histogram; all updates are O(1)"""
+
+    def __init__(self, n_countries: int, n_age_groups: int):
+        self.country = [0] * n_countries
+        self.sex = [0, 0]
+        self.age = [0] * n_age_groups
+        self.year = [0] * (LAST_YEAR - FIRST_YEAR + 1)
+        self.predictions = [0] * PREDICTION_BINS
+        self.count = 0
+
+    def observe(self, country: int, sex: int, age: int, year: int, prediction: float):
+        """Record one prediction; inputs are already-validated codes"""
+        self.country[country] += 1
+        self.sex[sex] += 1
+        self.age[age] += 1
+        self.year[year - FIRST_YEAR] += 1
+        bin_index = int(prediction * PREDICTION_BINS)
+        self.predictions[0 if bin_index < 0 else PREDICTION_BINS - 1 if bin_index >= PREDICTION_BINS else bin_index] += 1
+        self.count += 1
+
+    def observe_batch(self, country, sex, age, year, predictions):
+        """Record a batch of valid rows (numpy columns of codes) in a few vectorized passes"""
+        for counters, codes in (
+            (self.country, country), (self.sex, sex), (self.age, age), (self.year, np.asarray(year) - FIRST_YEAR)
+        ):
+            for code, total in enumerate(np.bincount(codes, minlength=len(counters))):
+                counters[code] += int(total)
+        bins = np.clip((np.asarray(predictions) * PREDICTION_BINS).astype(np.intp), 0, PREDICTION_BINS - 1)
+        for code, total in enumerate(np.bincount(bins, minlength=PREDICTION_BINS)):
+            self.predictions[code] += int(total)
+        self.count += len(bins)
+
+    def report(self, reference: dict, countries: list, sexes: list, age_groups: list) -> dict:
+        """Drift scores of every sketch against a training_distribution()-style reference"""
+        years = [str(year) for year in range(FIRST_YEAR, LAST_YEAR + 1)]
+        dimensions = {}
+        for name, counters, labels in (
+            ('country', self.country, countries), ('sex', self.sex, sexes),
+            ('age_group', self.age, age_groups), ('year', self.year, years)
+        ):
+            expected = [reference[name].get(label, 0) for label in labels]
+            unseen = sum(count for count, reference_count in zip(counters, expected) if reference_count == 0)
+            shares = np.asarray(counters) / max(self.count, 1) - np.asarray(expected) / max(sum(expected), 1)
+            dimensions[name] = {
+                'psi': psi(expected, counters),
+                'total_variation': total_variation(expected, counters),
+                'unseen_share': unseen / max(self.count, 1),
+                'largest_shifts': {labels[i]: float(shares[i]) for i in np.argsort(-np.abs(shares))[:3]}
+            }
+
+        reference_predictions = reference['prediction']['counts']
+        return {
+            'requests': self.count,
+            'inputs': dimensions,
+            'predictions': {
+                'psi': psi(reference_predictions, self.predictions),
+                'total_variation': total_variation(reference_predictions, self.predictions),
+                'production_quantiles': histogram_quantiles(self.predictions),
+                'training_quantiles': histogram_quantiles(reference_predictions)
+            }
+        }
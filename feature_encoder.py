@@ -0,0 +1,169 @@
+"""
+Encoder from raw inputs to the model's feature layout, shared by training and serving
+
+model_comparison.py fits it on the training export and saves it in the model artifact.
+main.py and API/prediction.py load it from there. For older artifacts they rebuild it
+from feature_names. The layout is the one the notebook produced with get_dummies:
+- the numeric export columns (Year and the proportion columns), in export order
+- Sex_binary and Age_encoded
+- one-hot Country_* columns, with the first country as the all-zero baseline
+
+Column positions are resolved once, when the encoder is built. Encoding a row is then
+four assignments into a reused buffer, and encoding a batch is one vectorized pass per
+column. Sex, age group and country are passed as integer codes; the *_code(s) helpers
+map names to codes. The artifact stores the encoder as plain data (to_dict), so
+loading a model does not depend on this module's import path.
+"""
+
+import threading
+
+import numpy as np
+
+AGE_GROUPS = ['30-34', '35-39', '40-44', '45-49', '50-54', '55-59', '60-64', '65-69', '70-74', '75-79', '80+']
+SEX_MAPPING = {'male': 0, 'men': 0, 'female': 1, 'women': 1}
+
+# Raw columns that are encoded rather than copied
+CATEGORICAL_COLUMNS = ('Country', 'Sex', 'Age')
+ENCODED_COLUMNS = ('Year', 'Sex_binary', 'Age_encoded')
+
+class FeatureEncoder:
+    """Precompiled (year, sex, age group, country) -> feature row/matrix encoder"""
+
+    def __init__(self, feature_names, countries=None, age_groups=AGE_GROUPS, sex_mapping=SEX_MAPPING,
+                 dtype='float64'):
+        self.feature_names = list(feature_names)
+        # Without an explicit list, the countries are the ones with a one-hot column
+        self.countries = list(countries) if countries is not None else [
+            name[len('Country_'):] for name in self.feature_names if name.startswith('Country_')
+        ]
+        self.age_groups = list(age_groups)
+        self.sex_mapping = {str(name).lower(): int(code) for name, code in sex_mapping.items()}
+        self.dtype = np.dtype(dtype)
+
+        columns = {name: i for i, name in enumerate(self.feature_names)}
+        self.n_features = len(columns)
+        self.year_column = columns.get('Year')
+        self.sex_column = columns.get('Sex_binary')
+        self.age_column = columns.get('Age_encoded')
+        # Country code -> one-hot column (-1 for the baseline). The trailing -1 is where
+        # code -1 (unknown country) lands, so unknown countries encode like the baseline.
+        self.country_columns = np.array(
+            [columns.get(f'Country_{country}', -1) for country in self.countries] + [-1], dtype=np.intp
+        )
+        self.passthrough_columns = [
+            name for name in self.feature_names if name not in ENCODED_COLUMNS and not name.startswith('Country_')
+        ]
+        self._country_lookup = {country.casefold(): i for i, country in enumerate(self.countries)}
+        self._age_lookup = {group: i for i, group in enumerate(self.age_groups)}
+        self._local = threading.local()
+
+    @classmethod
+    def fit(cls, frame, target, age_groups=AGE_GROUPS, sex_mapping=SEX_MAPPING, dtype='float64'):
+        """
+        Derive the layout from a training frame, matching get_dummies(drop_first=True)
+
+        target is the target column, or a list of them for a multi-output model.
+        """
+        targets = {target} if isinstance(target, str) else set(target)
+        countries = sorted(frame['Country'].unique())
+        numeric = [name for name in frame.columns if name not in CATEGORICAL_COLUMNS and name not in targets]
+        feature_names = numeric + ['Sex_binary', 'Age_encoded'] + [f'Country_{country}' for country in countries[1:]]
+        return cls(feature_names, countries, age_groups, sex_mapping, dtype)
+
+    def to_dict(self) -> dict:
+        """Plain-data state for the model artifact; FeatureEncoder(**state) rebuilds it"""
+        return {
+            'feature_names': self.feature_names,
+            'countries': self.countries,
+            'age_groups': self.age_groups,
+            'sex_mapping': self.sex_mapping,
+            'dtype': self.dtype.name
+        }
+
+    def __getstate__(self):
+        return self.to_dict()
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def country_code(self, name) -> int:
+        """Code of one country name (case-insensitive), -1 if unknown"""
+        return self._country_lookup.get(str(name).strip().casefold(), -1)
+
+    def sex_code(self, name) -> int:
+        """Code of one sex name (case-insensitive), -1 if unknown"""
+        return self.sex_mapping.get(str(name).strip().lower(), -1)
+
+    def age_code(self, age_group) -> int:
+        """Code of one age group label, -1 if unknown"""
+        return self._age_lookup.get(age_group, -1)
+
+    def age_codes(self, age) -> np.ndarray:
+        """Vectorized bucketing of ages in years: 5-year groups from 30, the last group open-ended"""
+        return np.minimum(np.floor_divide(np.asarray(age) - 30, 5), len(self.age_groups) - 1)
+
+    def country_codes(self, names) -> np.ndarray:
+        """Vectorized country_code; each distinct name is looked up once"""
+        return self._codes(names, lambda name: self.country_code(name))
+
+    def sex_codes(self, names) -> np.ndarray:
+        """Vectorized sex_code; each distinct name is looked up once"""
+        return self._codes(names, lambda name: self.sex_code(name))
+
+    @staticmethod
+    def _codes(names, lookup) -> np.ndarray:
+        uniques, inverse = np.unique(np.asarray(names, dtype=str), return_inverse=True)
+        return np.array([lookup(name) for name in uniques], dtype=np.intp)[inverse.reshape(-1)]
+
+    def encode_row(self, year, sex, age, country, out=None) -> np.ndarray:
+        """
+        Encode one row of codes into a (1, n_features) buffer
+
+        Without out, the buffer is reused per thread and overwritten by the next call,
+        so callers must not keep it.
+        """
+        if out is None:
+            out = getattr(self._local, 'row', None)
+            if out is None:
+                out = self._local.row = np.zeros((1, self.n_features), dtype=self.dtype)
+        out.fill(0)
+        row = out[0]
+        if self.year_column is not None:
+            row[self.year_column] = year
+        if self.sex_column is not None:
+            row[self.sex_column] = sex
+        if self.age_column is not None:
+            row[self.age_column] = age
+        column = self.country_columns[country]
+        if column >= 0:
+            row[column] = 1
+        return out
+
+    def encode_batch(self, year, sex, age, country) -> np.ndarray:
+        """Encode columns of codes into an (n_rows, n_features) matrix, one pass per column"""
+        features = np.zeros((len(year), self.n_features), dtype=self.dtype)
+        if self.year_column is not None:
+            features[:, self.year_column] = year
+        if self.sex_column is not None:
+            features[:, self.sex_column] = sex
+        if self.age_column is not None:
+            features[:, self.age_column] = age
+        columns = self.country_columns[np.asarray(country, dtype=np.intp)]
+        rows = np.flatnonzero(columns >= 0)
+        features[rows, columns[rows]] = 1
+        return features
+
+    def encode_frame(self, frame) -> np.ndarray:
+        """
+        Encode a raw export frame (Country, Sex, Age labels, Year and the numeric columns)
+
+        Numeric feature columns missing from the frame are left as zeros.
+        """
+        ages = frame['Age'].map(self._age_lookup).to_numpy(dtype=float)
+        features = self.encode_batch(
+            frame['Year'].to_numpy(), self.sex_codes(frame['Sex']), ages, self.country_codes(frame['Country'])
+        )
+        for name in self.passthrough_columns:
+            if name in frame.columns:
+                features[:, self.feature_names.index(name)] = frame[name].to_numpy()
+        return features
@@ -1,24 +1,61 @@
+import argparse
 import joblib
 import numpy as np
 import pandas as pd
 import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
-def load_model():
+# The feature encoder is shared with training and the API at the repository root
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
+from feature_encoder import FeatureEncoder
+
+# Try multiple possible paths for the model file
+MODEL_PATHS = [
+    'hypertension_model.pkl',
+    '../linear_regression/hypertension_model.pkl',
+    '../linear_regression/best_hypertension_model.pkl',
+    'best_hypertension_model.pkl'
+]
+
+AGE_GROUPS = ['30-34', '35-39', '40-44', '45-49', '50-54', '55-59', '60-64', '65-69', '70-74', '75-79', '80+']
+
+COUNTRIES = [
+    "Algeria", "Angola", "Benin", "Botswana", "Burkina Faso", "Burundi",
+    "Cabo Verde", "Cameroon", "Central African Republic", "Chad", "Comoros",
+    "Democratic Republic of the Congo", "Republic of the Congo", "Côte d'Ivoire",
+    "Djibouti", "Egypt", "Equatorial Guinea", "Eritrea", "Eswatini", "Ethiopia",
+    "Gabon", "Gambia", "Ghana", "Guinea", "Guinea-Bissau", "Kenya", "Lesotho",
+    "Liberia", "Libya", "Madagascar", "Malawi", "Mali", "Mauritania", "Mauritius",
+    "Morocco", "Mozambique", "Namibia", "Niger", "Nigeria", "Rwanda",
+    "Sao Tome and Principe", "Senegal", "Seychelles", "Sierra Leone", "Somalia",
+    "South Africa", "South Sudan", "Sudan", "Tanzania", "Togo", "Tunisia",
+    "Uganda", "Zambia", "Zimbabwe"
+]
+
+# Countries are matched case-insensitively, like FeatureEncoder.country_code
+COUNTRY_KEYS = [country.casefold() for country in COUNTRIES]
+
+INPUT_COLUMNS = ['age', 'sex', 'country', 'year']
+
+def find_model_path(model_path=None):
+    """Return the model file to load, or None if it cannot be found"""
+    candidates = [model_path] if model_path else MODEL_PATHS
+    for path in candidates:
+        if os.path.exists(path):
+            return path
+    return None
+
+def load_model(model_path=None):
     """Load the saved best model"""
     try:
-        # Try multiple possible paths for the model file
-        possible_paths = [
-            'hypertension_model.pkl',
-            '../linear_regression/hypertension_model.pkl',
-            '../linear_regression/best_hypertension_model.pkl',
-            'best_hypertension_model.pkl'
-        ]
-        
-        for path in possible_paths:
-            if os.path.exists(path):
-                model_data = joblib.load(path)
-                print(f"Model loaded from: {path}")
-                return model_data
+        path = find_model_path(model_path)
+        if path is not None:
+            model_data = joblib.load(path)
+            print(f"Model loaded from: {path}")
+            return model_data
         
         print("Model file not found. Please ensure hypertension_model.pkl exists.")
         return None
@@ -26,6 +63,26 @@ def load_model():
         print(f"Error loading model: {str(e)}")
         return None
 
+# Resolved model path -> (file mtime, model data, feature encoder), so repeated
+# make_prediction calls reuse the loaded model and the encoder's row buffer
+_model_cache = {}
+
+def load_cached_model(model_path=None):
+    """The model data and its encoder, loaded again only when the model file changes"""
+    path = find_model_path(model_path)
+    if path is None:
+        print("Model file not found. Please ensure hypertension_model.pkl exists.")
+        return None, None
+    path = os.path.abspath(path)
+    mtime = os.path.getmtime(path)
+    cached = _model_cache.get(path)
+    if cached is None or cached[0] != mtime:
+        model_data = load_model(path)
+        if model_data is None:
+            return None, None
+        cached = _model_cache[path] = (mtime, model_data, load_encoder(model_data))
+    return cached[1], cached[2]
+
 def age_to_group(age):
     """Convert numeric age to age group string"""
     if 30 <= age <= 34:
@@ -98,8 +155,8 @@ def make_prediction(age, sex, country, year):
     Returns:
     - dict with prediction results
     """
-    # Load model
-    model_data = load_model()
+    # Load model (cached after the first call)
+    model_data, encoder = load_cached_model()
     if model_data is None:
         return {"error": "Model not found"}
     
@@ -112,7 +169,6 @@ def make_prediction(age, sex, country, year):
         # Extract model components
         model = model_data['model']
         scaler = model_data['scaler']
-        feature_names = model_data['feature_names']
         model_name = model_data['model_name']
         
         # Convert age to encoded value
@@ -123,18 +179,7 @@ def make_prediction(age, sex, country, year):
         # Convert sex to binary
         sex_binary = 0 if sex.lower() in ['male', 'men'] else 1
         
-        features = np.zeros(len(feature_names))
-        
-        # Set the features we know
-        if 'Sex_binary' in feature_names:
-            features[feature_names.index('Sex_binary')] = sex_binary
-        if 'Age_encoded' in feature_names:
-            features[feature_names.index('Age_encoded')] = age_encoded
-        if 'Year' in feature_names:
-            features[feature_names.index('Year')] = year
-        
-        # Reshape for prediction
-        features = features.reshape(1, -1)
+        features = encoder.encode_row(year, sex_binary, age_encoded, encoder.country_code(country))
         
         # Scale features
         features_scaled = scaler.transform(features)
@@ -189,6 +234,158 @@ def test_predictions():
             print(f"Age Group: {result['age_group']}")
             print(f"Model Used: {result['model_used']}")
 
+def load_encoder(model_data):
+    """The artifact's feature encoder, or one rebuilt from feature_names for older artifacts"""
+    state = model_data.get('feature_encoder') or {'feature_names': model_data['feature_names']}
+    return FeatureEncoder(**{**state, 'dtype': model_data.get('dtype', 'float64')})
+
+def encode_chunk(chunk, encoder):
+    """
+    Encode a chunk of raw rows into the model feature matrix in one vectorized pass
+    
+    Returns the feature matrix, a boolean mask of valid rows and the encoded age groups.
+    Invalid rows (out-of-range age/year, unknown sex or country) are left as zeros.
+    """
+    features = np.zeros((len(chunk), encoder.n_features), dtype=encoder.dtype)
+    
+    age = pd.to_numeric(chunk['age'], errors='coerce').to_numpy(dtype=float)
+    year = pd.to_numeric(chunk['year'], errors='coerce').to_numpy(dtype=float)
+    sex = encoder.sex_codes(chunk['sex'])
+    country = chunk['country'].astype(str).str.strip()
+    known_country = np.isin(country.str.casefold().to_numpy(), COUNTRY_KEYS)
+    country = country.to_numpy()
+    
+    # Age bucketing: 5-year groups from 30, everything from 80 up is '80+'
+    age_encoded = encoder.age_codes(age)
+    
+    valid = (
+        (age >= 30) & (age <= 100) &
+        (year >= 1990) & (year <= 2030) &
+        (sex >= 0) & known_country
+    )
+    rows = np.flatnonzero(valid)
+    features[rows] = encoder.encode_batch(year[rows], sex[rows], age_encoded[rows], encoder.country_codes(country[rows]))
+    
+    return features, valid, np.where(valid, age_encoded, -1).astype(np.intp)
+
+# Per-process state for bulk scoring workers
+_worker_state = None
+
+def _init_worker(model_path):
+    """Load the model once per worker process"""
+    global _worker_state
+    model_data = load_model(model_path)
+    _worker_state = {
+        'model': model_data['model'],
+        'scaler': model_data['scaler'],
+        'encoder': load_encoder(model_data)
+    }
+
+def score_chunk(chunk):
+    """Score one chunk of raw rows inside a worker process"""
+    features, valid, age_encoded = encode_chunk(chunk, _worker_state['encoder'])
+    
+    predictions = np.full(len(chunk), np.nan)
+    if valid.any():
+        features_scaled = _worker_state['scaler'].transform(features[valid])
+        predictions[valid] = _worker_state['model'].predict(features_scaled)
+    
+    result = chunk.copy()
+    result['age_group'] = np.array(AGE_GROUPS + [None], dtype=object)[age_encoded]
+    result['prediction'] = predictions
+    return result
+
+def iter_input_chunks(input_path, chunksize):
+    """Yield DataFrame chunks of (age, sex, country, year) rows from a CSV or Parquet file"""
+    if input_path.lower().endswith('.parquet'):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Reading Parquet files requires pyarrow (pip install pyarrow)")
+        
+        parquet_file = pq.ParquetFile(input_path)
+        for batch in parquet_file.iter_batches(batch_size=chunksize, columns=INPUT_COLUMNS):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(input_path, chunksize=chunksize, usecols=INPUT_COLUMNS)
+
+def open_output(output_path):
+    """Return (write, close) callables that append scored chunks to a CSV or Parquet file"""
+    if output_path.lower().endswith('.parquet'):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Writing Parquet files requires pyarrow (pip install pyarrow)")
+        
+        state = {'writer': None}
+        
+        def write(result):
+            table = pa.Table.from_pandas(result, preserve_index=False)
+            if state['writer'] is None:
+                state['writer'] = pq.ParquetWriter(output_path, table.schema)
+            state['writer'].write_table(table)
+        
+        def close():
+            if state['writer'] is not None:
+                state['writer'].close()
+        
+        return write, close
+    
+    state = {'header': True}
+    
+    def write(result):
+        result.to_csv(output_path, mode='w' if state['header'] else 'a', header=state['header'], index=False)
+        state['header'] = False
+    
+    return write, lambda: None
+
+def score_file(input_path, output_path, model_path=None, chunksize=50000, workers=None):
+    """
+    Score a CSV or Parquet file of (age, sex, country, year) rows in chunks
+    
+    Chunks are encoded and scored across a process pool. At most two chunks per
+    worker are in flight at any time and results are written as they complete
+    (in input order), so peak memory depends on the chunk size, not the file size.
+    
+    Returns the number of rows scored.
+    """
+    model_path = find_model_path(model_path)
+    if model_path is None:
+        raise FileNotFoundError("Model file not found. Please ensure hypertension_model.pkl exists.")
+    
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = 2 * workers
+    write, close = open_output(output_path)
+    
+    rows_scored = 0
+    start_time = time.perf_counter()
+    
+    def write_next(pending):
+        nonlocal rows_scored
+        result = pending.popleft().result()
+        write(result)
+        rows_scored += len(result)
+        elapsed = time.perf_counter() - start_time
+        sys.stderr.write(f"\rScored {rows_scored:,} rows ({rows_scored / max(elapsed, 1e-9):,.0f} rows/s)")
+        sys.stderr.flush()
+    
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(model_path,)) as executor:
+            pending = deque()
+            for chunk in iter_input_chunks(input_path, chunksize):
+                pending.append(executor.submit(score_chunk, chunk))
+                if len(pending) >= max_in_flight:
+                    write_next(pending)
+            while pending:
+                write_next(pending)
+    finally:
+        close()
+    
+    elapsed = time.perf_counter() - start_time
+    sys.stderr.write(f"\nDone: {rows_scored:,} rows in {elapsed:.2f}s -> {output_path}\n")
+    return rows_scored
+
 def interactive_prediction():
     """Interactive prediction interface"""
     print("\n" + "="*50)
@@ -224,9 +421,27 @@ def interactive_prediction():
             print("\n\nExiting...")
             break
 
-if __name__ == "__main__":
-    # Test predictions
-    test_predictions()
+def parse_args(argv=None):
+    """Parse command line arguments for bulk scoring"""
+    parser = argparse.ArgumentParser(description="Hypertension prevalence prediction utilities")
+    subparsers = parser.add_subparsers(dest='command', required=True)
     
-    # Interactive mode
-    interactive_prediction() 
\ No newline at end of file
+    score_parser = subparsers.add_parser('score', help="Bulk-score a CSV or Parquet file of (age, sex, country, year) rows")
+    score_parser.add_argument('input', help="Input .csv or .parquet file")
+    score_parser.add_argument('output', help="Output .csv or .parquet file")
+    score_parser.add_argument('--model', default=None, help="Path to the model file")
+    score_parser.add_argument('--chunksize', type=int, default=50000, help="Rows per chunk (default: 50000)")
+    score_parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        args = parse_args()
+        score_file(args.input, args.output, model_path=args.model, chunksize=args.chunksize, workers=args.workers)
+    else:
+        # Test predictions
+        test_predictions()
+        
+        # Interactive mode
+        interactive_prediction() 
\ No newline at end of file
@@ -0,0 +1,227 @@
+"""
+Parallel k-fold cross-validation for the model comparison
+
+Folds are encoded and scaled once in the parent process and written to a single joblib
+file that worker processes memory-map read-only. The linear regressions never touch the
+raw rows per fold: per-fold Gram sums (Z^T Z, Z^T y with Z = [1, X]) are computed once and
+each training fold uses "total minus held-out fold" sums. The sklearn regression solves the
+normal equations from them and the from-scratch model runs its gradient descent on the
+scaled Gram matrix, which gives the same iterates as working on the rows.
+"""
+
+import os
+import tempfile
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from sklearn.model_selection import GroupKFold, KFold
+from sklearn.preprocessing import StandardScaler
+
+from model_comparison import create_models
+
+# Models fitted from the per-fold Gram sums instead of refitting on rows
+GRAM_MODELS = ('Linear Regression (from scratch)', 'Linear Regression (sklearn)')
+
+def make_folds(n_samples, n_splits=5, groups=None):
+    """(train_index, test_index) pairs for k-fold or grouped k-fold"""
+    if groups is not None:
+        return list(GroupKFold(n_splits=n_splits).split(np.zeros(n_samples), groups=groups))
+    return list(KFold(n_splits=n_splits, shuffle=True, random_state=42).split(np.zeros(n_samples)))
+
+def fold_metrics(y_true, y_pred):
+    """Same metrics as train_models"""
+    mse = mean_squared_error(y_true, y_pred)
+    return {
+        'mse': mse,
+        'rmse': np.sqrt(mse),
+        'mae': mean_absolute_error(y_true, y_pred),
+        'r2': r2_score(y_true, y_pred)
+    }
+
+def prepare_scaled_folds(X, y, folds, path):
+    """Scale every fold once and dump them to a joblib file for read-only memory mapping"""
+    fold_data = []
+    for train_index, test_index in folds:
+        scaler = StandardScaler()
+        fold_data.append({
+            'X_train': scaler.fit_transform(X[train_index]),
+            'X_test': scaler.transform(X[test_index]),
+            'y_train': y[train_index],
+            'y_test': y[test_index]
+        })
+    joblib.dump(fold_data, path)
+
+def _fit_fold(path, name, fold):
+    """Worker: fit one (model, fold) pair on the shared, memory-mapped folds"""
+    data = joblib.load(path, mmap_mode='r')[fold]
+    model = create_models()[name]
+    start_time = time.perf_counter()
+    model.fit(data['X_train'], np.asarray(data['y_train']))
+    fit_seconds = time.perf_counter() - start_time
+    metrics = fold_metrics(data['y_test'], model.predict(data['X_test']))
+    metrics['fit_seconds'] = fit_seconds
+    return name, fold, metrics
+
+def fold_gram_sums(X, y, folds):
+    """Gram sums (Z^T Z, Z^T y, y^T y) of each held-out fold, with Z = [1, X]"""
+    sums = []
+    for _, test_index in folds:
+        Z = np.hstack([np.ones((len(test_index), 1)), X[test_index]])
+        y_fold = y[test_index]
+        sums.append((Z.T @ Z, Z.T @ y_fold, y_fold @ y_fold))
+    return sums
+
+def scaling_transform(gram):
+    """
+    Matrix A with Z @ A = [1, (X - mean) / scale] for the StandardScaler fitted on the same rows
+
+    The scaler statistics are recovered from the Gram matrix of Z = [1, X] itself.
+    """
+    n_samples = gram[0, 0]
+    mean = gram[0, 1:] / n_samples
+    variance = np.maximum(np.diag(gram)[1:] / n_samples - mean ** 2, 0)
+    scale = np.sqrt(variance)
+    scale[scale < 10 * np.finfo(float).eps] = 1.0  # as StandardScaler does for constant features
+
+    A = np.eye(len(gram))
+    A[0, 1:] = -mean / scale
+    A[1:, 1:] = np.diag(1 / scale)
+    return A
+
+def least_squares_on_gram(gram, xty):
+    """
+    LinearRegression fit from Gram sums, solved in the scaled space for conditioning
+
+    Constant features (e.g. a country missing from a grouped training fold) get a zero
+    weight, as in sklearn. Returns raw-space parameters [bias, weights].
+    """
+    A = scaling_transform(gram)
+    scaled_gram = A.T @ gram @ A
+    scaled_xty = A.T @ xty
+
+    # Center: the intercept is the mean target, the weights solve the centered system
+    n_samples = gram[0, 0]
+    weights = np.linalg.lstsq(scaled_gram[1:, 1:], scaled_xty[1:], rcond=None)[0]
+    theta = np.concatenate([[scaled_xty[0] / n_samples], weights])
+    return A @ theta
+
+def gradient_descent_on_gram(gram, xty, yty, model):
+    """
+    LinearRegressionFromScratch.fit run on the scaled Gram matrix instead of the rows
+
+    Returns raw-space parameters [bias, weights] and the loss history.
+    """
+    n_samples = gram[0, 0]
+    A = scaling_transform(gram)
+    scaled_gram = A.T @ gram @ A
+    scaled_xty = A.T @ xty
+
+    theta = np.zeros(len(gram))
+    loss_history = []
+    for iteration in range(model.max_iterations):
+        # Loss of the current parameters, then the gradient step (same order as fit)
+        loss_history.append((theta @ scaled_gram @ theta - 2 * theta @ scaled_xty + yty) / n_samples)
+        theta = theta - model.learning_rate * (2 / n_samples) * (scaled_gram @ theta - scaled_xty)
+        if iteration > 0 and abs(loss_history[-1] - loss_history[-2]) < model.tolerance:
+            break
+
+    # Back to raw space so the held-out rows can be predicted as Z @ raw_theta
+    return A @ theta, loss_history
+
+def fit_gram_models(X, y, folds):
+    """Cross-validate the linear regressions from per-fold Gram sums"""
+    sums = fold_gram_sums(X, y, folds)
+    total_gram = sum(gram for gram, _, _ in sums)
+    total_xty = sum(xty for _, xty, _ in sums)
+    total_yty = sum(yty for _, _, yty in sums)
+    scratch = create_models()['Linear Regression (from scratch)']
+
+    results = {name: [] for name in GRAM_MODELS}
+    for fold, (_, test_index) in enumerate(folds):
+        gram, xty, yty = sums[fold]
+        train_gram, train_xty, train_yty = total_gram - gram, total_xty - xty, total_yty - yty
+        Z_test = np.hstack([np.ones((len(test_index), 1)), X[test_index]])
+
+        start_time = time.perf_counter()
+        theta = least_squares_on_gram(train_gram, train_xty)
+        metrics = fold_metrics(y[test_index], Z_test @ theta)
+        metrics['fit_seconds'] = time.perf_counter() - start_time
+        results['Linear Regression (sklearn)'].append(metrics)
+
+        start_time = time.perf_counter()
+        theta, _ = gradient_descent_on_gram(train_gram, train_xty, train_yty, scratch)
+        metrics = fold_metrics(y[test_index], Z_test @ theta)
+        metrics['fit_seconds'] = time.perf_counter() - start_time
+        results['Linear Regression (from scratch)'].append(metrics)
+
+    return results
+
+def cross_validate_models(X, y, groups=None, n_splits=5, n_jobs=-1):
+    """
+    K-fold (or grouped k-fold) cross-validation of every model in create_models()
+
+    Returns {'folds': per-model lists of fold metrics, 'summary': per-model mean/std,
+    'n_splits', 'grouped', 'wall_seconds'}.
+    """
+    kind = "grouped-by-country " if groups is not None else ""
+    print(f"\nRunning {n_splits}-fold {kind}cross-validation...")
+    start_time = time.perf_counter()
+
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    folds = make_folds(len(y), n_splits, groups)
+
+    fold_results = fit_gram_models(X, y, folds)
+
+    row_models = [name for name in create_models() if name not in GRAM_MODELS]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'folds.joblib')
+        prepare_scaled_folds(X, y, folds, path)
+        outputs = Parallel(n_jobs=n_jobs)(
+            delayed(_fit_fold)(path, name, fold) for name in row_models for fold in range(len(folds))
+        )
+
+    for name in row_models:
+        fold_results[name] = [metrics for output_name, _, metrics in sorted(outputs, key=lambda o: o[1]) if output_name == name]
+
+    summary = {}
+    for name, folds_metrics in fold_results.items():
+        frame = pd.DataFrame(folds_metrics)
+        summary[name] = {f'{metric}_{stat}': getattr(frame[metric], stat)() for metric in frame.columns for stat in ('mean', 'std')}
+
+    return {
+        'folds': fold_results,
+        'summary': summary,
+        'n_splits': n_splits,
+        'grouped': groups is not None,
+        'wall_seconds': time.perf_counter() - start_time
+    }
+
+def print_cv_results(cv_results):
+    """Print mean ± std of each metric across folds, ranked by mean R²"""
+    print("\n" + "="*80)
+    kind = "GROUPED " if cv_results['grouped'] else ""
+    print(f"{cv_results['n_splits']}-FOLD {kind}CROSS-VALIDATION RESULTS")
+    print("="*80)
+
+    summary = cv_results['summary']
+    ranking = sorted(summary, key=lambda name: summary[name]['r2_mean'], reverse=True)
+    comparison_data = []
+    for name in ranking:
+        stats = summary[name]
+        comparison_data.append({
+            'Model': name,
+            'MSE': f"{stats['mse_mean']:.4f} ± {stats['mse_std']:.4f}",
+            'RMSE': f"{stats['rmse_mean']:.4f} ± {stats['rmse_std']:.4f}",
+            'MAE': f"{stats['mae_mean']:.4f} ± {stats['mae_std']:.4f}",
+            'R²': f"{stats['r2_mean']:.4f} ± {stats['r2_std']:.4f}",
+            'Fit (s)': f"{stats['fit_seconds_mean']:.3f}"
+        })
+    print(pd.DataFrame(comparison_data).to_string(index=False))
+
+    print(f"\n🏆 BEST MODEL (mean R²): {ranking[0]}")
+    print(f"Total wall time: {cv_results['wall_seconds']:.2f}s")
@@ -0,0 +1,186 @@
+"""
+Distil the production Random Forest into a smaller, faster surrogate
+
+The API only ever sees a finite input grid: 11 age groups x 2 sexes x the valid years
+x one country column (or the dropped baseline), with every other feature at 0. The
+training rows add the feature values the grid cannot enumerate (the diagnosed/treated/
+controlled proportions). The teacher forest is evaluated once on grid + training rows
+and each candidate is fitted to reproduce those predictions. The
+candidates are a shallow forest, a single tree and a linear model with pairwise
+interactions (age x country, sex x age, ...). Every candidate is then compared on:
+
+- fidelity: RMSE and max |error| against the teacher over the full API grid
+- accuracy: R² and RMSE on the held-out test set against the observed prevalence
+- artifact size (pickled bytes) and single-row / grid-batch predict latency
+
+The chosen surrogate is saved in the same artifact format as the teacher, so the API can
+serve it unchanged by pointing MODEL_PATH at it.
+
+Usage:
+    python model_comparison.py --data africa.csv --distill
+"""
+
+import pickle
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import Ridge
+from sklearn.metrics import mean_squared_error, r2_score
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import PolynomialFeatures
+from sklearn.tree import DecisionTreeRegressor
+
+from model_comparison import (AGE_MAP, AGE_ORDER, SEX_MAP, FeatureEncoder, create_models, export_distribution,
+                              load_and_prepare_data, load_data)
+
+# Years accepted by the API (PredictionRequest validates 1990-2030)
+GRID_YEARS = range(1990, 2031)
+
+# A surrogate is acceptable if it stays this close to the teacher on the grid (prevalence
+# is a 0-1 proportion, so 0.01 is one percentage point) and on test R²
+FIDELITY_TOLERANCE = 0.01
+R2_TOLERANCE = 0.01
+
+def create_surrogates():
+    """Fresh, unfitted surrogate candidates"""
+    return {
+        'Shallow forest (10 x depth 8)': RandomForestRegressor(n_estimators=10, max_depth=8, random_state=42),
+        'Single tree (depth 16)': DecisionTreeRegressor(max_depth=16, random_state=42),
+        'Linear + interactions': make_pipeline(
+            PolynomialFeatures(degree=2, interaction_only=True, include_bias=False),
+            Ridge(alpha=1e-3)
+        )
+    }
+
+def input_grid(feature_names, years=GRID_YEARS):
+    """Raw feature matrix of every valid (age group, sex, year, country) combination"""
+    encoder = FeatureEncoder(feature_names)
+    # One code per country column plus -1, the all-zero baseline country
+    age, sex, year, country = (
+        grid.ravel() for grid in np.meshgrid(
+            np.arange(len(AGE_ORDER)), np.arange(2), np.asarray(years), np.arange(-1, len(encoder.countries)),
+            indexing='ij'
+        )
+    )
+    return encoder.encode_batch(year, sex, age, country)
+
+def predict_latency(model, X, repeats=200):
+    """Median seconds for a single-row predict call"""
+    row = X[:1]
+    timings = []
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        model.predict(row)
+        timings.append(time.perf_counter() - start_time)
+    return float(np.median(timings))
+
+def batch_seconds(model, X, repeats=3):
+    """Best-of seconds to predict the whole of X"""
+    best = float('inf')
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        model.predict(X)
+        best = min(best, time.perf_counter() - start_time)
+    return best
+
+def evaluate_surrogate(model, grid_scaled, teacher_grid, X_test, y_test):
+    """Fidelity to the teacher, test-set accuracy, size and latency of one fitted model"""
+    grid_error = model.predict(grid_scaled) - teacher_grid
+    test_predictions = model.predict(X_test)
+    return {
+        'teacher_rmse': float(np.sqrt(np.mean(grid_error ** 2))),
+        'teacher_max_abs': float(np.max(np.abs(grid_error))),
+        'test_r2': r2_score(y_test, test_predictions),
+        'test_rmse': float(np.sqrt(mean_squared_error(y_test, test_predictions))),
+        'bytes': len(pickle.dumps(model)),
+        'single_ms': predict_latency(model, X_test) * 1000,
+        'grid_ms': batch_seconds(model, grid_scaled) * 1000
+    }
+
+def choose_surrogate(report):
+    """Fastest single-row surrogate within both tolerances, else the most faithful one"""
+    teacher_r2 = report['Teacher']['test_r2']
+    candidates = [name for name in report if name != 'Teacher']
+    close = [
+        name for name in candidates
+        if report[name]['teacher_rmse'] <= FIDELITY_TOLERANCE and report[name]['test_r2'] >= teacher_r2 - R2_TOLERANCE
+    ]
+    if close:
+        return min(close, key=lambda name: report[name]['single_ms'])
+    return min(candidates, key=lambda name: report[name]['teacher_rmse'])
+
+def distill_forest(data_path='hypertension_by_country.csv', output_path='hypertension_model_distilled.pkl'):
+    """Train the teacher forest, fit every surrogate to its predictions and save the chosen one"""
+    africa = load_data(data_path)
+    X_train, X_test, y_train, y_test, scaler, encoder = load_and_prepare_data(africa=africa)
+    feature_names = encoder.feature_names
+
+    print("\nTraining teacher (Random Forest)...")
+    teacher = create_models()['Random Forest'].fit(X_train, y_train)
+
+    grid_scaled = scaler.transform(pd.DataFrame(input_grid(feature_names), columns=feature_names))
+    teacher_grid = teacher.predict(grid_scaled)
+    print(f"Input grid: {len(grid_scaled)} rows ({len(AGE_ORDER)} ages x 2 sexes x {len(GRID_YEARS)} years x countries)")
+    
+    # Distillation set: the API grid plus the training rows, labelled by the teacher
+    X_distill = np.vstack([grid_scaled, X_train])
+    y_distill = np.concatenate([teacher_grid, teacher.predict(X_train)])
+
+    report = {'Teacher': evaluate_surrogate(teacher, grid_scaled, teacher_grid, X_test, y_test)}
+    surrogates = create_surrogates()
+    for name, surrogate in surrogates.items():
+        print(f"Distilling {name}...")
+        start_time = time.perf_counter()
+        surrogate.fit(X_distill, y_distill)
+        report[name] = evaluate_surrogate(surrogate, grid_scaled, teacher_grid, X_test, y_test)
+        report[name]['fit_seconds'] = time.perf_counter() - start_time
+
+    best_name = choose_surrogate(report)
+    model_data = {
+        'model': surrogates[best_name],
+        'scaler': scaler,
+        'feature_names': feature_names,
+        'feature_encoder': encoder.to_dict(),
+        'model_name': f"Distilled {best_name}",
+        'r2_score': report[best_name]['test_r2'],
+        'age_mapping': AGE_MAP,
+        'sex_mapping': SEX_MAP,
+        'version': 1,
+        'dtype': 'float64',
+        'training_distribution': export_distribution(africa),
+        'max_year': int(africa['Year'].max()),
+        'teacher': 'Random Forest',
+        'distillation_report': report
+    }
+    with open(output_path, 'wb') as file:
+        pickle.dump(model_data, file)
+
+    return best_name, report, output_path
+
+def print_distillation_report(best_name, report, output_path):
+    """Print the teacher vs surrogate comparison"""
+    print("\n" + "="*80)
+    print("FOREST DISTILLATION")
+    print("="*80)
+
+    rows = []
+    for name, stats in report.items():
+        rows.append({
+            'Model': name,
+            'RMSE vs teacher': f"{stats['teacher_rmse']:.5f}",
+            'Max |err| vs teacher': f"{stats['teacher_max_abs']:.4f}",
+            'Test R²': f"{stats['test_r2']:.4f}",
+            'Test RMSE': f"{stats['test_rmse']:.4f}",
+            'Size (KiB)': f"{stats['bytes'] / 1024:.0f}",
+            '1-row (ms)': f"{stats['single_ms']:.3f}",
+            'Grid (ms)': f"{stats['grid_ms']:.1f}"
+        })
+    print(pd.DataFrame(rows).to_string(index=False))
+
+    teacher, best = report['Teacher'], report[best_name]
+    print(f"\n🏆 Surrogate: {best_name} — {teacher['bytes'] / best['bytes']:.0f}x smaller, "
+          f"{teacher['single_ms'] / best['single_ms']:.1f}x faster per row, "
+          f"test R² {best['test_r2'] - teacher['test_r2']:+.4f} vs the teacher")
+    print(f"Saved as '{output_path}' (serve it with MODEL_PATH={output_path})")
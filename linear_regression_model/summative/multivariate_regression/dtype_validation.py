@@ -0,0 +1,87 @@
+"""
+float32 vs float64 validation for the dtype policy
+
+Trains every model in create_models() once per dtype on the same split and reports the
+accuracy impact on the test set (R² change and the largest prediction difference between
+the two precisions), the memory of the scaled feature matrices, the pickled model size
+and single-threaded predict throughput.
+
+Usage:
+    python model_comparison.py --data africa.csv --dtype-report
+"""
+
+import pickle
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import r2_score
+
+from model_comparison import create_models, load_and_prepare_data
+
+DTYPES = ('float64', 'float32')
+
+def predict_throughput(model, X, repeats=5):
+    """Rows per second of model.predict on X (best of several runs)"""
+    best = float('inf')
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        model.predict(X)
+        best = min(best, time.perf_counter() - start_time)
+    return len(X) / best
+
+def compare_dtypes(data_path='hypertension_by_country.csv'):
+    """Train every model in float64 and float32 and collect per-model accuracy, memory and throughput"""
+    runs = {}
+    for dtype in DTYPES:
+        X_train, X_test, y_train, y_test, _, _ = load_and_prepare_data(data_path, dtype=np.dtype(dtype))
+        runs[dtype] = {'nbytes': X_train.nbytes + X_test.nbytes, 'y_test': y_test, 'models': {}}
+        for name, model in create_models().items():
+            model.fit(X_train, y_train)
+            predictions = model.predict(X_test)
+            runs[dtype]['models'][name] = {
+                'predictions': np.asarray(predictions, dtype=np.float64),
+                'prediction_dtype': np.asarray(predictions).dtype.name,
+                'r2': r2_score(y_test, predictions),
+                'model_bytes': len(pickle.dumps(model)),
+                'rows_per_second': predict_throughput(model, X_test)
+            }
+
+    report = {'feature_bytes': {dtype: runs[dtype]['nbytes'] for dtype in DTYPES}, 'models': {}}
+    for name in runs['float64']['models']:
+        wide, narrow = runs['float64']['models'][name], runs['float32']['models'][name]
+        report['models'][name] = {
+            'r2_float64': wide['r2'],
+            'r2_float32': narrow['r2'],
+            'r2_delta': narrow['r2'] - wide['r2'],
+            'max_abs_diff': float(np.max(np.abs(narrow['predictions'] - wide['predictions']))),
+            'prediction_dtype': narrow['prediction_dtype'],
+            'bytes_float64': wide['model_bytes'],
+            'bytes_float32': narrow['model_bytes'],
+            'throughput_ratio': narrow['rows_per_second'] / wide['rows_per_second']
+        }
+    return report
+
+def print_dtype_report(report):
+    """Print the float32 vs float64 comparison"""
+    print("\n" + "="*80)
+    print("FLOAT32 VS FLOAT64")
+    print("="*80)
+
+    feature_bytes = report['feature_bytes']
+    print(f"Scaled feature matrices: {feature_bytes['float64'] / 1024:.0f} KiB (float64) -> "
+          f"{feature_bytes['float32'] / 1024:.0f} KiB (float32)")
+
+    rows = []
+    for name, stats in report['models'].items():
+        rows.append({
+            'Model': name,
+            'R² (f64)': f"{stats['r2_float64']:.5f}",
+            'R² (f32)': f"{stats['r2_float32']:.5f}",
+            'ΔR²': f"{stats['r2_delta']:+.2e}",
+            'Max |Δpred|': f"{stats['max_abs_diff']:.2e}",
+            'Output': stats['prediction_dtype'],
+            'Size f64/f32 (KiB)': f"{stats['bytes_float64'] / 1024:.0f}/{stats['bytes_float32'] / 1024:.0f}",
+            'Speedup': f"{stats['throughput_ratio']:.2f}x"
+        })
+    print(pd.DataFrame(rows).to_string(index=False))
@@ -0,0 +1,166 @@
+"""
+On-disk memoization of model fits for model_comparison.py
+
+A fitted model is stored under a key hashed from:
+- the training matrix and target (shape, dtype and bytes)
+- the model class and its hyperparameters
+- the numpy, scikit-learn and Python versions
+- the class source, for models defined in this repository (LinearRegressionFromScratch)
+
+Re-running the comparison after a change to plotting or reporting loads each unchanged
+model instead of refitting it. Any change to the data, a hyperparameter, a library
+version or the from-scratch implementation is a different key, so it refits. Entries
+are joblib files written atomically. A hit refreshes the file's mtime, and when the
+cache grows past its size limit the least recently used entries are deleted first.
+
+Usage:
+    python model_comparison.py --data africa.csv --fit-cache          # memoize in .fit_cache/
+    python fit_cache.py                                               # list the cache
+    python fit_cache.py --prune 256                                   # evict down to 256 MB
+    python fit_cache.py --clear                                       # delete every entry
+"""
+
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import platform
+import tempfile
+import time
+
+import joblib
+import numpy as np
+import sklearn
+
+DEFAULT_DIR = '.fit_cache'
+DEFAULT_MAX_MB = 1024
+
+def hash_arrays(*arrays) -> str:
+    """Content hash of the arrays' shapes, dtypes and bytes"""
+    digest = hashlib.sha256()
+    for array in arrays:
+        array = np.ascontiguousarray(array)
+        digest.update(f"{array.shape}{array.dtype.str}".encode())
+        digest.update(memoryview(array).cast('B'))
+    return digest.hexdigest()
+
+def model_signature(model) -> dict:
+    """Class, hyperparameters and, for non-library classes, a hash of the class source"""
+    cls = type(model)
+    params = model.get_params(deep=True) if hasattr(model, 'get_params') else vars(model)
+    signature = {
+        'class': f"{cls.__module__}.{cls.__qualname__}",
+        'params': json.dumps(params, sort_keys=True, default=repr)
+    }
+    if not cls.__module__.startswith('sklearn'):
+        signature['source'] = hashlib.sha256(inspect.getsource(cls).encode()).hexdigest()
+    return signature
+
+class FitCache:
+    """Directory of fitted models keyed by data, model and library versions"""
+
+    def __init__(self, directory=DEFAULT_DIR, max_bytes=DEFAULT_MAX_MB * 1024 ** 2):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, model, data_hash: str, **extra) -> str:
+        """Cache key of fitting `model` on the data hashed by hash_arrays()"""
+        fields = {
+            'data': data_hash,
+            'model': model_signature(model),
+            'versions': {'numpy': np.__version__, 'sklearn': sklearn.__version__, 'python': platform.python_version()},
+            'extra': extra
+        }
+        return hashlib.sha256(json.dumps(fields, sort_keys=True, default=repr).encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.joblib")
+
+    def load(self, key: str):
+        """
+        The stored entry, or None on a miss
+        
+        An entry that cannot be unpickled (truncated, or written by code that has since
+        changed) is deleted and counts as a miss, so the model is refitted.
+        """
+        path = self._path(key)
+        try:
+            entry = joblib.load(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception as e:  # unpickling raises almost anything: UnpicklingError, AttributeError, ValueError, ...
+            print(f"Discarding unreadable fit cache entry {os.path.basename(path)[:16]}: {type(e).__name__}: {e}")
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            self.misses += 1
+            return None
+        os.utime(path)  # most recently used
+        self.hits += 1
+        return entry
+
+    def store(self, key: str, entry) -> None:
+        """Write an entry atomically, then evict down to max_bytes"""
+        handle, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        os.close(handle)
+        joblib.dump(entry, temp_path)
+        os.replace(temp_path, self._path(key))
+        self.prune(self.max_bytes)
+
+    def entries(self) -> list:
+        """(path, bytes, mtime) of every entry, least recently used first"""
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.joblib'):
+                stat = os.stat(os.path.join(self.directory, name))
+                entries.append((os.path.join(self.directory, name), stat.st_size, stat.st_mtime))
+        return sorted(entries, key=lambda entry: entry[2])
+
+    def prune(self, max_bytes: int) -> int:
+        """Delete least recently used entries until the cache fits in max_bytes; returns the count"""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for path, size, _ in entries:
+            if total <= max_bytes:
+                break
+            os.remove(path)
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self) -> int:
+        """Delete every entry"""
+        return self.prune(0)
+
+def print_cache(cache):
+    """List the entries, most recently used first"""
+    entries = cache.entries()
+    print(f"Fit cache {os.path.abspath(cache.directory)}: {len(entries)} entries, "
+          f"{sum(size for _, size, _ in entries) / 1024 ** 2:.1f} MB")
+    for path, size, mtime in reversed(entries):
+        print(f"  {os.path.basename(path)[:16]}  {size / 1024 ** 2:8.2f} MB  "
+              f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(mtime))}")
+
+def parse_args(argv=None):
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Inspect or clean up the model_comparison fit cache")
+    parser.add_argument('--dir', default=DEFAULT_DIR, help=f"Cache directory (default: {DEFAULT_DIR})")
+    parser.add_argument('--prune', type=float, default=None, metavar='MB', help="Evict least recently used entries down to MB")
+    parser.add_argument('--clear', action='store_true', help="Delete every entry")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    cache = FitCache(args.dir)
+    if args.clear:
+        print(f"Removed {cache.clear()} entries")
+    elif args.prune is not None:
+        print(f"Removed {cache.prune(int(args.prune * 1024 ** 2))} entries")
+    print_cache(cache)
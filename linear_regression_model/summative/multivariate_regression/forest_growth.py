@@ -0,0 +1,125 @@
+"""
+Grow the Random Forest in steps and stop when out-of-bag R² stops improving
+
+The forest starts with STEP trees and gains STEP more per round through warm_start, so
+earlier trees are never refitted. After each round the out-of-bag R² is read from
+oob_score_, which needs no validation split: every tree is scored on the rows its
+bootstrap sample left out. Growth stops when a round adds less than min_gain, or at
+max_trees (the fixed forest's size). Fewer trees give a faster fit, a smaller artifact
+and faster /predict calls.
+
+Usage:
+    python model_comparison.py --data africa.csv --grow-forest          # train with early stopping
+    python model_comparison.py --data africa.csv --forest-growth-report # compare with the fixed forest
+"""
+
+import pickle
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.metrics import r2_score
+
+from distillation import predict_latency
+from model_comparison import create_models, load_and_prepare_data
+
+STEP = 10
+MIN_GAIN = 0.001
+
+def grow_forest(X_train, y_train, step=STEP, min_gain=MIN_GAIN, max_trees=None):
+    """
+    Fit the Random Forest from create_models() in steps of `step` trees
+
+    Returns the fitted forest and the growth curve, one entry per round with the tree
+    count, the out-of-bag R² and the cumulative fit seconds.
+    """
+    forest = clone(create_models()['Random Forest'])
+    max_trees = max_trees or forest.n_estimators
+    forest.set_params(n_estimators=min(step, max_trees), warm_start=True, oob_score=True)
+
+    curve = []
+    start_time = time.perf_counter()
+    while True:
+        forest.fit(X_train, y_train)
+        curve.append({
+            'trees': forest.n_estimators,
+            'oob_r2': forest.oob_score_,
+            'seconds': time.perf_counter() - start_time
+        })
+        gain = curve[-1]['oob_r2'] - curve[-2]['oob_r2'] if len(curve) > 1 else np.inf
+        if gain < min_gain or forest.n_estimators >= max_trees:
+            break
+        forest.n_estimators = min(forest.n_estimators + step, max_trees)
+
+    # Back to plain fit() semantics, so refitting the saved model starts from scratch, and
+    # drop the out-of-bag results (one prediction per training row) from the saved artifact
+    forest.set_params(warm_start=False, oob_score=False)
+    del forest.oob_prediction_, forest.oob_score_
+    return forest, curve
+
+def print_growth_curve(curve):
+    """Print the out-of-bag R² after every round"""
+    print(f"Forest growth (stopped at {curve[-1]['trees']} trees):")
+    previous = None
+    for point in curve:
+        gain = f"{point['oob_r2'] - previous:+.4f}" if previous is not None else ""
+        print(f"  {point['trees']:>4} trees  OOB R² {point['oob_r2']:.4f} {gain:>8}  ({point['seconds']:.2f}s)")
+        previous = point['oob_r2']
+
+def evaluate_forest(forest, X_test, y_test, fit_seconds):
+    """Accuracy, size, fit time and latency of one fitted forest"""
+    start_time = time.perf_counter()
+    y_pred = forest.predict(X_test)
+    batch_seconds = time.perf_counter() - start_time
+    return {
+        'trees': len(forest.estimators_),
+        'test_r2': r2_score(y_test, y_pred),
+        'fit_seconds': fit_seconds,
+        'bytes': len(pickle.dumps(forest)),
+        'single_ms': predict_latency(forest, X_test) * 1000,
+        'batch_ms': batch_seconds * 1000
+    }
+
+def compare_growth(data_path='hypertension_by_country.csv', step=STEP, min_gain=MIN_GAIN):
+    """Train the fixed forest and the early-stopped one on the same split and compare them"""
+    X_train, X_test, y_train, y_test, _, _ = load_and_prepare_data(data_path)
+
+    print("\nTraining the fixed Random Forest...")
+    start_time = time.perf_counter()
+    fixed = clone(create_models()['Random Forest']).fit(X_train, y_train)
+    fixed_report = evaluate_forest(fixed, X_test, y_test, time.perf_counter() - start_time)
+
+    print("Growing the Random Forest with out-of-bag early stopping...")
+    grown, curve = grow_forest(X_train, y_train, step=step, min_gain=min_gain)
+    grown_report = evaluate_forest(grown, X_test, y_test, curve[-1]['seconds'])
+
+    return {'Fixed': fixed_report, 'Early-stopped': grown_report}, curve
+
+def print_growth_report(report, curve):
+    """Print the growth curve and the fixed vs early-stopped comparison"""
+    print("\n" + "="*80)
+    print("FOREST GROWTH WITH OUT-OF-BAG EARLY STOPPING")
+    print("="*80)
+    print_growth_curve(curve)
+
+    rows = []
+    for name, stats in report.items():
+        rows.append({
+            'Forest': name,
+            'Trees': stats['trees'],
+            'Test R²': f"{stats['test_r2']:.4f}",
+            'Fit (s)': f"{stats['fit_seconds']:.2f}",
+            'Size (KiB)': f"{stats['bytes'] / 1024:.0f}",
+            '1-row (ms)': f"{stats['single_ms']:.3f}",
+            'Test set (ms)': f"{stats['batch_ms']:.1f}"
+        })
+    print()
+    print(pd.DataFrame(rows).to_string(index=False))
+
+    fixed, grown = report['Fixed'], report['Early-stopped']
+    print(f"\n🏆 {grown['trees']} trees instead of {fixed['trees']}: "
+          f"fit {fixed['fit_seconds'] - grown['fit_seconds']:.2f}s faster, "
+          f"{fixed['bytes'] / grown['bytes']:.1f}x smaller, "
+          f"{fixed['single_ms'] / grown['single_ms']:.1f}x faster per row, "
+          f"test R² {grown['test_r2'] - fixed['test_r2']:+.4f}")
@@ -0,0 +1,216 @@
+"""
+Incremental model update for newly published NCD-RisC survey years
+
+Instead of rerunning model_comparison.main() on the whole export, this ingests only the
+new rows, updates the scaler statistics with partial_fit, re-expresses the linear model
+in the updated scaling and fine-tunes it on the new rows (partial_fit for SGD, warm-started
+gradient descent for the linear regressions). The result is written as a new artifact
+version, together with a drift report against a full retrain on a holdout set.
+
+Usage:
+    python incremental_update.py hypertension_model.pkl new_years.csv --base-data hypertension_by_country.csv
+"""
+
+import argparse
+import copy
+import os
+import pickle
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.linear_model import LinearRegression, SGDRegressor
+from sklearn.metrics import mean_squared_error, r2_score
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler
+
+# Importing the class also lets pickle resolve artifacts saved from model_comparison run as __main__
+from model_comparison import LinearRegressionFromScratch, encode_features, load_data
+
+LINEAR_MODELS = (LinearRegression, SGDRegressor, LinearRegressionFromScratch)
+
+def get_linear_parameters(model):
+    """Return (weights, bias) of a fitted linear model"""
+    if isinstance(model, LinearRegressionFromScratch):
+        return np.asarray(model.weights, dtype=float), float(model.bias)
+    return np.asarray(model.coef_, dtype=float).ravel(), float(np.ravel(model.intercept_)[0])
+
+def set_linear_parameters(model, weights, bias):
+    """Write (weights, bias) back into a linear model"""
+    if isinstance(model, LinearRegressionFromScratch):
+        model.weights, model.bias = weights, bias
+    elif isinstance(model, SGDRegressor):
+        model.coef_, model.intercept_ = weights, np.array([bias])
+    else:
+        model.coef_, model.intercept_ = weights, bias
+
+def rescale_linear_model(model, old_scaler, new_scaler):
+    """
+    Re-express a linear model fitted on old_scaler outputs in terms of new_scaler outputs
+
+    Predictions on raw inputs are unchanged: the weights are mapped to raw feature space
+    (w / scale, bias - sum(w * mean / scale)) and back with the updated statistics.
+    """
+    weights, bias = get_linear_parameters(model)
+    raw_weights = weights / old_scaler.scale_
+    raw_bias = bias - np.sum(raw_weights * old_scaler.mean_)
+    set_linear_parameters(model, raw_weights * new_scaler.scale_, raw_bias + np.sum(raw_weights * new_scaler.mean_))
+
+def fine_tune(model, X, y, epochs, learning_rate=0.01):
+    """Continue training a linear model on new (scaled) rows from its current weights"""
+    if isinstance(model, SGDRegressor):
+        for _ in range(epochs):
+            model.partial_fit(X, y)
+        return model
+
+    if isinstance(model, LinearRegressionFromScratch):
+        max_iterations, warm_start = model.max_iterations, model.warm_start
+        model.max_iterations, model.warm_start = epochs, True
+        model.fit(X, y)
+        model.max_iterations, model.warm_start = max_iterations, warm_start
+        return model
+
+    # LinearRegression has no partial_fit: warm-started full-batch gradient descent
+    weights, bias = get_linear_parameters(model)
+    n_samples = X.shape[0]
+    for _ in range(epochs):
+        residual = X @ weights + bias - y
+        weights = weights - learning_rate * (2 / n_samples) * (X.T @ residual)
+        bias = bias - learning_rate * (2 / n_samples) * residual.sum()
+    set_linear_parameters(model, weights, bias)
+    return model
+
+def fresh_copy(model):
+    """Unfitted copy of a model with the same hyperparameters"""
+    if isinstance(model, LinearRegressionFromScratch):
+        return LinearRegressionFromScratch(model.learning_rate, model.max_iterations, model.tolerance)
+    return clone(model)
+
+def evaluate(name, y_true, y_pred):
+    """R² and RMSE of one model on the holdout"""
+    r2 = r2_score(y_true, y_pred)
+    rmse = np.sqrt(mean_squared_error(y_true, y_pred))
+    print(f"  {name:<22} R²: {r2:.4f}, RMSE: {rmse:.4f}")
+    return {'r2': r2, 'rmse': rmse}
+
+def incremental_update(model_path, new_data_path, base_data_path=None, since_year=None,
+                       holdout=0.2, epochs=20, output_path=None):
+    """Update a saved linear model with new survey rows and write the next artifact version"""
+    print("="*80)
+    print("INCREMENTAL MODEL UPDATE")
+    print("="*80)
+
+    model_data = joblib.load(model_path)
+    model = model_data['model']
+    if not isinstance(model, LINEAR_MODELS):
+        raise ValueError(
+            f"{model_data['model_name']} cannot be updated incrementally; "
+            "only linear/SGD models support it. Run model_comparison.py for a full retrain."
+        )
+
+    feature_names = model_data['feature_names']
+    since_year = since_year if since_year is not None else model_data.get('max_year')
+    if since_year is None:
+        raise ValueError(
+            f"{model_path} does not record the last training year (max_year); "
+            "pass since_year (--since-year) to choose which rows are new"
+        )
+
+    # Ingest only the new rows
+    new_rows = load_data(new_data_path)
+    new_rows = new_rows[new_rows['Year'] > since_year].reset_index(drop=True)
+    if len(new_rows) == 0:
+        raise ValueError(f"No new rows after year {since_year} in {new_data_path}")
+
+    X_new, y_new = encode_features(new_rows, feature_names)
+    X_update, X_holdout, y_update, y_holdout = train_test_split(X_new, y_new, test_size=holdout, random_state=42)
+    print(f"New rows: {len(X_new)} (years {new_rows['Year'].min()}-{new_rows['Year'].max()}), "
+          f"{len(X_update)} for the update, {len(X_holdout)} held out")
+
+    # Update scaler statistics and the model
+    start_time = time.perf_counter()
+    old_scaler = model_data['scaler']
+    new_scaler = copy.deepcopy(old_scaler)
+    new_scaler.partial_fit(X_update)
+
+    updated_model = copy.deepcopy(model)
+    rescale_linear_model(updated_model, old_scaler, new_scaler)
+    fine_tune(updated_model, new_scaler.transform(X_update), y_update, epochs)
+    update_seconds = time.perf_counter() - start_time
+    print(f"Incremental update took {update_seconds:.3f}s")
+
+    # Holdout comparison
+    print("\nHoldout metrics:")
+    report = {
+        'original': evaluate('Original model', y_holdout, model.predict(old_scaler.transform(X_holdout))),
+        'updated': evaluate('Incremental update', y_holdout, updated_model.predict(new_scaler.transform(X_holdout)))
+    }
+    updated_predictions = updated_model.predict(new_scaler.transform(X_holdout))
+
+    if base_data_path is not None:
+        base_rows = load_data(base_data_path)
+        base_rows = base_rows[~base_rows['Year'].isin(new_rows['Year'].unique())]
+        X_base, y_base = encode_features(base_rows, feature_names)
+        X_full = pd.concat([X_base, X_update])
+        y_full = np.concatenate([y_base, y_update])
+
+        start_time = time.perf_counter()
+        full_scaler = StandardScaler()
+        full_model = fresh_copy(model).fit(full_scaler.fit_transform(X_full), y_full)
+        full_seconds = time.perf_counter() - start_time
+
+        full_predictions = full_model.predict(full_scaler.transform(X_holdout))
+        report['full_retrain'] = evaluate('Full retrain', y_holdout, full_predictions)
+        drift = np.abs(updated_predictions - full_predictions)
+        report['drift'] = {
+            'mean_abs_diff': float(drift.mean()),
+            'max_abs_diff': float(drift.max()),
+            'r2_gap': report['full_retrain']['r2'] - report['updated']['r2']
+        }
+        print(f"\nDrift from full retrain ({full_seconds:.3f}s on {len(X_full)} rows):")
+        print(f"  Mean |Δ prediction|: {drift.mean():.5f}")
+        print(f"  Max |Δ prediction|:  {drift.max():.5f}")
+        print(f"  R² gap:              {report['drift']['r2_gap']:+.5f}")
+
+    # Write the next artifact version
+    version = model_data.get('version', 1) + 1
+    updated_data = dict(model_data)
+    updated_data.update({
+        'model': updated_model,
+        'scaler': new_scaler,
+        'version': version,
+        'parent_version': model_data.get('version', 1),
+        'max_year': int(new_rows['Year'].max()),
+        'incremental_rows': len(X_update),
+        'r2_score': report['updated']['r2'],
+        'update_report': report
+    })
+
+    if output_path is None:
+        stem, extension = os.path.splitext(model_path)
+        output_path = f"{stem}_v{version}{extension}"
+    with open(output_path, 'wb') as file:
+        pickle.dump(updated_data, file)
+    print(f"\nSaved model version {version} to '{output_path}'")
+
+    return output_path, report
+
+def parse_args(argv=None):
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Incrementally update a saved linear model with new survey years")
+    parser.add_argument('model', help="Existing model artifact (.pkl)")
+    parser.add_argument('new_data', help="CSV export containing the new rows")
+    parser.add_argument('--base-data', default=None, help="Original training CSV, enables the full-retrain drift report")
+    parser.add_argument('--since-year', type=int, default=None,
+                        help="Only ingest rows after this year (default: the artifact's max_year)")
+    parser.add_argument('--holdout', type=float, default=0.2, help="Fraction of new rows held out (default: 0.2)")
+    parser.add_argument('--epochs', type=int, default=20, help="Fine-tuning passes over the new rows (default: 20)")
+    parser.add_argument('--output', default=None, help="Output path (default: <model>_v<version>.pkl)")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    incremental_update(args.model, args.new_data, base_data_path=args.base_data, since_year=args.since_year,
+                       holdout=args.holdout, epochs=args.epochs, output_path=args.output)
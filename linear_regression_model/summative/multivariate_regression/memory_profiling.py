@@ -0,0 +1,189 @@
+"""
+Per-stage memory profiling for the training pipeline
+
+model_comparison.py marks its stages (read_csv, fit encoder, encode features, scaling,
+each model fit, ...) with profile_stage(). The markers cost nothing unless a
+MemoryProfiler is active, i.e. when running with --profile-memory. For every stage the
+profiler records:
+
+- Python allocations from tracemalloc: peak above the stage's starting point and net change
+- process RSS sampled by a background thread: peak above the starting point and net change
+
+Stages may nest (a stage's peak includes its children). The report is ranked by peak
+allocation and written to JSON so runs can be compared between versions.
+
+Usage:
+    python model_comparison.py --data africa.csv --profile-memory memory_profile.json
+"""
+
+import json
+import os
+import platform
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+
+import pandas as pd
+
+try:
+    import psutil
+except ImportError:  # psutil is optional; /proc is used on Linux
+    psutil = None
+
+# The profiler currently collecting, if any
+_active_profiler = None
+
+def current_rss():
+    """Resident set size of this process in bytes (None if it cannot be read)"""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+def profile_stage(name):
+    """Context manager marking a pipeline stage; a no-op unless memory profiling is active"""
+    if _active_profiler is None:
+        return nullcontext()
+    return _active_profiler.stage(name)
+
+class MemoryProfiler:
+    """Collects tracemalloc and RSS measurements for each profile_stage() while active"""
+
+    def __init__(self, sample_interval=0.005):
+        self.sample_interval = sample_interval
+        self.stages = []
+        self._open = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler = None
+        self._started_tracing = False
+
+    def __enter__(self):
+        global _active_profiler
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self._start_rss = current_rss()
+        self._start_time = time.perf_counter()
+
+        self._stop.clear()
+        self._sampler = threading.Thread(target=self._sample_rss, daemon=True)
+        self._sampler.start()
+        _active_profiler = self
+        return self
+
+    def __exit__(self, *exc_info):
+        global _active_profiler
+        _active_profiler = None
+        self._stop.set()
+        self._sampler.join()
+        self.total_seconds = time.perf_counter() - self._start_time
+        self.total_peak_bytes = tracemalloc.get_traced_memory()[1]
+        if self._started_tracing:
+            tracemalloc.stop()
+        return False
+
+    def _sample_rss(self):
+        """Background thread: track the highest RSS seen by every open stage"""
+        while not self._stop.wait(self.sample_interval):
+            rss = current_rss()
+            if rss is None:
+                return
+            with self._lock:
+                for record in self._open:
+                    record['rss_max'] = max(record['rss_max'], rss)
+
+    @contextmanager
+    def stage(self, name):
+        """Measure one stage; nested stages report into their parent's peak"""
+        # Close the parent's running peak before resetting it for this stage
+        if self._open:
+            self._open[-1]['traced_max'] = max(self._open[-1]['traced_max'], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+
+        traced_start = tracemalloc.get_traced_memory()[0]
+        rss_start = current_rss()
+        record = {
+            'name': name,
+            'depth': len(self._open),
+            'traced_max': traced_start,
+            'rss_max': rss_start or 0
+        }
+        with self._lock:
+            self._open.append(record)
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start_time
+            traced_end, traced_peak = tracemalloc.get_traced_memory()
+            rss_end = current_rss()
+            with self._lock:
+                self._open.pop()
+            traced_max = max(record['traced_max'], traced_peak)
+            rss_max = max(record['rss_max'], rss_end or 0)
+
+            # The parent's peak includes this stage
+            tracemalloc.reset_peak()
+            if self._open:
+                self._open[-1]['traced_max'] = max(self._open[-1]['traced_max'], traced_max)
+
+            self.stages.append({
+                'stage': name,
+                'depth': record['depth'],
+                'peak_bytes': traced_max - traced_start,
+                'net_bytes': traced_end - traced_start,
+                'rss_peak_bytes': rss_max - rss_start if rss_start is not None else None,
+                'rss_net_bytes': rss_end - rss_start if rss_start is not None else None,
+                'seconds': seconds
+            })
+
+    def ranked_stages(self):
+        """Stages sorted by peak allocation, largest first"""
+        return sorted(self.stages, key=lambda stage: stage['peak_bytes'], reverse=True)
+
+    def report(self, label=None):
+        """JSON-serialisable report of the run"""
+        return {
+            'label': label,
+            'created': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'total_seconds': self.total_seconds,
+            'total_peak_bytes': self.total_peak_bytes,
+            'rss_start_bytes': self._start_rss,
+            'stages': self.ranked_stages()
+        }
+
+    def print_report(self):
+        """Print the ranked per-stage table"""
+        print("\n" + "="*80)
+        print("MEMORY PROFILE BY STAGE (ranked by peak allocation)")
+        print("="*80)
+
+        def mib(value):
+            return f"{value / 2**20:+.2f}" if value is not None else "n/a"
+
+        rows = []
+        for stage in self.ranked_stages():
+            rows.append({
+                'Stage': '  ' * stage['depth'] + stage['stage'],
+                'Peak (MiB)': mib(stage['peak_bytes']),
+                'Net (MiB)': mib(stage['net_bytes']),
+                'RSS peak (MiB)': mib(stage['rss_peak_bytes']),
+                'RSS net (MiB)': mib(stage['rss_net_bytes']),
+                'Time (s)': f"{stage['seconds']:.3f}"
+            })
+        print(pd.DataFrame(rows).to_string(index=False))
+        print(f"\nPeak traced memory over the run: {self.total_peak_bytes / 2**20:.2f} MiB")
+
+    def write_json(self, path, label=None):
+        """Write the report to path"""
+        with open(path, 'w') as file:
+            json.dump(self.report(label), file, indent=2)
+        print(f"Memory profile written to '{path}'")
@@ -8,7 +8,18 @@ from sklearn.tree import DecisionTreeRegressor
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import mean_squared_error, r2_score, mean_absolute_error
 from sklearn.preprocessing import StandardScaler
+import argparse
 import joblib
+import os
+import sys
+import time
+from fit_cache import DEFAULT_MAX_MB, FitCache, hash_arrays
+from memory_profiling import MemoryProfiler, profile_stage
+
+# The feature encoder and drift reference are shared with the API, which lives at the repository root
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
+from drift_monitor import training_distribution
+from feature_encoder import FeatureEncoder
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -19,10 +30,11 @@ sns.set_palette("husl")
 class LinearRegressionFromScratch:
     """Linear Regression implementation from scratch using gradient descent"""
     
-    def __init__(self, learning_rate=0.01, max_iterations=1000, tolerance=1e-6):
+    def __init__(self, learning_rate=0.01, max_iterations=1000, tolerance=1e-6, warm_start=False):
         self.learning_rate = learning_rate
         self.max_iterations = max_iterations
         self.tolerance = tolerance
+        self.warm_start = warm_start
         self.weights = None
         self.bias = None
         self.loss_history = []
@@ -31,9 +43,14 @@ class LinearRegressionFromScratch:
         """Train the model using gradient descent"""
         n_samples, n_features = X.shape
         
-        # Initialize parameters
-        self.weights = np.zeros(n_features)
-        self.bias = 0
+        # Parameters follow the input precision (float32 inputs train float32 weights)
+        dtype = X.dtype if np.issubdtype(X.dtype, np.floating) else np.dtype(np.float64)
+        y = np.asarray(y, dtype=dtype)
+        
+        # Initialize parameters (warm start continues from the current weights)
+        if not (self.warm_start and self.weights is not None):
+            self.weights = np.zeros(n_features, dtype=dtype)
+            self.bias = dtype.type(0)
         
         # Gradient descent
         for iteration in range(self.max_iterations):
@@ -63,31 +80,52 @@ class LinearRegressionFromScratch:
         """Make predictions"""
         return np.dot(X, self.weights) + self.bias
 
-def load_and_prepare_data():
-    """Load and prepare the data for modeling"""
-    print("Loading and preparing data...")
-    
+AFRICAN_COUNTRIES = [
+    "Algeria", "Angola", "Benin", "Botswana", "Burkina Faso", "Burundi",
+    "Cabo Verde", "Cameroon", "Central African Republic", "Chad", "Comoros",
+    "Democratic Republic of the Congo", "Republic of the Congo", "Côte d'Ivoire",
+    "Djibouti", "Egypt", "Equatorial Guinea", "Eritrea", "Eswatini", "Ethiopia",
+    "Gabon", "Gambia", "Ghana", "Guinea", "Guinea-Bissau", "Kenya", "Lesotho",
+    "Liberia", "Libya", "Madagascar", "Malawi", "Mali", "Mauritania", "Mauritius",
+    "Morocco", "Mozambique", "Namibia", "Niger", "Nigeria", "Rwanda",
+    "Sao Tome and Principe", "Senegal", "Seychelles", "Sierra Leone", "Somalia",
+    "South Africa", "South Sudan", "Sudan", "Tanzania", "Togo", "Tunisia",
+    "Uganda", "Zambia", "Zimbabwe"
+]
+
+TARGET = 'Prevalence of hypertension'
+
+# Every indicator in the export, by the name the API returns it under (--indicators)
+INDICATORS = {
+    'prevalence': TARGET,
+    'diagnosed': 'Proportion of diagnosed hypertension among all hypertension',
+    'treated': 'Proportion of treated hypertension among all hypertension',
+    'controlled': 'Proportion of controlled hypertension among all hypertension',
+    'untreated_stage2': 'Proportion of untreated stage 2 hypertension among all hypertension'
+}
+
+# Models that fit a 2-D target natively; train_models skips the others for multi-output
+MULTI_OUTPUT_MODELS = ('Linear Regression (sklearn)', 'Decision Tree', 'Random Forest')
+
+# Encode Sex
+SEX_MAP = {'male': 0, 'female': 1, 'Men': 0, 'Women': 1}
+
+# Encode Age as ordinal
+AGE_ORDER = ['30-34', '35-39', '40-44', '45-49', '50-54', '55-59', '60-64', '65-69', '70-74', '75-79', '80+']
+AGE_MAP = {age: i for i, age in enumerate(AGE_ORDER)}
+
+def load_data(data_path='hypertension_by_country.csv'):
+    """Load the raw NCD-RisC export, keep African countries from 2010 and drop unused columns"""
     # Load the data
-    data = pd.read_csv('hypertension_by_country.csv')
+    with profile_stage('read_csv'):
+        data = pd.read_csv(data_path)
     
     # Filter for African countries and recent years
-    countries = [
-        "Algeria", "Angola", "Benin", "Botswana", "Burkina Faso", "Burundi",
-        "Cabo Verde", "Cameroon", "Central African Republic", "Chad", "Comoros",
-        "Democratic Republic of the Congo", "Republic of the Congo", "Côte d'Ivoire",
-        "Djibouti", "Egypt", "Equatorial Guinea", "Eritrea", "Eswatini", "Ethiopia",
-        "Gabon", "Gambia", "Ghana", "Guinea", "Guinea-Bissau", "Kenya", "Lesotho",
-        "Liberia", "Libya", "Madagascar", "Malawi", "Mali", "Mauritania", "Mauritius",
-        "Morocco", "Mozambique", "Namibia", "Niger", "Nigeria", "Rwanda",
-        "Sao Tome and Principe", "Senegal", "Seychelles", "Sierra Leone", "Somalia",
-        "South Africa", "South Sudan", "Sudan", "Tanzania", "Togo", "Tunisia",
-        "Uganda", "Zambia", "Zimbabwe"
-    ]
-    
-    africa = data[
-        (data['Country'].isin(countries)) &
-        (data['Year'] >= 2010)
-    ].reset_index(drop=True)
+    with profile_stage('filter rows'):
+        africa = data[
+            (data['Country'].isin(AFRICAN_COUNTRIES)) &
+            (data['Year'] >= 2010)
+        ].reset_index(drop=True)
     
     # Drop irrelevant columns
     columns_to_drop = [
@@ -108,74 +146,143 @@ def load_and_prepare_data():
     if existing_columns_to_drop:
         africa = africa.drop(columns=existing_columns_to_drop).reset_index(drop=True)
     
-    # Create numeric dataset
-    numeric_data = africa.copy()
-    
-    # Encode Sex
-    sex_map = {'male': 0, 'female': 1, 'Men': 0, 'Women': 1}
-    numeric_data['Sex_binary'] = numeric_data['Sex'].map(sex_map)
-    
-    # Encode Age as ordinal
-    age_order = ['30-34', '35-39', '40-44', '45-49', '50-54', '55-59', '60-64', '65-69', '70-74', '75-79', '80+']
-    age_map = {age: i for i, age in enumerate(age_order)}
-    numeric_data['Age_encoded'] = numeric_data['Age'].map(age_map)
-    
-    # One-hot encode Country
-    numeric_data = pd.get_dummies(numeric_data, columns=['Country'], drop_first=True)
-    
-    # Drop original categorical columns
-    numeric_data = numeric_data.drop(columns=['Sex', 'Age'])
-    
-    # Prepare features and target
-    X = numeric_data.drop(columns=['Prevalence of hypertension'])
-    y = numeric_data['Prevalence of hypertension']
+    return africa
+
+def fit_encoder(africa, dtype=np.float64, targets=TARGET):
+    """Fit the feature encoder on the filtered export; it is saved in the model artifact"""
+    return FeatureEncoder.fit(africa, targets, age_groups=AGE_ORDER, sex_mapping=SEX_MAP, dtype=dtype)
+
+def encode_features(africa, feature_names=None, encoder=None, targets=TARGET):
+    """
+    Encode the filtered data into the model feature matrix and target
+    
+    Without feature_names or encoder, the encoder is fitted on africa (training).
+    With feature_names the columns are aligned to an existing model, so a subset of
+    rows (e.g. newly published years) encodes exactly like the original training data.
+    With a list of targets, y is a (rows, targets) matrix and none of them is a feature.
+    """
+    if encoder is None:
+        with profile_stage('fit encoder'):
+            if feature_names is None:
+                encoder = fit_encoder(africa, targets=targets)
+            else:
+                encoder = FeatureEncoder(feature_names, age_groups=AGE_ORDER, sex_mapping=SEX_MAP)
+    
+    with profile_stage('encode features'):
+        X = pd.DataFrame(encoder.encode_frame(africa), columns=encoder.feature_names, index=africa.index)
+        y = africa[targets].to_numpy()
+    
+    return X, y
+
+def load_and_prepare_data(data_path='hypertension_by_country.csv', dtype=np.float64, targets=TARGET, africa=None):
+    """
+    Load and prepare the data for modeling
+    
+    dtype sets the precision of the feature matrices and target (float64 or float32);
+    the scaler keeps its statistics in float64 but returns dtype outputs. Returns the
+    fitted FeatureEncoder last; its feature_names are the matrix columns. A list of
+    targets (e.g. INDICATORS.values()) gives 2-D y for multi-output training.
+    Callers that already loaded the export pass it as africa instead of reading it again.
+    """
+    print("Loading and preparing data...")
     
-    # Convert target to 1D array to avoid DataConversionWarning
-    y = y.values.ravel() if hasattr(y, 'values') else y.ravel()
+    if africa is None:
+        africa = load_data(data_path)
+    targets = targets if isinstance(targets, str) else list(targets)
+    encoder = fit_encoder(africa, dtype=dtype, targets=targets)
+    X, y = encode_features(africa, encoder=encoder, targets=targets)
+    with profile_stage('cast dtype'):
+        y = y.astype(dtype)
     
     # Split the data
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.3, random_state=42)
+    with profile_stage('train_test_split'):
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.3, random_state=42)
     
     # Scale the features
-    scaler = StandardScaler()
-    X_train_scaled = scaler.fit_transform(X_train)
-    X_test_scaled = scaler.transform(X_test)
+    with profile_stage('scale train/test'):
+        scaler = StandardScaler()
+        X_train_scaled = scaler.fit_transform(X_train)
+        X_test_scaled = scaler.transform(X_test)
     
     print(f"Data prepared successfully!")
     print(f"Training set: {X_train.shape[0]} samples, {X_train.shape[1]} features")
     print(f"Test set: {X_test.shape[0]} samples, {X_test.shape[1]} features")
     print(f"Target variable shape: {y_train.shape}")
     
-    return X_train_scaled, X_test_scaled, y_train, y_test, scaler, X.columns
+    return X_train_scaled, X_test_scaled, y_train, y_test, scaler, encoder
 
-def train_models(X_train, X_test, y_train, y_test):
-    """Train all models and return results"""
-    print("\nTraining models...")
+def export_distribution(africa):
+    """
+    Input and target distribution of the training export, saved in the artifact
     
-    # Target variables are already 1D arrays from data preparation
-    models = {
+    The API compares its production sketches against it (/monitoring/drift).
+    """
+    return training_distribution(africa['Country'], africa['Sex'], africa['Age'], africa['Year'], africa[TARGET])
+
+def create_models():
+    """Fresh, unfitted instances of every model in the comparison"""
+    return {
         'Linear Regression (from scratch)': LinearRegressionFromScratch(learning_rate=0.01, max_iterations=1000),
         'Linear Regression (sklearn)': LinearRegression(),
         'SGD Regressor': SGDRegressor(max_iter=1000, random_state=42),
         'Decision Tree': DecisionTreeRegressor(random_state=42, max_depth=10),
         'Random Forest': RandomForestRegressor(n_estimators=100, random_state=42, max_depth=10)
     }
+
+def fit_model(name, model, X_train, y_train, grow_forest=None):
+    """Fit one model; returns the fitted model, its loss history and its growth curve"""
+    if name == 'Linear Regression (from scratch)':
+        model.fit(X_train, y_train)
+        return model, model.loss_history, None
+    if name == 'Random Forest' and grow_forest is not None:
+        from forest_growth import grow_forest as grow, print_growth_curve
+        model, growth_curve = grow(X_train, y_train, min_gain=grow_forest)
+        print_growth_curve(growth_curve)
+        return model, None, growth_curve
+    model.fit(X_train, y_train)
+    return model, None, None
+
+def train_models(X_train, X_test, y_train, y_test, grow_forest=None, fit_cache=None):
+    """
+    Train all models and return results
+    
+    A 2-D target trains only the multi-output models, with metrics averaged over the
+    outputs (r2_per_output keeps each R²). grow_forest, a minimum out-of-bag R² gain,
+    grows the Random Forest in steps (forest_growth.py). fit_cache, a FitCache, loads
+    models already fitted on the same data and settings instead of refitting them.
+    """
+    print("\nTraining models...")
+    
+    # Target variables are 1D arrays, or (rows, indicators) matrices for multi-output
+    models = create_models()
+    multi_output = np.ndim(y_train) == 2
+    if multi_output:
+        models = {name: model for name, model in models.items() if name in MULTI_OUTPUT_MODELS}
+    data_hash = hash_arrays(X_train, y_train) if fit_cache is not None else None
     
     results = {}
     
     for name, model in models.items():
         print(f"Training {name}...")
         
-        # Train the model
-        if name == 'Linear Regression (from scratch)':
-            model.fit(X_train, y_train)
-            loss_history = model.loss_history
-        else:
-            model.fit(X_train, y_train)
-            loss_history = None
+        # Train the model, or load it from the fit cache
+        with profile_stage(f'fit {name}'):
+            cached = None
+            if fit_cache is not None:
+                key = fit_cache.key(model, data_hash, grow_forest=grow_forest if name == 'Random Forest' else None)
+                start_time = time.perf_counter()
+                cached = fit_cache.load(key)
+            if cached is not None:
+                model, loss_history, growth_curve = cached
+                print(f"  Loaded from fit cache in {(time.perf_counter() - start_time) * 1000:.0f} ms")
+            else:
+                model, loss_history, growth_curve = fit_model(name, model, X_train, y_train, grow_forest)
+                if fit_cache is not None:
+                    fit_cache.store(key, (model, loss_history, growth_curve))
         
         # Make predictions
-        y_pred = model.predict(X_test)
+        with profile_stage(f'predict {name}'):
+            y_pred = model.predict(X_test)
         
         # Calculate metrics
         mse = mean_squared_error(y_test, y_pred)
@@ -190,7 +297,9 @@ def train_models(X_train, X_test, y_train, y_test):
             'rmse': rmse,
             'mae': mae,
             'r2': r2,
-            'loss_history': loss_history
+            'r2_per_output': r2_score(y_test, y_pred, multioutput='raw_values') if multi_output else None,
+            'loss_history': loss_history,
+            'growth_curve': growth_curve
         }
         
         print(f"  {name} - R²: {r2:.4f}, RMSE: {rmse:.4f}")
@@ -281,8 +390,14 @@ def plot_performance_comparison(results):
     plt.tight_layout()
     plt.show()
 
-def save_best_model(results, scaler, feature_names):
-    """Save the best performing model"""
+def save_best_model(results, scaler, encoder, dtype=np.float64, distribution=None,
+                    output_path='best_hypertension_model.pkl', indicators=None, max_year=None):
+    """
+    Save the best performing model (indicators: output names of a multi-output model)
+    
+    max_year is the last survey year in the training data; incremental_update.py only
+    ingests rows after it.
+    """
     print("\nSaving best model...")
     
     # Find best model based on R2 score
@@ -292,17 +407,26 @@ def save_best_model(results, scaler, feature_names):
     
     print(f"Best model: {best_model_name} (R² = {best_score:.4f})")
     
-    # Save the model and scaler
+    # Save the model, scaler and the encodings the API needs
     model_data = {
         'model': best_model,
         'scaler': scaler,
-        'feature_names': feature_names.tolist(),
+        'feature_names': encoder.feature_names,
+        'feature_encoder': encoder.to_dict(),
         'model_name': best_model_name,
-        'r2_score': best_score
+        'r2_score': best_score,
+        'age_mapping': AGE_MAP,
+        'sex_mapping': SEX_MAP,
+        'version': 1,
+        'dtype': np.dtype(dtype).name,
+        'training_distribution': distribution,
+        'max_year': max_year
     }
+    if indicators is not None:
+        model_data['indicators'] = list(indicators)
     
-    joblib.dump(model_data, 'best_hypertension_model.pkl')
-    print("Model saved as 'best_hypertension_model.pkl'")
+    joblib.dump(model_data, output_path)
+    print(f"Model saved as '{output_path}'")
     
     return best_model_name, best_model
 
@@ -370,34 +494,109 @@ def plot_linear_regression_fit(X_test, y_test, linear_model, model_name="Linear
     plt.tight_layout()
     plt.show()
 
-def main():
-    """Main function to run the complete model comparison"""
-    print("="*80)
-    print("HYPERTENSION PREVALENCE PREDICTION - MODEL COMPARISON")
-    print("="*80)
-    
+def parse_args(argv=None):
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Hypertension prevalence prediction - model comparison")
+    parser.add_argument('--data', default='hypertension_by_country.csv', help="NCD-RisC export to train on")
+    parser.add_argument('--cv', type=int, default=None, metavar='K',
+                        help="Run K-fold cross-validation instead of the single train/test split")
+    parser.add_argument('--group-by-country', action='store_true',
+                        help="With --cv, keep every country's rows in a single fold (GroupKFold)")
+    parser.add_argument('--n-jobs', type=int, default=-1, help="Worker processes for cross-validation (default: all CPUs)")
+    parser.add_argument('--dtype', choices=['float64', 'float32'], default='float64',
+                        help="Precision for preprocessing, training and the saved artifact (default: float64)")
+    parser.add_argument('--dtype-report', action='store_true',
+                        help="Compare float32 against float64 (accuracy, memory, throughput) and exit")
+    parser.add_argument('--distill', nargs='?', const='hypertension_model_distilled.pkl', default=None, metavar='PKL',
+                        help="Distil the Random Forest into a smaller surrogate and save it (default: hypertension_model_distilled.pkl)")
+    parser.add_argument('--grow-forest', nargs='?', type=float, const=0.001, default=None, metavar='MIN_GAIN',
+                        help="Grow the Random Forest in steps until out-of-bag R² gains less than MIN_GAIN (default: 0.001)")
+    parser.add_argument('--forest-growth-report', action='store_true',
+                        help="Compare the early-stopped forest with the fixed 100-tree forest and exit")
+    parser.add_argument('--indicators', nargs='?', const='hypertension_indicators_model.pkl', default=None, metavar='PKL',
+                        help="Train one multi-output model for every indicator and save it (default: hypertension_indicators_model.pkl)")
+    parser.add_argument('--fit-cache', nargs='?', const='.fit_cache', default=None, metavar='DIR',
+                        help="Load unchanged models from an on-disk fit cache instead of refitting (default: .fit_cache)")
+    parser.add_argument('--fit-cache-size', type=float, default=DEFAULT_MAX_MB, metavar='MB',
+                        help=f"Evict least recently used fits beyond this size (default: {DEFAULT_MAX_MB} MB)")
+    parser.add_argument('--profile-memory', nargs='?', const='memory_profile.json', default=None, metavar='JSON',
+                        help="Record peak/net memory per pipeline stage and write the ranked report (default: memory_profile.json)")
+    return parser.parse_args(argv)
+
+def run_pipeline(args):
+    """Prepare the data, train and compare every model, plot and save the best one"""
     # Load and prepare data
-    X_train, X_test, y_train, y_test, scaler, feature_names = load_and_prepare_data()
+    africa = load_data(args.data)
+    X_train, X_test, y_train, y_test, scaler, encoder = load_and_prepare_data(dtype=args.dtype, africa=africa)
     
     # Train models
-    results = train_models(X_train, X_test, y_train, y_test)
+    fit_cache = FitCache(args.fit_cache, int(args.fit_cache_size * 1024 ** 2)) if args.fit_cache else None
+    results = train_models(X_train, X_test, y_train, y_test, grow_forest=args.grow_forest, fit_cache=fit_cache)
     
     # Plot results
-    plot_loss_curves(results)
-    plot_scatter_comparison(results, y_test)
-    plot_performance_comparison(results)
-    
-    # Plot specific linear regression line fit (for rubric requirement)
-    if 'Linear Regression (sklearn)' in results:
-        plot_linear_regression_fit(X_test, y_test, results['Linear Regression (sklearn)']['model'], "Linear Regression (sklearn)")
-    if 'Linear Regression (from scratch)' in results:
-        plot_linear_regression_fit(X_test, y_test, results['Linear Regression (from scratch)']['model'], "Linear Regression (from scratch)")
+    with profile_stage('plots'):
+        plot_loss_curves(results)
+        plot_scatter_comparison(results, y_test)
+        plot_performance_comparison(results)
+        
+        # Plot specific linear regression line fit (for rubric requirement)
+        if 'Linear Regression (sklearn)' in results:
+            plot_linear_regression_fit(X_test, y_test, results['Linear Regression (sklearn)']['model'], "Linear Regression (sklearn)")
+        if 'Linear Regression (from scratch)' in results:
+            plot_linear_regression_fit(X_test, y_test, results['Linear Regression (from scratch)']['model'], "Linear Regression (from scratch)")
     
     # Print detailed results
     print_detailed_results(results)
     
     # Save best model
-    best_model_name, best_model = save_best_model(results, scaler, feature_names)
+    with profile_stage('save model'):
+        save_best_model(results, scaler, encoder, dtype=args.dtype,
+                        distribution=export_distribution(africa), max_year=int(africa['Year'].max()))
+
+def main(argv=None):
+    """Main function to run the complete model comparison"""
+    args = parse_args(argv)
+    
+    print("="*80)
+    print("HYPERTENSION PREVALENCE PREDICTION - MODEL COMPARISON")
+    print("="*80)
+    
+    if args.cv:
+        from cross_validation import cross_validate_models, print_cv_results
+        africa = load_data(args.data)
+        X, y = encode_features(africa)
+        groups = africa['Country'].to_numpy() if args.group_by_country else None
+        print_cv_results(cross_validate_models(X, y, groups=groups, n_splits=args.cv, n_jobs=args.n_jobs))
+        return
+    
+    if args.dtype_report:
+        from dtype_validation import compare_dtypes, print_dtype_report
+        print_dtype_report(compare_dtypes(args.data))
+        return
+    
+    if args.forest_growth_report:
+        from forest_growth import MIN_GAIN, compare_growth, print_growth_report
+        print_growth_report(*compare_growth(args.data, min_gain=args.grow_forest or MIN_GAIN))
+        return
+    
+    if args.indicators:
+        from multi_output import train_indicator_model
+        fit_cache = FitCache(args.fit_cache, int(args.fit_cache_size * 1024 ** 2)) if args.fit_cache else None
+        train_indicator_model(args.data, args.indicators, dtype=args.dtype, fit_cache=fit_cache)
+        return
+    
+    if args.distill:
+        from distillation import distill_forest, print_distillation_report
+        print_distillation_report(*distill_forest(args.data, args.distill))
+        return
+    
+    if args.profile_memory:
+        with MemoryProfiler() as profiler:
+            run_pipeline(args)
+        profiler.print_report()
+        profiler.write_json(args.profile_memory, label=f"{args.data} ({args.dtype})")
+    else:
+        run_pipeline(args)
     
     print("\n" + "="*80)
     print("MODEL COMPARISON COMPLETED SUCCESSFULLY!")
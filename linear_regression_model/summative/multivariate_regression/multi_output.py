@@ -0,0 +1,95 @@
+"""
+One multi-output model for every hypertension indicator in the export
+
+The export has five indicators per (country, sex, age group, year): prevalence and the
+diagnosed, treated, controlled and untreated stage 2 proportions. The prevalence model
+uses the four proportions as features. Here they are all targets instead, so the
+features are only what the API receives. Linear regression, decision trees and random
+forests fit a 2-D target natively. A forest then predicts all five indicators from one
+feature vector in one pass over its trees, so the cost is close to one prevalence
+prediction.
+
+The chosen model is saved in the usual artifact format plus 'indicators' (the output
+names). The API serves it from POST /predict/indicators. The report compares it with
+one model of the same kind per indicator: per-indicator test R², pickled size, and
+single-row and test-set latency.
+
+Usage:
+    python model_comparison.py --data africa.csv --indicators   # writes hypertension_indicators_model.pkl
+"""
+
+import pickle
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.metrics import r2_score
+
+from distillation import predict_latency
+from model_comparison import (INDICATORS, load_and_prepare_data, load_data, print_detailed_results, save_best_model,
+                              train_models)
+
+def batch_latency(predict, X, repeats=5):
+    """Median seconds to predict the whole matrix"""
+    timings = []
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        predict(X)
+        timings.append(time.perf_counter() - start_time)
+    return float(np.median(timings))
+
+def compare_with_separate_models(model, X_train, X_test, y_train, y_test):
+    """Fit one clone of `model` per indicator and compare accuracy, size and latency"""
+    separate = [clone(model).fit(X_train, y_train[:, i]) for i in range(y_train.shape[1])]
+
+    def predict_separately(X):
+        return np.column_stack([single.predict(X) for single in separate])
+
+    return {
+        'indicators': list(INDICATORS),
+        'multi_r2': r2_score(y_test, model.predict(X_test), multioutput='raw_values'),
+        'separate_r2': r2_score(y_test, predict_separately(X_test), multioutput='raw_values'),
+        'multi_bytes': len(pickle.dumps(model)),
+        'separate_bytes': sum(len(pickle.dumps(single)) for single in separate),
+        'multi_single_ms': predict_latency(model, X_test) * 1000,
+        'separate_single_ms': sum(predict_latency(single, X_test) for single in separate) * 1000,
+        'multi_batch_ms': batch_latency(model.predict, X_test) * 1000,
+        'separate_batch_ms': batch_latency(predict_separately, X_test) * 1000
+    }
+
+def print_indicator_report(model_name, report):
+    """Print per-indicator accuracy and the one-pass vs one-model-per-indicator latency"""
+    print("\n" + "="*80)
+    print(f"MULTI-OUTPUT {model_name.upper()} VS ONE MODEL PER INDICATOR")
+    print("="*80)
+    print(pd.DataFrame({
+        'Indicator': report['indicators'],
+        'Multi-output R²': [f"{r2:.4f}" for r2 in report['multi_r2']],
+        'Separate R²': [f"{r2:.4f}" for r2 in report['separate_r2']]
+    }).to_string(index=False))
+
+    print(f"\n{'':<22}{'Multi-output':>14}{'Separate':>12}")
+    print(f"{'Size (KiB)':<22}{report['multi_bytes'] / 1024:>14.0f}{report['separate_bytes'] / 1024:>12.0f}")
+    print(f"{'1-row predict (ms)':<22}{report['multi_single_ms']:>14.3f}{report['separate_single_ms']:>12.3f}")
+    print(f"{'Test set predict (ms)':<22}{report['multi_batch_ms']:>14.1f}{report['separate_batch_ms']:>12.1f}")
+    print(f"\n🏆 All {len(report['indicators'])} indicators in one pass: "
+          f"{report['separate_single_ms'] / report['multi_single_ms']:.1f}x faster per row, "
+          f"{report['separate_bytes'] / report['multi_bytes']:.1f}x smaller")
+
+def train_indicator_model(data_path='hypertension_by_country.csv', output_path='hypertension_indicators_model.pkl',
+                          dtype=np.float64, fit_cache=None):
+    """Train the multi-output models, save the best one and compare it with per-indicator models"""
+    africa = load_data(data_path)
+    X_train, X_test, y_train, y_test, scaler, encoder = load_and_prepare_data(
+        dtype=dtype, targets=INDICATORS.values(), africa=africa
+    )
+    results = train_models(X_train, X_test, y_train, y_test, fit_cache=fit_cache)
+    print_detailed_results(results)
+
+    best_name, best_model = save_best_model(results, scaler, encoder, dtype=dtype,
+                                            output_path=output_path, indicators=INDICATORS,
+                                            max_year=int(africa['Year'].max()))
+    report = compare_with_separate_models(best_model, X_train, X_test, y_train, y_test)
+    print_indicator_report(best_name, report)
+    return best_name, report
@@ -1,33 +1,195 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field, field_validator
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError, field_validator, model_validator
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
+import asyncio
+import atexit
+import contextvars
+import functools
+import hashlib
+import hmac
+import io
+import joblib
+import json
+import math
 import pickle
 import os
+import tempfile
+import time
 import numpy as np
 import pandas as pd
-from typing import Optional
+from typing import Dict, List, Optional
+
+from admission_control import AdmissionController, Overloaded
+from contributions import GROUPS, ContributionExplainer
+from csv_upload import CSV_CONTENT_TYPES, MULTIPART_CONTENT_TYPE, CsvChunker, field_counts, iter_csv_bytes
+from drift_monitor import DriftMonitor, training_distribution
+from feature_encoder import FeatureEncoder
+from observation_store import ObservationStore
+from sampling_profiler import SamplingProfiler
+from structured_logging import CorrelationIdMiddleware, configure_logging
+
+# JSON logs, formatted and written by a background thread (LOG_LEVEL, LOG_RATE_LIMIT,
+# LOG_SAMPLE_RATE, LOG_QUEUE_SIZE); see structured_logging.py
+logger, log_listener = configure_logging('hypertension_api')
+log_listener.start()
+atexit.register(log_listener.stop)
+
+# Optional binary formats for high-volume batch clients
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+# List of valid African countries from the dataset. Binary batch payloads
+# refer to countries by their index in this list (same order as /countries).
+COUNTRIES = [
+    "Algeria", "Angola", "Benin", "Botswana", "Burkina Faso", "Burundi",
+    "Cabo Verde", "Cameroon", "Central African Republic", "Chad", "Comoros",
+    "Democratic Republic of the Congo", "Republic of the Congo", "Côte d'Ivoire",
+    "Djibouti", "Egypt", "Equatorial Guinea", "Eritrea", "Eswatini", "Ethiopia",
+    "Gabon", "Gambia", "Ghana", "Guinea", "Guinea-Bissau", "Kenya", "Lesotho",
+    "Liberia", "Libya", "Madagascar", "Malawi", "Mali", "Mauritania", "Mauritius",
+    "Morocco", "Mozambique", "Namibia", "Niger", "Nigeria", "Rwanda",
+    "Sao Tome and Principe", "Senegal", "Seychelles", "Sierra Leone", "Somalia",
+    "South Africa", "South Sudan", "Sudan", "Tanzania", "Togo", "Tunisia",
+    "Uganda", "Zambia", "Zimbabwe"
+]
+
+# Case-insensitive lookups used by both the per-row validators and batch validation
+COUNTRY_CODES = {country.casefold(): i for i, country in enumerate(COUNTRIES)}
+SEX_CODES = {'men': 0, 'women': 1}
+
+# African regions (UN geoscheme subregions) for POST /predict/aggregate, plus the whole continent
+REGIONS = {
+    "North Africa": ["Algeria", "Egypt", "Libya", "Morocco", "Sudan", "Tunisia"],
+    "West Africa": [
+        "Benin", "Burkina Faso", "Cabo Verde", "Côte d'Ivoire", "Gambia", "Ghana", "Guinea", "Guinea-Bissau",
+        "Liberia", "Mali", "Mauritania", "Niger", "Nigeria", "Senegal", "Sierra Leone", "Togo"
+    ],
+    "Central Africa": [
+        "Angola", "Cameroon", "Central African Republic", "Chad", "Democratic Republic of the Congo",
+        "Republic of the Congo", "Equatorial Guinea", "Gabon", "Sao Tome and Principe"
+    ],
+    "East Africa": [
+        "Burundi", "Comoros", "Djibouti", "Eritrea", "Ethiopia", "Kenya", "Madagascar", "Malawi", "Mauritius",
+        "Mozambique", "Rwanda", "Seychelles", "Somalia", "South Sudan", "Tanzania", "Uganda", "Zambia", "Zimbabwe"
+    ],
+    "Southern Africa": ["Botswana", "Eswatini", "Lesotho", "Namibia", "South Africa"],
+    "Africa": COUNTRIES
+}
+REGION_CODES = {region.casefold(): region for region in REGIONS}
+
+# Cap on the number of error entries returned for one batch
+MAX_VALIDATION_ERRORS = 1000
+
+AGE_GROUPS = ['30-34', '35-39', '40-44', '45-49', '50-54', '55-59', '60-64', '65-69', '70-74', '75-79', '80+']
+
+JSON_CONTENT_TYPE = "application/json"
+ARROW_CONTENT_TYPE = "application/vnd.apache.arrow.stream"
+MSGPACK_CONTENT_TYPES = ("application/msgpack", "application/x-msgpack")
+
+# Model file location (can be overridden with the MODEL_PATH environment variable)
+MODEL_PATH = os.environ.get('MODEL_PATH', 'hypertension_model.pkl')
+
+# Inference precision: float32 or float64. Defaults to the dtype recorded in the artifact
+# (float64 for artifacts saved before the dtype policy existed).
+MODEL_DTYPE = os.environ.get('MODEL_DTYPE')
+
+# Shared secret for /debug/profile; the endpoint does not exist (404) unless it is set
+PROFILER_TOKEN = os.environ.get('PROFILER_TOKEN')
+
+# Admission control for the prediction endpoints: concurrent predictions, bounded wait
+# queue and the longest a request may wait in it before being shed with 503
+MAX_CONCURRENT_PREDICTIONS = int(os.environ.get('MAX_CONCURRENT_PREDICTIONS', os.cpu_count() or 4))
+MAX_QUEUED_PREDICTIONS = int(os.environ.get('MAX_QUEUED_PREDICTIONS', 64))
+QUEUE_TIMEOUT_SECONDS = float(os.environ.get('QUEUE_TIMEOUT_SECONDS', 2.0))
+
+# GET /predict responses are cacheable: they depend only on the model version and the
+# normalized inputs (age group, sex, year, country)
+PREDICTION_CACHE_SIZE = int(os.environ.get('PREDICTION_CACHE_SIZE', 4096))
+PREDICTION_MAX_AGE = int(os.environ.get('PREDICTION_MAX_AGE', 3600))
+
+# Memoized POST /predict/aggregate results, keyed by model version, region and filters
+AGGREGATE_CACHE_SIZE = int(os.environ.get('AGGREGATE_CACHE_SIZE', 1024))
+
+# POST /predict/csv: bytes of CSV parsed and scored at a time, and the in-memory part of the
+# scored output (beyond it, the output waits in a temporary file until it is sent)
+CSV_CHUNK_BYTES = int(os.environ.get('CSV_CHUNK_BYTES', 1024 ** 2))
+CSV_SPOOL_BYTES = int(os.environ.get('CSV_SPOOL_BYTES', 4 * 1024 ** 2))
+
+# /ws/predict: requests a connection may have waiting behind the one being scored; older
+# ones are coalesced away (answered as skipped) so fast slider updates cannot pile up
+WS_MAX_PENDING = int(os.environ.get('WS_MAX_PENDING', 1))
+# Reply slots (requests, errors, skipped runs) per connection before it stops reading messages
+WS_MAX_QUEUE = int(os.environ.get('WS_MAX_QUEUE', 64))
+
+# Observed estimates served by /observations and attached with include_observed=true
+OBSERVATIONS_PATH = os.environ.get(
+    'OBSERVATIONS_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'linear_regression_model', 'summative', 'multivariate_regression', 'africa.csv')
+)
+
+# Lazy model loading after a failed startup: how long a request waits for the shared load,
+# and the retry backoff after a failed load (doubling up to the maximum)
+MODEL_LOAD_TIMEOUT = float(os.environ.get('MODEL_LOAD_TIMEOUT', 30.0))
+MODEL_LOAD_BACKOFF = float(os.environ.get('MODEL_LOAD_BACKOFF', 5.0))
+MODEL_LOAD_BACKOFF_MAX = float(os.environ.get('MODEL_LOAD_BACKOFF_MAX', 300.0))
+
+# Optional multi-output model for POST /predict/indicators (model_comparison.py --indicators)
+INDICATORS_MODEL_PATH = os.environ.get('INDICATORS_MODEL_PATH', 'hypertension_indicators_model.pkl')
+
+# Where model inference runs: 'dedicated' (own thread pool of INFERENCE_THREADS), 'threadpool'
+# (the shared AnyIO pool FastAPI uses for sync endpoints) or 'inline' (on the event loop)
+INFERENCE_MODE = os.environ.get('INFERENCE_MODE', 'dedicated')
+INFERENCE_THREADS = int(os.environ.get('INFERENCE_THREADS', MAX_CONCURRENT_PREDICTIONS))
+if INFERENCE_MODE not in ('dedicated', 'threadpool', 'inline'):
+    raise ValueError(f"INFERENCE_MODE must be 'dedicated', 'threadpool' or 'inline', not {INFERENCE_MODE!r}")
+
+def create_admission_controller() -> AdmissionController:
+    return AdmissionController(MAX_CONCURRENT_PREDICTIONS, MAX_QUEUED_PREDICTIONS, QUEUE_TIMEOUT_SECONDS)
+
+admission = create_admission_controller()
+
+def model_dtype(data: dict) -> np.dtype:
+    """Precision used to encode and scale features for this artifact"""
+    return np.dtype(MODEL_DTYPE or data.get('dtype', 'float64'))
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan context manager for startup and shutdown events"""
     # Startup
-    print("Starting Hypertension Prediction API...")
-    print(f"Current working directory: {os.getcwd()}")
-    print(f"Files in directory: {os.listdir('.')}")
+    global admission, model_load_task, inference_executor
+    logger.info("Starting Hypertension Prediction API", extra={'working_directory': os.getcwd()})
+    admission = create_admission_controller()  # bound to this server's event loop
+    inference_executor = ThreadPoolExecutor(max_workers=INFERENCE_THREADS, thread_name_prefix="inference")
+    model_load_task = None
+    load_observations()
+    load_indicators_model()
     
-    success = load_model()
+    success = load_model() and warmup_model()
+    record_model_load(success)
     if success:
-        print("API startup completed successfully!")
+        logger.info("API startup completed")
     else:
-        print("API startup failed - Model not loaded!")
-        print("Warning: API may not function properly without the model.")
-        print("Will attempt to load model on first prediction request...")
+        logger.warning("Model not loaded at startup; it will be loaded on the first prediction request")
     
     yield
     
     # Shutdown
-    print("Shutting down Hypertension Prediction API...")
+    logger.info("Shutting down Hypertension Prediction API")
+    inference_executor.shutdown(wait=True)
 
 # Create FastAPI app
 app = FastAPI(
@@ -37,6 +199,9 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# One correlation ID per request (X-Request-ID) on every log record, plus a sampled access log
+app.add_middleware(CorrelationIdMiddleware, logger=logger)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -46,6 +211,37 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all headers
 )
 
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request: Request, exc: Overloaded):
+    """Shed requests fail fast with 503 and a Retry-After hint"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": exc.reason},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+def json_safe(value):
+    """value with non-finite floats as strings ('inf', 'nan'), which JSON cannot represent"""
+    if isinstance(value, float) and not math.isfinite(value):
+        return str(value)
+    if isinstance(value, dict):
+        return {key: json_safe(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [json_safe(item) for item in value]
+    return value
+
+@app.exception_handler(RequestValidationError)
+async def validation_error_handler(request: Request, exc: RequestValidationError):
+    """
+    FastAPI's 422 response, safe for rejected Infinity/NaN inputs
+    
+    Python's JSON parser accepts Infinity and NaN, and the errors echo the input back.
+    """
+    return JSONResponse(status_code=422, content={"detail": json_safe(jsonable_encoder(exc.errors()))})
+
+SEX_ERROR = 'Sex must be "Men" or "Women"'
+COUNTRY_ERROR = f'Country must be one of the valid African countries: {", ".join(COUNTRIES[:10])}...'
+
 # Pydantic models for request/response
 class PredictionRequest(BaseModel):
     model_config = {"protected_namespaces": ()}
@@ -58,29 +254,18 @@ class PredictionRequest(BaseModel):
     @field_validator('sex')
     @classmethod
     def validate_sex(cls, v):
-        if v.lower() not in ['men', 'women']:
-            raise ValueError('Sex must be "Men" or "Women"')
+        if v.lower() not in SEX_CODES:
+            raise ValueError(SEX_ERROR)
         return v.title()  # Normalize to title case
     
     @field_validator('country')
     @classmethod
     def validate_country(cls, v):
-        # List of valid African countries from the dataset
-        valid_countries = [
-            "Algeria", "Angola", "Benin", "Botswana", "Burkina Faso", "Burundi",
-            "Cabo Verde", "Cameroon", "Central African Republic", "Chad", "Comoros",
-            "Democratic Republic of the Congo", "Republic of the Congo", "Côte d'Ivoire",
-            "Djibouti", "Egypt", "Equatorial Guinea", "Eritrea", "Eswatini", "Ethiopia",
-            "Gabon", "Gambia", "Ghana", "Guinea", "Guinea-Bissau", "Kenya", "Lesotho",
-            "Liberia", "Libya", "Madagascar", "Malawi", "Mali", "Mauritania", "Mauritius",
-            "Morocco", "Mozambique", "Namibia", "Niger", "Nigeria", "Rwanda",
-            "Sao Tome and Principe", "Senegal", "Seychelles", "Sierra Leone", "Somalia",
-            "South Africa", "South Sudan", "Sudan", "Tanzania", "Togo", "Tunisia",
-            "Uganda", "Zambia", "Zimbabwe"
-        ]
-        if v.title() not in valid_countries:
-            raise ValueError(f'Country must be one of the valid African countries: {", ".join(valid_countries[:10])}...')
-        return v.title()
+        # Normalize to the canonical spelling ("côte d'ivoire" -> "Côte d'Ivoire")
+        code = COUNTRY_CODES.get(v.casefold())
+        if code is None:
+            raise ValueError(COUNTRY_ERROR)
+        return COUNTRIES[code]
 
 class PredictionResponse(BaseModel):
     model_config = {"protected_namespaces": ()}
@@ -89,23 +274,209 @@ class PredictionResponse(BaseModel):
     age_group: str = Field(..., description="Age group corresponding to the input age")
     message: str = Field(..., description="Human-readable message")
     model_used: str = Field(..., description="Name of the model used for prediction")
+    observed: Optional[dict] = Field(None, description="Observed NCD-RisC estimates for the same inputs (include_observed=true)")
+    explanation: Optional[dict] = Field(None, description="Baseline and per-feature contributions that sum to the prediction (explain=true)")
+
+class IndicatorsResponse(BaseModel):
+    """Response model for indicator predictions"""
+    model_config = {"protected_namespaces": ()}
+    
+    indicators: dict = Field(..., description="Predicted proportion for every indicator, by name")
+    age_group: str = Field(..., description="Age group corresponding to the input age")
+    model_used: str = Field(..., description="Name of the model used for prediction")
 
-# Global variable to store loaded model
+class AggregateRequest(BaseModel):
+    """Region and filters whose per-country predictions are combined into one prevalence"""
+    region: str = Field(..., description=f"Region: {', '.join(REGIONS)}")
+    year: int = Field(..., ge=1990, le=2030, description="Year (1990-2030)")
+    sex: Optional[str] = Field(None, description="'Men' or 'Women'; both when omitted")
+    min_age: int = Field(30, ge=30, le=100, description="Youngest age included; its whole age group is included")
+    max_age: int = Field(100, ge=30, le=100, description="Oldest age included; its whole age group is included")
+    country_weights: Optional[Dict[str, float]] = Field(
+        None, description="Weight per country of the region, e.g. population; equal weights when omitted"
+    )
+    age_weights: Optional[Dict[str, float]] = Field(
+        None, description="Weight per age group label, e.g. population share; equal weights when omitted"
+    )
+    
+    @field_validator('region')
+    @classmethod
+    def validate_region(cls, v):
+        region = REGION_CODES.get(v.strip().casefold())
+        if region is None:
+            raise ValueError(f"Region must be one of: {', '.join(REGIONS)}")
+        return region
+    
+    @field_validator('sex')
+    @classmethod
+    def validate_sex(cls, v):
+        if v is not None and v.lower() not in SEX_CODES:
+            raise ValueError(SEX_ERROR)
+        return v.title() if v is not None else None
+    
+    @field_validator('country_weights')
+    @classmethod
+    def validate_country_weights(cls, v):
+        if v is None:
+            return None
+        weights = {}
+        for country, weight in v.items():
+            code = COUNTRY_CODES.get(country.casefold())
+            if code is None:
+                raise ValueError(f"Unknown country in weights: {country}")
+            if not (math.isfinite(weight) and weight >= 0):
+                raise ValueError("Weights must be finite and non-negative")
+            weights[COUNTRIES[code]] = weight
+        return weights
+    
+    @field_validator('age_weights')
+    @classmethod
+    def validate_age_weights(cls, v):
+        if v is None:
+            return None
+        if set(v) - set(AGE_GROUPS):
+            raise ValueError(f"Age weights must be keyed by age group: {', '.join(AGE_GROUPS)}")
+        if not all(math.isfinite(weight) and weight >= 0 for weight in v.values()):
+            raise ValueError("Weights must be finite and non-negative")
+        return v
+    
+    @model_validator(mode='after')
+    def validate_filters(self):
+        if self.max_age < self.min_age:
+            raise ValueError("max_age must not be less than min_age")
+        if self.country_weights is not None:
+            missing = [country for country in REGIONS[self.region] if country not in self.country_weights]
+            if missing:
+                raise ValueError(f"country_weights has no weight for: {', '.join(missing)}")
+        if self.age_weights is not None:
+            missing = [group for group in self.age_groups() if group not in self.age_weights]
+            if missing:
+                raise ValueError(f"age_weights has no weight for: {', '.join(missing)}")
+        return self
+    
+    def age_codes(self) -> np.ndarray:
+        """Codes of the age groups overlapping [min_age, max_age]"""
+        return np.arange(age_groups_encoded(self.min_age), age_groups_encoded(self.max_age) + 1)
+    
+    def age_groups(self) -> list:
+        return [AGE_GROUPS[code] for code in self.age_codes()]
+
+class AggregateResponse(BaseModel):
+    """Response model for regional aggregates"""
+    model_config = {"protected_namespaces": ()}
+    
+    region: str = Field(..., description="Canonical region name")
+    year: int = Field(..., description="Year")
+    sex: Optional[str] = Field(None, description="Sex filter; null for both")
+    age_groups: List[str] = Field(..., description="Age groups included")
+    prevalence: float = Field(..., description="Weighted mean predicted prevalence over the region and filters")
+    by_country: Dict[str, Optional[float]] = Field(..., description="Weighted mean per country (null for zero weight)")
+    untrained_countries: List[str] = Field(..., description="Countries of the region the model was not trained on; not included")
+    rows: int = Field(..., description="Number of (country, sex, age group) rows scored")
+    model_used: str = Field(..., description="Name of the model used for prediction")
+
+class BatchPredictionRequest(BaseModel):
+    """Documents the JSON batch format; batches are validated column-wise by validate_columns"""
+    rows: List[PredictionRequest] = Field(..., min_length=1, description="Rows to predict")
+
+# Global variables to store loaded model and its precomputed feature layout
 model_data = None
+feature_index = None
+
+# Multi-output indicators artifact and its feature layout, None unless INDICATORS_MODEL_PATH exists
+indicators_data = None
+indicators_index = None
+
+# Read-only observation store built from OBSERVATIONS_PATH at startup
+observation_store = None
+
+# Production input/prediction sketches, and the drift reference used when the artifact
+# has no training_distribution (built from the observation store)
+drift_monitor = DriftMonitor(len(COUNTRIES), len(AGE_GROUPS))
+observation_reference = None
+
+# Artifact version plus content hash, and the LRU of serialized GET /predict bodies for it
+model_version = None
+prediction_cache = OrderedDict()
+
+# LRU of POST /predict/aggregate results for the current model version
+aggregate_cache = OrderedDict()
+
+# Year of the synthetic warmup batch (every age group, sex and country)
+WARMUP_YEAR = 2020
+
+# Precomputed probe state; the health endpoints only serialize these, they never touch the filesystem
+service_state = {
+    "ready": False,
+    "model_loaded": False,
+    "model_name": None,
+    "model_version": None,
+    "model_features": 0,
+    "model_path": None,
+    "working_directory": os.getcwd(),
+    "model_file_exists": False,
+    "warmup": None
+}
+health_body = b""
+readiness_body = b""
+
+def refresh_service_state(**changes):
+    """Update the probe state and re-serialize the probe responses"""
+    global health_body, readiness_body
+    service_state.update(changes)
+    health_body = json.dumps({
+        "status": "healthy" if service_state["ready"] else "unhealthy",
+        **{key: service_state[key] for key in ("model_loaded", "model_name", "model_version", "model_features", "working_directory", "model_file_exists")}
+    }).encode()
+    readiness_body = json.dumps({
+        "status": "ready" if service_state["ready"] else "not ready",
+        **{key: service_state[key] for key in ("model_name", "warmup")}
+    }).encode()
+
+refresh_service_state()
+
+def trained_countries(encoder: FeatureEncoder) -> np.ndarray:
+    """
+    Mask over COUNTRIES of the countries the model saw in training
+    
+    Any other country encodes like the all-zero baseline country. Artifacts without a saved
+    encoder only name their one-hot countries; their baseline is taken to be the country
+    sorting just before the first of them, as get_dummies(drop_first=True) dropped it.
+    """
+    trained = encoder.country_codes(COUNTRIES) >= 0
+    has_baseline = bool((encoder.country_columns[:-1] < 0).any())
+    if not has_baseline and encoder.countries:
+        earlier = [i for i, country in enumerate(COUNTRIES) if country < min(encoder.countries)]
+        if earlier:
+            trained[max(earlier, key=lambda i: COUNTRIES[i])] = True
+    return trained
+
+def build_feature_index(data: dict) -> dict:
+    """The artifact's feature encoder, scaling constants and contribution explainer, ready for both prediction paths"""
+    dtype = model_dtype(data)
+    state = data.get('feature_encoder') or {'feature_names': data['feature_names']}
+    encoder = FeatureEncoder(**{**state, 'dtype': dtype})
+    scaler = data['scaler']
+    return {
+        'encoder': encoder,
+        'dtype': dtype,
+        # Country index (position in COUNTRIES) -> encoder country code
+        'country': encoder.country_codes(COUNTRIES),
+        'trained': trained_countries(encoder),
+        'mean': np.asarray(scaler.mean_, dtype=dtype),
+        'scale': np.asarray(scaler.scale_, dtype=dtype),
+        # None for models without fast contributions (explain=true answers 400)
+        'explainer': ContributionExplainer.for_model(data['model'], encoder)
+    }
 
 def load_model():
     """Load the trained model"""
-    global model_data
+    global model_data, feature_index, model_version
     try:
-        # Load model from current directory
-        model_path = 'hypertension_model.pkl'
+        model_path = MODEL_PATH
         
         # Check if file exists
         if not os.path.exists(model_path):
-            print(f"Model file not found: {model_path}")
-            print(f"Current working directory: {os.getcwd()}")
-            print(f"Files in directory: {os.listdir('.')}")
-            
             # Try alternative paths
             alternative_paths = [
                 './hypertension_model.pkl',
@@ -116,36 +487,238 @@ def load_model():
             
             for alt_path in alternative_paths:
                 if os.path.exists(alt_path):
-                    print(f"Found model at alternative path: {alt_path}")
+                    logger.warning("Model file not found at MODEL_PATH; using an alternative path",
+                                   extra={'model_path': MODEL_PATH, 'alternative_path': alt_path})
                     model_path = alt_path
                     break
             else:
-                print("Model file not found in any location")
+                logger.error("Model file not found", extra={
+                    'model_path': MODEL_PATH, 'alternative_paths': alternative_paths, 'working_directory': os.getcwd()
+                })
                 return False
         
-        print(f"Loading model from: {os.path.abspath(model_path)}")
+        logger.info("Loading model", extra={'model_path': os.path.abspath(model_path)})
         
         with open(model_path, 'rb') as file:
-            model_data = pickle.load(file)
+            payload = file.read()
+        data = pickle.loads(payload)
         
         # Verify model data structure
         required_keys = ['model', 'scaler', 'feature_names', 'model_name', 'age_mapping', 'sex_mapping']
-        missing_keys = [key for key in required_keys if key not in model_data]
+        missing_keys = [key for key in required_keys if key not in data]
         
         if missing_keys:
-            print(f"Model data missing keys: {missing_keys}")
+            logger.error("Model data missing keys", extra={'missing_keys': missing_keys})
             return False
         
-        print("Model loaded successfully!")
-        print(f"Model name: {model_data['model_name']}")
-        print(f"Features: {len(model_data['feature_names'])} features")
+        # Only publish a usable artifact: ensure_model_loaded retries while model_data is None
+        feature_index = build_feature_index(data)
+        model_data = data
+        model_version = f"v{model_data.get('version', 1)}-{hashlib.sha256(payload).hexdigest()[:12]}"
+        prediction_cache.clear()
+        aggregate_cache.clear()
+        refresh_service_state(
+            ready=False,
+            model_loaded=True,
+            model_name=model_data['model_name'],
+            model_version=model_version,
+            model_features=len(model_data['feature_names']),
+            model_path=os.path.abspath(model_path),
+            model_file_exists=True
+        )
+        
+        logger.info("Model loaded", extra={
+            'model_name': model_data['model_name'],
+            'model_version': model_version,
+            'model_features': len(model_data['feature_names'])
+        })
+        return True
+        
+    except Exception:
+        logger.exception("Error loading model")
+        return False
+
+def load_indicators_model() -> bool:
+    """Load the optional multi-output artifact; without it /predict/indicators returns 503"""
+    global indicators_data, indicators_index
+    indicators_data = indicators_index = None
+    try:
+        if not os.path.exists(INDICATORS_MODEL_PATH):
+            logger.info("Indicators model not found", extra={'model_path': INDICATORS_MODEL_PATH})
+            return False
+        # joblib reads both model_comparison's joblib dumps and plain pickles
+        data = joblib.load(INDICATORS_MODEL_PATH)
+        if 'indicators' not in data:
+            logger.error("Not a multi-output indicators model", extra={'model_path': INDICATORS_MODEL_PATH})
+            return False
+        indicators_index = build_feature_index(data)
+        indicators_data = data
+        logger.info("Indicators model loaded", extra={'model_name': data['model_name'], 'indicators': list(data['indicators'])})
         return True
+    except Exception:
+        logger.exception("Error loading indicators model")
+        return False
+
+def load_observations() -> bool:
+    """Build the observation store; the API works without it (the /observations endpoints return 503)"""
+    global observation_store, observation_reference
+    try:
+        observation_store = ObservationStore.from_csv(OBSERVATIONS_PATH, COUNTRIES, AGE_GROUPS)
+        columns = observation_store.columns
+        observation_reference = training_distribution(
+            np.asarray(COUNTRIES)[columns['country']], np.asarray(['Men', 'Women'])[columns['sex']],
+            np.asarray(AGE_GROUPS)[columns['age']], columns['year'], columns['prevalence']
+        )
+        logger.info("Observation store loaded", extra={'rows': observation_store.n_rows, 'path': OBSERVATIONS_PATH})
+        return True
+    except Exception as e:
+        observation_store = None
+        logger.warning("Observation store not available", extra={'path': OBSERVATIONS_PATH, 'error': str(e)})
+        return False
+
+def observed_for(age: int, sex: str, year: int, country: str) -> Optional[dict]:
+    """Observed estimates for validated prediction inputs, None if not observed"""
+    if observation_store is None:
+        return None
+    return observation_store.lookup(COUNTRY_CODES[country.casefold()], year, SEX_CODES[sex.lower()], int(age_groups_encoded(age)))
+
+def drift_reference() -> tuple:
+    """(source, distribution) the production sketches are compared against"""
+    if model_data is not None and model_data.get('training_distribution'):
+        return 'artifact', model_data['training_distribution']
+    if observation_reference is not None:
+        return 'observations', observation_reference
+    return None, None
+
+# Thread pool for INFERENCE_MODE=dedicated, created at startup
+inference_executor = None
+
+async def run_inference(func, *args, **kwargs):
+    """
+    Run CPU-bound inference according to INFERENCE_MODE
+    
+    sklearn and numpy release the GIL for much of their work, so running predictions
+    in threads lets them overlap with each other and keeps the event loop free for
+    parsing and I/O. A dedicated pool isolates inference from other blocking work in
+    the shared pool. Inline execution skips the thread hop, which can be faster for
+    tiny models at low concurrency.
+    """
+    if INFERENCE_MODE == 'inline':
+        return func(*args, **kwargs)
+    if INFERENCE_MODE == 'dedicated' and inference_executor is not None:
+        loop = asyncio.get_running_loop()
+        # Carry the request's context (its correlation ID) into the pool thread
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(inference_executor, functools.partial(context.run, func, *args, **kwargs))
+    return await run_in_threadpool(func, *args, **kwargs)
+
+# Single-flight lazy loading: the one in-progress load, and the cached outcome of the last failure
+model_load_task = None
+model_load_failure = {"failures": 0, "retry_at": 0.0, "error": None}
+
+def record_model_load(success: bool, error: Optional[str] = None):
+    """Reset the backoff after a successful load, or extend it after a failure"""
+    if success:
+        model_load_failure.update(failures=0, retry_at=0.0, error=None)
+        return
+    failures = model_load_failure["failures"] + 1
+    backoff = min(MODEL_LOAD_BACKOFF * 2 ** (failures - 1), MODEL_LOAD_BACKOFF_MAX)
+    model_load_failure.update(
+        failures=failures,
+        retry_at=time.monotonic() + backoff,
+        error=error or "model could not be loaded"
+    )
+    logger.error("Model load failed", extra={'failures': failures, 'retry_in_seconds': backoff, 'error': error})
+
+def _finish_model_load(task: asyncio.Task):
+    global model_load_task
+    model_load_task = None
+    if task.cancelled():
+        record_model_load(False, "load cancelled")
+    elif task.exception() is not None:
+        record_model_load(False, str(task.exception()))
+    else:
+        record_model_load(task.result())
+
+async def ensure_model_loaded():
+    """
+    Load the model on demand without blocking the event loop
+    
+    The first caller starts one load (unpickle + warmup) in a worker thread and every
+    concurrent caller awaits that same load for at most MODEL_LOAD_TIMEOUT seconds.
+    After a failure, callers get 503 with Retry-After until the backoff expires instead
+    of retrying the load on every request.
+    """
+    global model_load_task
+    if model_data is not None:
+        return
+    
+    if model_load_task is None:
+        wait = model_load_failure["retry_at"] - time.monotonic()
+        if wait > 0:
+            raise HTTPException(
+                status_code=503,
+                detail=f"Model not loaded: {model_load_failure['error']}; next attempt in {math.ceil(wait)}s",
+                headers={"Retry-After": str(math.ceil(wait))}
+            )
+        logger.info("Loading model on demand")
+        model_load_task = asyncio.ensure_future(asyncio.to_thread(lambda: load_model() and warmup_model()))
+        model_load_task.add_done_callback(_finish_model_load)
+    
+    try:
+        # shield: a timed-out request must not cancel the load the others are waiting for
+        loaded = await asyncio.wait_for(asyncio.shield(model_load_task), MODEL_LOAD_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=503, detail="Model is still loading", headers={"Retry-After": "1"})
+    if not loaded:
+        raise HTTPException(status_code=503, detail="Model not loaded and could not be loaded",
+                            headers={"Retry-After": str(math.ceil(MODEL_LOAD_BACKOFF))})
+
+def warmup_model() -> bool:
+    """
+    Run a representative synthetic batch and single prediction through the full prediction path
+    
+    Pays the first-call costs inside pandas, sklearn and numpy before traffic arrives, records
+    cold and warm latency, and only then marks the instance as ready. A failed warmup
+    unloads the model again, so the next request retries the whole load after the backoff.
+    """
+    global model_data, feature_index
+    if model_data is None:
+        return False
+    
+    try:
+        # Every (age group, sex, country) combination for one year
+        age_starts = np.arange(30, 85, 5)
+        age, sex, country = (column.ravel() for column in np.meshgrid(age_starts, [0, 1], np.arange(len(COUNTRIES)), indexing='ij'))
+        year = np.full(len(age), WARMUP_YEAR)
+        
+        start = time.perf_counter()
+        make_prediction(age=45, sex='Men', year=WARMUP_YEAR, country=COUNTRIES[0])
+        predict_columns(age, sex, year, country)
+        cold_ms = (time.perf_counter() - start) * 1000
         
+        start = time.perf_counter()
+        make_prediction(age=62, sex='Women', year=WARMUP_YEAR, country=COUNTRIES[-1])
+        single_ms = (time.perf_counter() - start) * 1000
+        
+        start = time.perf_counter()
+        predict_columns(age, sex, year, country)
+        batch_ms = (time.perf_counter() - start) * 1000
     except Exception as e:
-        print(f"Error loading model: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Warmup failed")
+        model_data = feature_index = None
+        refresh_service_state(ready=False, model_loaded=False, warmup={"error": str(e)})
         return False
+    
+    warmup = {
+        "batch_rows": len(age),
+        "cold_ms": round(cold_ms, 3),
+        "warm_single_ms": round(single_ms, 3),
+        "warm_batch_ms": round(batch_ms, 3)
+    }
+    refresh_service_state(ready=True, warmup=warmup)
+    logger.info("Warmup completed", extra=warmup)
+    return True
 
 def age_to_group(age: int) -> str:
     """Convert age to age group"""
@@ -168,68 +741,363 @@ def age_to_group(age: int) -> str:
             return group
     return '30-34'  # Default fallback
 
-def make_prediction(age: int, sex: str, year: int, country: str) -> dict:
-    """Make prediction using the loaded model"""
+def encode_request(index: dict, age_group: str, sex: str, year: int, country: str) -> np.ndarray:
+    """One scaled feature row for a model's build_feature_index() layout"""
+    encoder = index['encoder']
+    sex_code = encoder.sex_code(sex)
+    if sex_code < 0:
+        raise ValueError(f"Unknown sex: {sex}")
+    
+    # Encode into the encoder's per-thread row buffer, then scale like StandardScaler
+    features = encoder.encode_row(year, sex_code, encoder.age_code(age_group), encoder.country_code(country))
+    return (features - index['mean']) / index['scale']
+
+def require_explainer() -> ContributionExplainer:
+    """The loaded model's contribution explainer, or 400 if it has none"""
+    explainer = feature_index['explainer']
+    if explainer is None:
+        raise HTTPException(status_code=400, detail=f"Contributions are not available for {model_data['model_name']}")
+    return explainer
+
+def make_prediction(age: int, sex: str, year: int, country: str, explain: bool = False) -> dict:
+    """Make prediction using the loaded model, with the contribution breakdown if explain"""
     if model_data is None:
         raise HTTPException(status_code=500, detail="Model not loaded")
+    explainer = require_explainer() if explain else None
     
     try:
-        model = model_data['model']
-        scaler = model_data['scaler']
-        feature_names = model_data['feature_names']
         model_name = model_data['model_name']
-        age_mapping = model_data['age_mapping']
-        sex_mapping = model_data['sex_mapping']
         
         # Convert age to age group
         age_group = age_to_group(age)
         
-        # Encode inputs
-        sex_encoded = sex_mapping[sex]
-        age_encoded = age_mapping[age_group]
-        
-        # Create feature vector
-        features = {}
-        
-        # Add basic features
-        features['Year'] = year
-        features['Sex_binary'] = sex_encoded
-        features['Age_encoded'] = age_encoded
-        
-        # Add country features (one-hot encoded)
-        for feature in feature_names:
-            if feature.startswith('Country_'):
-                country_name = feature.replace('Country_', '')
-                features[feature] = 1 if country_name == country else 0
-        
-        # Create DataFrame
-        input_df = pd.DataFrame([features])
-        
-        # Ensure all required features are present
-        for feature in feature_names:
-            if feature not in input_df.columns:
-                input_df[feature] = 0
-        
-        # Reorder columns to match training data
-        input_df = input_df[feature_names]
-        
-        # Scale features
-        input_scaled = scaler.transform(input_df)
-        
         # Make prediction
-        prediction = model.predict(input_scaled)[0]
+        features = encode_request(feature_index, age_group, sex, year, country)
+        prediction = model_data['model'].predict(features)[0]
         
-        return {
+        result = {
             'prediction': float(prediction),
             'age_group': age_group,
             'message': f"Predicted hypertension prevalence for {age}-year-old {sex.lower()} in {country} ({year}): {prediction:.4f}",
             'model_used': model_name
         }
+        if explainer is not None:
+            result['explanation'] = explainer.explain_dict(features)
+        return result
         
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Prediction error: {str(e)}")
 
+def make_indicator_prediction(age: int, sex: str, year: int, country: str) -> dict:
+    """Every indicator from one encoded row and one call to the multi-output model"""
+    age_group = age_to_group(age)
+    values = indicators_data['model'].predict(encode_request(indicators_index, age_group, sex, year, country))[0]
+    return {
+        'indicators': {name: float(value) for name, value in zip(indicators_data['indicators'], values)},
+        'age_group': age_group,
+        'model_used': indicators_data['model_name']
+    }
+
+
+def age_groups_encoded(age: np.ndarray) -> np.ndarray:
+    """Vectorized age bucketing: 5-year groups from 30, everything from 80 up is '80+'"""
+    return np.minimum((age - 30) // 5, len(AGE_GROUPS) - 1)
+
+def encode_columns(age: np.ndarray, sex: np.ndarray, year: np.ndarray, country: np.ndarray) -> np.ndarray:
+    """
+    Scaled feature matrix of a whole batch of columnar inputs
+    
+    Inputs are already-validated integer columns: age in years, sex code (0=Men, 1=Women),
+    year and country index into COUNTRIES. The feature encoder fills the matrix column by
+    column, so no per-row Python objects are created.
+    """
+    if model_data is None or feature_index is None:
+        raise HTTPException(status_code=500, detail="Model not loaded")
+    
+    features = feature_index['encoder'].encode_batch(year, sex, age_groups_encoded(age), feature_index['country'][country])
+    
+    # Same transform as StandardScaler.transform, without the DataFrame round trip
+    features -= feature_index['mean']
+    features /= feature_index['scale']
+    return features
+
+def predict_columns(age: np.ndarray, sex: np.ndarray, year: np.ndarray, country: np.ndarray) -> np.ndarray:
+    """Predict a whole batch from columnar inputs (see encode_columns) in one model call"""
+    features = encode_columns(age, sex, year, country)
+    return np.asarray(model_data['model'].predict(features), dtype=np.float64)
+
+def explain_columns(age: np.ndarray, sex: np.ndarray, year: np.ndarray, country: np.ndarray) -> tuple:
+    """Predictions and (n_rows, len(GROUPS)) contributions of a batch, from one encoded matrix"""
+    features = encode_columns(age, sex, year, country)
+    explainer = require_explainer()
+    return np.asarray(model_data['model'].predict(features), dtype=np.float64), explainer.explain(features)
+
+def aggregate_prediction(request: AggregateRequest) -> dict:
+    """
+    Weighted regional prevalence from one model call
+    
+    Every (country, sex, age group) cell of the region and filters becomes one row of a
+    single encoded matrix. The predictions are reshaped to (country, sex, age group) and
+    reduced with the broadcast product of the country and age group weights; both sexes
+    weigh the same. Countries the model was not trained on are left out and listed as
+    untrained_countries, rather than scored as the baseline country.
+    """
+    region_codes = [COUNTRY_CODES[country.casefold()] for country in REGIONS[request.region]]
+    country_codes = np.array([code for code in region_codes if feature_index['trained'][code]], dtype=np.int64)
+    if len(country_codes) == 0:
+        raise HTTPException(status_code=422, detail=f"The model was not trained on any country of {request.region}")
+    countries = [COUNTRIES[code] for code in country_codes]
+    sex_codes = np.array([SEX_CODES[request.sex.lower()]] if request.sex else [0, 1])
+    age_codes = request.age_codes()
+    
+    country, sex, age = (grid.ravel() for grid in np.meshgrid(country_codes, sex_codes, age_codes, indexing='ij'))
+    predictions = predict_columns(30 + 5 * age, sex, np.full(len(country), request.year), country)
+    predictions = predictions.reshape(len(country_codes), len(sex_codes), len(age_codes))
+    
+    country_weights = np.array([request.country_weights[c] for c in countries] if request.country_weights else [1.0] * len(countries))
+    age_weights = np.array([request.age_weights[AGE_GROUPS[code]] for code in age_codes] if request.age_weights else [1.0] * len(age_codes))
+    weights = np.broadcast_to(country_weights[:, None, None] * age_weights[None, None, :], predictions.shape)
+    
+    country_totals = weights.sum(axis=(1, 2))
+    if country_totals.sum() <= 0:
+        raise HTTPException(status_code=422, detail="The weights of the selected rows sum to zero")
+    weighted = (predictions * weights).sum(axis=(1, 2))
+    by_country = np.divide(weighted, country_totals, out=np.full(len(countries), np.nan), where=country_totals > 0)
+    
+    return {
+        'region': request.region,
+        'year': request.year,
+        'sex': request.sex,
+        'age_groups': [AGE_GROUPS[code] for code in age_codes],
+        'prevalence': float(weighted.sum() / country_totals.sum()),
+        'by_country': {c: (None if np.isnan(value) else float(value)) for c, value in zip(countries, by_country)},
+        'untrained_countries': [COUNTRIES[code] for code in region_codes if not feature_index['trained'][code]],
+        'rows': int(predictions.size),
+        'model_used': model_data['model_name']
+    }
+
+def _validation_error(loc: tuple, error_type: str, msg: str, value, ctx: Optional[dict] = None) -> dict:
+    """Build one error entry in the same shape FastAPI returns for pydantic errors"""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not np.isfinite(value):
+        value = None  # JSON has no NaN or Infinity
+    error = {'type': error_type, 'loc': loc, 'msg': msg, 'input': value}
+    if ctx is not None:
+        error['ctx'] = ctx
+    return error
+
+def _validate_int_column(values, low: int, high: int) -> tuple:
+    """Vectorized integer and range check; returns the values and (mask, type, msg, ctx) failures"""
+    if isinstance(values, np.ndarray) and values.dtype.kind in 'iu':
+        numbers = values.astype(np.float64)
+    else:
+        numbers = pd.to_numeric(pd.Series(values, dtype=object), errors='coerce').to_numpy(dtype=np.float64)
+    
+    missing = np.isnan(numbers)
+    fractional = ~missing & (numbers != np.floor(numbers))
+    checked = ~missing & ~fractional
+    failures = [
+        (missing, 'int_parsing', 'Input should be a valid integer, unable to parse string as an integer', None),
+        (fractional, 'int_from_float', 'Input should be a valid integer, got a number with a fractional part', None),
+        (checked & (numbers < low), 'greater_than_equal', f'Input should be greater than or equal to {low}', {'ge': low}),
+        (checked & (numbers > high), 'less_than_equal', f'Input should be less than or equal to {high}', {'le': high})
+    ]
+    return numbers, failures
+
+def _lookup_category(values, codes: dict) -> np.ndarray:
+    """Vectorized case-insensitive category lookup; unknown or missing values map to -1"""
+    factorized, uniques = pd.factorize(pd.Series(values, dtype=object))
+    # factorize marks missing values with -1, which picks the trailing -1 entry
+    unique_codes = np.array(
+        [codes.get(value.casefold(), -1) if isinstance(value, str) else -1 for value in uniques] + [-1],
+        dtype=np.int64
+    )
+    return unique_codes[factorized]
+
+def validate_columns(raw_columns: dict, loc) -> tuple:
+    """
+    Validate a whole batch column by column
+    
+    raw_columns maps age/sex/year/country to equal-length lists or arrays. sex and country
+    may be strings (case-insensitive) or integer codes (sex 0=Men, 1=Women; country index
+    into COUNTRIES). loc(row, field) builds the error location for a failing value.
+    
+    Returns (columns, valid, errors): clean int64 columns (invalid rows hold placeholder
+    values), a boolean mask of valid rows and FastAPI-style 422 error entries ordered by row.
+    """
+    n_rows = len(raw_columns['age'])
+    valid = np.ones(n_rows, dtype=bool)
+    failures = []
+    columns = {}
+    
+    for name, low, high in (('age', 30, 100), ('year', 1990, 2030)):
+        numbers, checks = _validate_int_column(raw_columns[name], low, high)
+        failures.extend((name,) + check for check in checks)
+        columns[name] = np.nan_to_num(numbers, nan=low).clip(low, high).astype(np.int64)
+    
+    for name, codes, n_codes, msg in (('sex', SEX_CODES, 2, SEX_ERROR), ('country', COUNTRY_CODES, len(COUNTRIES), COUNTRY_ERROR)):
+        values = raw_columns[name]
+        if isinstance(values, np.ndarray) and values.dtype.kind in 'iu':
+            encoded = np.where((values >= 0) & (values < n_codes), values, -1).astype(np.int64)
+        else:
+            encoded = _lookup_category(values, codes)
+        failures.append((name, encoded < 0, 'value_error', f'Value error, {msg}', {'error': {}}))
+        columns[name] = np.maximum(encoded, 0)
+    
+    errors = []
+    for name, mask, error_type, msg, ctx in failures:
+        valid &= ~mask
+        for row in np.flatnonzero(mask)[:MAX_VALIDATION_ERRORS]:
+            errors.append((row, _validation_error(loc(int(row), name), error_type, msg, raw_columns[name][row], ctx)))
+    
+    errors.sort(key=lambda item: item[0])
+    return columns, valid, [error for _, error in errors[:MAX_VALIDATION_ERRORS]]
+
+def decode_columnar_payload(body: bytes, content_type: str) -> dict:
+    """
+    Decode an Arrow IPC stream or msgpack map of columns into numpy arrays
+    
+    Bodies that cannot be decoded answer 400; columns that are not integers answer 422
+    in the same format as JSON validation errors.
+    """
+    if content_type == ARROW_CONTENT_TYPE:
+        if pa is None:
+            raise HTTPException(status_code=415, detail="Arrow payloads require pyarrow on the server")
+        try:
+            table = pa.ipc.open_stream(body).read_all()
+            raw_columns = {name: table.column(name).to_numpy() for name in table.column_names}
+        except (pa.ArrowException, ValueError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid Arrow IPC stream: {str(e)}")
+    else:
+        if msgpack is None:
+            raise HTTPException(status_code=415, detail="msgpack payloads require msgpack on the server")
+        try:
+            raw_columns = msgpack.unpackb(body)
+        except (msgpack.UnpackException, ValueError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid msgpack payload: {str(e)}")
+        if not isinstance(raw_columns, dict):
+            raise HTTPException(status_code=400, detail="msgpack payload must be a map of column name to array")
+    
+    columns = {}
+    for name in ('age', 'sex', 'year', 'country'):
+        if name not in raw_columns:
+            raise HTTPException(status_code=422, detail=f"Missing column: {name}")
+        value = raw_columns[name]
+        try:
+            # msgpack columns may be arrays or raw little-endian int32 buffers
+            if isinstance(value, (bytes, bytearray)):
+                value = np.frombuffer(value, dtype='<i4')
+            column = np.asarray(value)
+            if column.ndim != 1 or column.dtype.kind not in 'iu':
+                raise ValueError(f"expected integers, got {column.dtype}")
+            columns[name] = column.astype(np.int64)
+        except (TypeError, ValueError) as e:
+            raise RequestValidationError([_validation_error(
+                ('body', name), 'int_type', f'Column should be an array of integers ({str(e)})', None
+            )])
+    return columns
+
+def decode_json_batch(body: bytes) -> tuple:
+    """
+    Extract raw columns from a JSON batch without building per-row pydantic objects
+    
+    Accepts row form {"rows": [{...}, ...]} or column form {"age": [...], "sex": [...], ...}.
+    Returns the raw columns and the matching error location builder.
+    """
+    try:
+        payload = json.loads(body)
+    except ValueError as e:
+        raise RequestValidationError([_validation_error(('body',), 'json_invalid', f'JSON decode error: {e}', None)])
+    
+    if not isinstance(payload, dict):
+        raise RequestValidationError([_validation_error(('body',), 'dict_type', 'Input should be a valid dictionary', None)])
+    
+    if 'rows' in payload:
+        rows = payload['rows']
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise RequestValidationError([_validation_error(('body', 'rows'), 'list_type', 'Input should be a valid list of objects', None)])
+        raw_columns = {name: [row.get(name) for row in rows] for name in ('age', 'sex', 'year', 'country')}
+        return raw_columns, lambda row, name: ('body', 'rows', row, name)
+    
+    raw_columns = {}
+    for name in ('age', 'sex', 'year', 'country'):
+        if not isinstance(payload.get(name), list):
+            raise RequestValidationError([_validation_error(('body', name), 'list_type', 'Input should be a valid list', payload.get(name))])
+        raw_columns[name] = payload[name]
+    return raw_columns, lambda row, name: ('body', name, row)
+
+def encode_batch_response(predictions: np.ndarray, age: np.ndarray, valid: np.ndarray,
+                          errors: list, media_type: str, contributions: Optional[np.ndarray] = None) -> Response:
+    """
+    Serialize batch predictions in the negotiated format (invalid rows are NaN / null)
+    
+    contributions, from explain=true, is a (n_rows, len(GROUPS)) matrix added as one
+    column per explainer group.
+    """
+    explainer = feature_index['explainer'] if contributions is not None else None
+    group_columns = {
+        name: contributions[:, GROUPS.index(name)] for name in explainer.group_names
+    } if explainer is not None else {}
+    
+    if media_type == ARROW_CONTENT_TYPE:
+        table = pa.table({
+            'prediction': predictions,
+            **{f'contribution_{name}': column for name, column in group_columns.items()}
+        })
+        if explainer is not None:
+            table = table.replace_schema_metadata({'baseline': repr(explainer.baseline)})
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return Response(content=sink.getvalue().to_pybytes(), media_type=ARROW_CONTENT_TYPE)
+    
+    if media_type in MSGPACK_CONTENT_TYPES:
+        payload = {
+            'prediction': predictions.astype('<f8').tobytes(),
+            'dtype': '<f8',
+            'model_used': model_data['model_name']
+        }
+        if explainer is not None:
+            payload['explanation'] = {
+                'baseline': explainer.baseline,
+                'contributions': {name: column.astype('<f8').tobytes() for name, column in group_columns.items()}
+            }
+        if errors:
+            payload['errors'] = jsonable_encoder(errors)
+        return Response(content=msgpack.packb(payload), media_type=media_type)
+    
+    age_groups = np.array(AGE_GROUPS, dtype=object)[age_groups_encoded(age)]
+    predictions = predictions.astype(object)
+    predictions[~valid] = None
+    age_groups[~valid] = None
+    response = {
+        'predictions': predictions.tolist(),
+        'age_groups': age_groups.tolist(),
+        'model_used': model_data['model_name']
+    }
+    if explainer is not None:
+        contributions = {}
+        for name, column in group_columns.items():
+            column = column.astype(object)
+            column[~valid] = None
+            contributions[name] = column.tolist()
+        response['explanation'] = {'baseline': explainer.baseline, 'contributions': contributions}
+    if errors:
+        response['errors'] = json_safe(errors)
+    return response
 
+def negotiate_media_type(request: Request, content_type: str) -> str:
+    """Pick the response format from the Accept header, defaulting to the request format"""
+    accept = request.headers.get('accept', '')
+    available = {JSON_CONTENT_TYPE: True, ARROW_CONTENT_TYPE: pa is not None}
+    available.update({media_type: msgpack is not None for media_type in MSGPACK_CONTENT_TYPES})
+    
+    for media_range in accept.split(','):
+        media_type = media_range.split(';')[0].strip().lower()
+        if available.get(media_type):
+            return media_type
+    return content_type
 
 @app.get("/")
 async def root():
@@ -238,23 +1106,124 @@ async def root():
         "message": "Hypertension Prediction API",
         "version": "1.0.0",
         "docs": "/docs",
-        "health": "/health"
+        "health": "/health",
+        "liveness": "/health/live",
+        "readiness": "/health/ready"
     }
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
-    return {
-        "status": "healthy" if model_data is not None else "unhealthy",
-        "model_loaded": model_data is not None,
-        "model_name": model_data['model_name'] if model_data else None,
-        "model_features": len(model_data['feature_names']) if model_data else 0,
-        "working_directory": os.getcwd(),
-        "model_file_exists": os.path.exists('hypertension_model.pkl') if model_data else False
+    """Health check endpoint (precomputed at model load and warmup)"""
+    return Response(content=health_body, media_type=JSON_CONTENT_TYPE)
+
+@app.get("/health/live")
+async def liveness_check():
+    """Liveness probe: the process is up and serving requests"""
+    return Response(content=b'{"status":"alive"}', media_type=JSON_CONTENT_TYPE)
+
+@app.get("/health/ready")
+async def readiness_check():
+    """Readiness probe: 200 only once the model is loaded and warmed up, 503 otherwise"""
+    return Response(
+        content=readiness_body,
+        status_code=200 if service_state["ready"] else 503,
+        media_type=JSON_CONTENT_TYPE
+    )
+
+def query_codes(sex: Optional[str], country: str) -> tuple:
+    """Validate sex/country query parameters into codes, with the same 422 format as the body validators"""
+    sex_code = SEX_CODES.get(sex.lower()) if sex is not None else None
+    country_code = COUNTRY_CODES.get(country.casefold())
+    errors = []
+    if sex is not None and sex_code is None:
+        errors.append(_validation_error(('query', 'sex'), 'value_error', f'Value error, {SEX_ERROR}', sex, {'error': {}}))
+    if country_code is None:
+        errors.append(_validation_error(('query', 'country'), 'value_error', f'Value error, {COUNTRY_ERROR}', country, {'error': {}}))
+    if errors:
+        raise RequestValidationError(errors)
+    return sex_code, country_code
+
+def prediction_etag(key: tuple) -> str:
+    """Strong ETag for a (model version, age group, sex, year, country) cache key"""
+    return '"' + hashlib.sha256("|".join(map(str, key)).encode()).hexdigest()[:32] + '"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match comparison (weak comparison, as RFC 9110 requires for this header)"""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in tags or any(tag.removeprefix('W/') == etag for tag in tags)
+
+async def cached_prediction(key: tuple) -> tuple:
+    """
+    (JSON body, prediction) for a (model version, age group, sex, year, country, include_observed)
+    key, from the LRU or from one admitted model call
+    """
+    cached = prediction_cache.get(key)
+    if cached is not None:
+        prediction_cache.move_to_end(key)
+        return cached
+    
+    _, age_code, sex_code, year, country_code, include_observed = key
+    sex_name, country_name = ('Men', 'Women')[sex_code], COUNTRIES[country_code]
+    async with admission.admit():
+        # Any age in the group gives the same prediction; use the group's first year
+        result = await run_inference(
+            make_prediction, age=30 + 5 * age_code, sex=sex_name, year=year, country=country_name
+        )
+    response = {
+        "prediction": result['prediction'],
+        "age_group": result['age_group'],
+        "message": f"Predicted hypertension prevalence for {sex_name.lower()} aged {result['age_group']} in {country_name} ({year}): {result['prediction']:.4f}",
+        "model_used": result['model_used']
     }
+    observed = observed_for(30 + 5 * age_code, sex_name, year, country_name) if include_observed else None
+    if observed is not None:
+        response["observed"] = observed
+    entry = (json.dumps(response).encode(), result['prediction'])
+    prediction_cache[key] = entry
+    if len(prediction_cache) > PREDICTION_CACHE_SIZE:
+        prediction_cache.popitem(last=False)
+    return entry
 
-@app.post("/predict", response_model=PredictionResponse)
-async def predict_hypertension(request: PredictionRequest):
+@app.get("/predict", response_model=PredictionResponse)
+async def predict_hypertension_cached(
+    request: Request,
+    age: int = Query(..., ge=30, le=100, description="Age in years (30-100)"),
+    sex: str = Query(..., description="Sex: 'Men' or 'Women'"),
+    year: int = Query(..., ge=1990, le=2030, description="Year (1990-2030)"),
+    country: str = Query(..., min_length=2, max_length=100, description="Country name"),
+    include_observed: bool = Query(False, description="Attach the observed estimates for the same inputs")
+):
+    """
+    Cacheable prediction lookup with query parameters
+    
+    The response depends only on the model version and the normalized inputs (the age is
+    reduced to its age group), so it carries a strong `ETag` and `Cache-Control`.
+    `If-None-Match` with a current ETag gets `304 Not Modified`, and repeated lookups are
+    served from an in-process LRU without reaching the model.
+    """
+    sex_code, country_code = query_codes(sex, country)
+    
+    await ensure_model_loaded()
+    
+    age_code = int(age_groups_encoded(age))
+    key = (model_version, age_code, sex_code, year, country_code, include_observed)
+    etag = prediction_etag(key)
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={PREDICTION_MAX_AGE}"}
+    if etag_matches(request.headers.get('if-none-match'), etag):
+        return Response(status_code=304, headers=headers)
+    
+    body, prediction = await cached_prediction(key)
+    drift_monitor.observe(country_code, sex_code, age_code, year, prediction)
+    return Response(content=body, media_type=JSON_CONTENT_TYPE, headers=headers)
+
+@app.post("/predict", response_model=PredictionResponse, response_model_exclude_none=True)
+async def predict_hypertension(
+    request: PredictionRequest,
+    include_observed: bool = Query(False, description="Attach the observed estimates for the same inputs"),
+    explain: bool = Query(False, description="Attach the baseline and the year, sex, age group and country contributions")
+):
     """
     Predict hypertension prevalence
     
@@ -262,44 +1231,592 @@ async def predict_hypertension(request: PredictionRequest):
     - **sex**: Sex ('Men' or 'Women')
     - **year**: Year (1990-2030)
     - **country**: Country name (must be a valid African country)
+    
+    With `include_observed=true` the response also carries the observed NCD-RisC
+    estimates for the same country, year, sex and age group, when they exist.
+    
+    With `explain=true` it carries `explanation`: a baseline plus the contribution of
+    each input, which add up to the prediction (linear and tree models only).
     """
-    # Try to load model if not already loaded
-    if model_data is None:
-        print("🔄 Attempting to load model on demand...")
-        if not load_model():
-            raise HTTPException(status_code=500, detail="Model not loaded and could not be loaded")
+    # Load the model if startup could not (single-flight, off the event loop)
+    await ensure_model_loaded()
     
     try:
-        result = make_prediction(
-            age=request.age,
-            sex=request.sex,
-            year=request.year,
-            country=request.country
+        # Predictions run per INFERENCE_MODE, at most MAX_CONCURRENT_PREDICTIONS at a time
+        async with admission.admit():
+            result = await run_inference(
+                make_prediction,
+                age=request.age,
+                sex=request.sex,
+                year=request.year,
+                country=request.country,
+                explain=explain
+            )
+        
+        drift_monitor.observe(
+            COUNTRY_CODES[request.country.casefold()], SEX_CODES[request.sex.lower()],
+            min((request.age - 30) // 5, len(AGE_GROUPS) - 1), request.year, result['prediction']
         )
+        if include_observed:
+            result['observed'] = observed_for(request.age, request.sex, request.year, request.country)
         
         return PredictionResponse(**result)
         
-    except HTTPException:
+    except (HTTPException, Overloaded):
+        raise
+    except Exception as e:
+        logger.exception("Prediction failed")
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+@app.post("/predict/indicators", response_model=IndicatorsResponse)
+async def predict_indicators(request: PredictionRequest):
+    """
+    Predict every hypertension indicator in one model evaluation
+    
+    Returns prevalence and the diagnosed, treated, controlled and untreated stage 2
+    proportions, from the multi-output model at `INDICATORS_MODEL_PATH`.
+    """
+    if indicators_data is None:
+        raise HTTPException(status_code=503, detail="Indicators model not available")
+    
+    try:
+        async with admission.admit():
+            result = await run_inference(
+                make_indicator_prediction,
+                age=request.age,
+                sex=request.sex,
+                year=request.year,
+                country=request.country
+            )
+        return IndicatorsResponse(**result)
+        
+    except (HTTPException, Overloaded):
+        raise
+    except Exception as e:
+        logger.exception("Prediction failed")
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+@app.post("/predict/aggregate", response_model=AggregateResponse)
+async def predict_aggregate(request: AggregateRequest):
+    """
+    Combined prevalence for a region, e.g. West Africa, women 50+, 2025
+    
+    The region and filters expand to one row per (country, sex, age group), scored in a
+    single model call and averaged with the optional country weights (e.g. population)
+    and age group weights. Results are memoized per model version, region and filters;
+    ages are reduced to their age groups, so min_age=50 and min_age=52 share an entry.
+    """
+    await ensure_model_loaded()
+    
+    codes = request.age_codes()
+    key = (
+        model_version, request.region, request.sex, int(codes[0]), int(codes[-1]), request.year,
+        tuple(sorted(request.country_weights.items())) if request.country_weights else None,
+        tuple(sorted(request.age_weights.items())) if request.age_weights else None
+    )
+    result = aggregate_cache.get(key)
+    if result is not None:
+        aggregate_cache.move_to_end(key)
+        return result
+    
+    try:
+        async with admission.admit():
+            result = await run_inference(aggregate_prediction, request)
+    except (HTTPException, Overloaded):
+        raise
+    except Exception as e:
+        logger.exception("Aggregate prediction failed")
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+    
+    aggregate_cache[key] = result
+    if len(aggregate_cache) > AGGREGATE_CACHE_SIZE:
+        aggregate_cache.popitem(last=False)
+    return result
+
+@app.post(
+    "/predict/batch",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                JSON_CONTENT_TYPE: {"schema": BatchPredictionRequest.model_json_schema(ref_template="#/components/schemas/{model}")},
+                ARROW_CONTENT_TYPE: {"schema": {"type": "string", "format": "binary"}},
+                MSGPACK_CONTENT_TYPES[0]: {"schema": {"type": "string", "format": "binary"}}
+            }
+        }
+    }
+)
+async def predict_batch(
+    request: Request,
+    on_error: str = Query("reject", pattern="^(reject|skip)$", description="'reject' the batch on any invalid row, or 'skip' invalid rows"),
+    explain: bool = Query(False, description="Attach per-row year, sex, age group and country contributions")
+):
+    """
+    Predict hypertension prevalence for many rows in one request
+    
+    - **application/json**: `{"rows": [{"age", "sex", "year", "country"}, ...]}` or
+      columns `{"age": [...], "sex": [...], "year": [...], "country": [...]}`
+    - **application/vnd.apache.arrow.stream** or **application/msgpack**: columns
+      `age`, `sex` (0=Men, 1=Women), `year` and `country` (index into `/countries`)
+    
+    The whole batch is validated column-wise. With `on_error=skip`, invalid rows get a
+    null/NaN prediction and the response lists their errors instead of failing with 422.
+    
+    The response format follows the `Accept` header and defaults to the request format.
+    Binary responses carry a single float64 `prediction` column.
+    
+    With `explain=true` the response adds a baseline and one contribution column per
+    input (Arrow: `contribution_*` columns and `baseline` schema metadata).
+    """
+    await ensure_model_loaded()
+    if explain:
+        require_explainer()
+    
+    content_type = request.headers.get('content-type', JSON_CONTENT_TYPE).split(';')[0].strip().lower()
+    body = await request.body()
+    
+    if content_type == JSON_CONTENT_TYPE:
+        raw_columns, loc = decode_json_batch(body)
+    elif content_type == ARROW_CONTENT_TYPE or content_type in MSGPACK_CONTENT_TYPES:
+        raw_columns = decode_columnar_payload(body, content_type)
+        loc = lambda row, name: ('body', name, row)
+    else:
+        raise HTTPException(status_code=415, detail=f"Unsupported content type: {content_type}")
+    
+    lengths = {len(column) for column in raw_columns.values()}
+    if len(lengths) != 1:
+        raise HTTPException(status_code=422, detail="All columns must have the same length")
+    if lengths == {0}:
+        raise HTTPException(status_code=422, detail="Batch must contain at least one row")
+    
+    columns, valid, errors = validate_columns(raw_columns, loc)
+    if errors and on_error == "reject":
+        raise RequestValidationError(errors)
+    
+    try:
+        predictions = np.full(len(valid), np.nan)
+        contributions = np.full((len(valid), len(GROUPS)), np.nan) if explain else None
+        if valid.any():
+            valid_columns = (columns['age'][valid], columns['sex'][valid], columns['year'][valid], columns['country'][valid])
+            async with admission.admit():
+                if explain:
+                    predictions[valid], contributions[valid] = await run_inference(explain_columns, *valid_columns)
+                else:
+                    predictions[valid] = await run_inference(predict_columns, *valid_columns)
+            drift_monitor.observe_batch(
+                columns['country'][valid], columns['sex'][valid], age_groups_encoded(columns['age'][valid]),
+                columns['year'][valid], predictions[valid]
+            )
+    except (HTTPException, Overloaded):
         raise
     except Exception as e:
+        logger.exception("Prediction failed")
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+    
+    return encode_batch_response(
+        predictions, columns['age'], valid, errors, negotiate_media_type(request, content_type), contributions
+    )
+
+CSV_COLUMNS = ('age', 'sex', 'year', 'country')
+
+def score_csv_block(block: bytes, include_header: bool) -> tuple:
+    """
+    Score one header-prefixed CSV block from CsvChunker
+    
+    Every input column is echoed unchanged, followed by prediction, age_group and error
+    (empty unless the row is invalid). A row with more or fewer fields than the header is
+    an invalid row; one trailing comma is allowed. Returns the scored CSV bytes plus the
+    validated columns, the valid-row mask and the predictions for drift monitoring.
+    """
+    counts = field_counts(block)
+    # Read ragged rows without shifting them: no index column, room for the widest row
+    frame = pd.read_csv(io.BytesIO(block), header=None, names=range(counts.max()), index_col=False,
+                        dtype=str, keep_default_na=False, skipinitialspace=True)
+    if len(frame) != len(counts):
+        raise ValueError("CSV rows could not be split into fields")
+    n_fields, counts = counts[0], counts[1:]
+    extra = frame.iloc[1:, n_fields].to_numpy() if frame.shape[1] > n_fields else np.full(len(counts), '')
+    ragged = (counts != n_fields) & ~((counts == n_fields + 1) & (extra == ''))  # a trailing comma is fine
+    header = frame.iloc[0, :n_fields].tolist()
+    frame = frame.iloc[1:, :n_fields].reset_index(drop=True)
+    frame.columns = header
+    
+    positions = {str(column).strip().lower(): i for i, column in enumerate(header)}
+    missing = [name for name in CSV_COLUMNS if name not in positions]
+    if missing:
+        raise HTTPException(status_code=422, detail=f"CSV is missing the columns: {', '.join(missing)}")
+    
+    raw_columns = {name: frame.iloc[:, positions[name]].str.strip().to_numpy(dtype=object) for name in CSV_COLUMNS}
+    columns, valid, errors = validate_columns(raw_columns, lambda row, name: (row, name))
+    valid &= ~ragged
+    
+    predictions = np.full(len(frame), np.nan)
+    if valid.any():
+        predictions[valid] = predict_columns(
+            columns['age'][valid], columns['sex'][valid], columns['year'][valid], columns['country'][valid]
+        )
+    row_errors = np.where(valid, '', 'invalid row').astype(object)
+    for error in reversed(errors):  # the first error of a row wins
+        row, name = error['loc']
+        row_errors[row] = f"{name}: {error['msg']}"
+    for row in np.flatnonzero(ragged):
+        row_errors[row] = f"row has {counts[row]} fields, the header has {n_fields}"
+    
+    age_groups = np.array(AGE_GROUPS, dtype=object)[age_groups_encoded(columns['age'])]
+    age_groups[~valid] = ''
+    frame['prediction'] = predictions
+    frame['age_group'] = age_groups
+    frame['error'] = row_errors
+    scored = frame.to_csv(index=False, header=include_header, lineterminator='\n').encode()
+    return scored, columns, valid, predictions
+
+def iter_spooled(file, block_size: int = 64 * 1024):
+    """Read a spooled file back in blocks, then close it"""
+    try:
+        while block := file.read(block_size):
+            yield block
+    finally:
+        file.close()
+
+@app.post(
+    "/predict/csv",
+    response_class=StreamingResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                MULTIPART_CONTENT_TYPE: {"schema": {"type": "object", "properties": {"file": {"type": "string", "format": "binary"}}}},
+                "text/csv": {"schema": {"type": "string"}}
+            }
+        }
+    }
+)
+async def predict_csv(request: Request):
+    """
+    Score an uploaded CSV of any size with constant memory
+    
+    Send the CSV as the `file` field of multipart/form-data, or as a text/csv body. It
+    needs `age`, `sex`, `year` and `country` columns (case-insensitive); other columns
+    are echoed back. The body is parsed as it arrives, in blocks of CSV_CHUNK_BYTES, and
+    every block is validated, encoded and scored in one model call. The scored CSV
+    adds `prediction`, `age_group` and `error` columns. Invalid rows keep an empty
+    prediction and give the reason in `error`.
+    
+    The scored output is buffered (in memory up to CSV_SPOOL_BYTES, then on disk) and
+    streamed back once the upload is read, so clients that send the whole body before
+    reading the response cannot deadlock. `X-Rows`, `X-Invalid-Rows` and
+    `X-Rows-Per-Second` report the throughput.
+    """
+    await ensure_model_loaded()
+    
+    content_type = request.headers.get('content-type', '')
+    media_type = content_type.split(';')[0].strip().lower()
+    if media_type not in CSV_CONTENT_TYPES and media_type != MULTIPART_CONTENT_TYPE:
+        raise HTTPException(status_code=415, detail=f"Unsupported content type: {media_type or 'none'}")
+    
+    output = tempfile.SpooledTemporaryFile(max_size=CSV_SPOOL_BYTES)
+    chunker = CsvChunker(CSV_CHUNK_BYTES)
+    n_rows = n_invalid = 0
+    start_time = time.perf_counter()
+    
+    async def score(block):
+        nonlocal n_rows, n_invalid
+        async with admission.admit():
+            scored, columns, valid, predictions = await run_inference(score_csv_block, block, output.tell() == 0)
+        output.write(scored)
+        n_rows += len(valid)
+        n_invalid += int((~valid).sum())
+        if valid.any():
+            drift_monitor.observe_batch(
+                columns['country'][valid], columns['sex'][valid], age_groups_encoded(columns['age'][valid]),
+                columns['year'][valid], predictions[valid]
+            )
+    
+    try:
+        async for data in iter_csv_bytes(request.stream(), content_type):
+            for block in chunker.feed(data):
+                await score(block)
+        for block in chunker.finish():
+            await score(block)
+        if output.tell() == 0 and chunker.header is not None:
+            await score(chunker.header)  # header only: still check the columns and answer with the scored header
+    except (HTTPException, Overloaded):
+        output.close()
+        raise
+    except (ValueError, pd.errors.ParserError) as e:
+        output.close()
+        raise HTTPException(status_code=400, detail=f"Could not parse the upload: {str(e)}")
+    
+    if chunker.header is None:
+        output.close()
+        raise HTTPException(status_code=422, detail="CSV upload is empty")
+    
+    elapsed = time.perf_counter() - start_time
+    rows_per_second = n_rows / elapsed if elapsed > 0 else 0.0
+    logger.info("CSV scored", extra={'rows': n_rows, 'invalid_rows': n_invalid, 'rows_per_second': round(rows_per_second)})
+    output.seek(0)
+    return StreamingResponse(iter_spooled(output), media_type="text/csv", headers={
+        "X-Rows": str(n_rows),
+        "X-Invalid-Rows": str(n_invalid),
+        "X-Rows-Per-Second": f"{rows_per_second:.0f}"
+    })
+
+class StreamQueue:
+    """
+    Reply slots of one /ws/predict connection, in message order
+    
+    Requests beyond max_pending are coalesced: the oldest waiting request becomes a skipped
+    slot, merged with a skipped slot just before it (up to MAX_SKIPPED ids), so every
+    message still gets a reply in order. Errors and skipped runs take slots too; at
+    max_slots put() waits for the sender, so the connection stops reading and TCP slows
+    the client down. Every put() and get() is O(1).
+    """
+    MAX_SKIPPED = 256
+    
+    def __init__(self, max_pending: int, max_slots: int):
+        self.max_pending = max_pending
+        self.max_slots = max_slots
+        self._slots = deque()  # [sequence, entry]; entry None once merged into the skipped slot before it
+        self._waiting = deque()  # slots still holding a request, oldest first
+        self._last_skipped = None
+        self._size = 0
+        self._sequence = 0
+        self._ready = asyncio.Event()
+        self._not_full = asyncio.Event()
+        self._not_full.set()
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    def __iter__(self):
+        return (entry for _, entry in self._slots if entry is not None)
+    
+    async def put(self, entry: dict):
+        """Queue the reply slot of one message ({'id', 'request'} or a reply), waiting while full"""
+        while self._size >= self.max_slots:
+            self._not_full.clear()
+            await self._not_full.wait()
+        slot = [self._sequence, entry]
+        self._sequence += 1
+        self._slots.append(slot)
+        self._size += 1
+        if 'request' in entry:
+            self._waiting.append(slot)
+            if len(self._waiting) > self.max_pending:
+                self._skip(self._waiting.popleft())
+        self._ready.set()
+    
+    def _skip(self, slot: list):
+        sequence, entry = slot
+        previous = self._last_skipped
+        if previous is not None and previous[0] == sequence - 1 and len(previous[1]['skipped']) < self.MAX_SKIPPED:
+            previous[1]['skipped'].append(entry['id'])
+            previous[0] = sequence  # the merged run now ends here
+            slot[1] = None
+            self._size -= 1
+        else:
+            slot[1] = {'skipped': [entry['id']]}
+            self._last_skipped = slot
+    
+    async def get(self) -> dict:
+        """The oldest slot: a request to predict or a reply to send as is"""
+        while True:
+            while not self._slots:
+                self._ready.clear()
+                await self._ready.wait()
+            slot = self._slots.popleft()
+            if slot is self._last_skipped:
+                self._last_skipped = None  # sent: nothing may be merged into it any more
+            if self._waiting and self._waiting[0] is slot:
+                self._waiting.popleft()
+            if slot[1] is not None:
+                self._size -= 1
+                self._not_full.set()
+                return slot[1]
+
+async def stream_prediction(request: PredictionRequest) -> dict:
+    """Prediction fields for one streamed request, through the shared GET /predict cache"""
+    sex_code, country_code = SEX_CODES[request.sex.lower()], COUNTRY_CODES[request.country.casefold()]
+    age_code = int(age_groups_encoded(request.age))
+    _, prediction = await cached_prediction((model_version, age_code, sex_code, request.year, country_code, False))
+    drift_monitor.observe(country_code, sex_code, age_code, request.year, prediction)
+    return {'prediction': prediction, 'age_group': AGE_GROUPS[age_code], 'model_used': model_data['model_name']}
+
+@app.websocket("/ws/predict")
+async def predict_stream(websocket: WebSocket):
+    """
+    Stream predictions over one long-lived connection
+    
+    Each text message is a JSON object like the POST /predict body plus an optional `id`.
+    Every message gets exactly one reply, in order:
+    - a prediction: `id` plus only the fields (`prediction`, `age_group`, `model_used`)
+      that changed since the previous prediction on this connection; repeated inputs
+      reply with just the `id`
+    - `{"id", "error"}` for invalid input, a shed request or a failed prediction
+    - `{"skipped": [ids]}` for requests superseded by newer ones while the server was
+      busy (at most WS_MAX_PENDING requests wait per connection)
+    
+    At most WS_MAX_QUEUE replies wait per connection; beyond that, messages are not read
+    until the server catches up.
+    """
+    await websocket.accept()
+    try:
+        await ensure_model_loaded()
+    except HTTPException as e:
+        await websocket.close(code=1013, reason=str(e.detail))  # try again later
+        return
+    
+    queue = StreamQueue(WS_MAX_PENDING, WS_MAX_QUEUE)
+    
+    async def send_replies():
+        last_sent = {}
+        while True:
+            entry = await queue.get()
+            if 'request' in entry:
+                try:
+                    result = await stream_prediction(entry['request'])
+                except Overloaded as e:
+                    reply = {'id': entry['id'], 'error': e.reason, 'retry_after': e.retry_after}
+                except HTTPException as e:
+                    reply = {'id': entry['id'], 'error': e.detail}
+                except Exception as e:
+                    # One failed prediction must not end the replies of the whole connection
+                    logger.exception("Prediction failed")
+                    reply = {'id': entry['id'], 'error': f"Internal server error: {str(e)}"}
+                else:
+                    reply = {'id': entry['id'], **{k: v for k, v in result.items() if last_sent.get(k) != v}}
+                    last_sent.update(result)
+            else:
+                reply = entry
+            await websocket.send_text(json.dumps(reply))
+    
+    sender = asyncio.create_task(send_replies())
+    try:
+        while True:
+            message = await websocket.receive()
+            if message['type'] == 'websocket.disconnect':
+                break
+            try:
+                if message.get('text') is None:
+                    raise ValueError("Binary frames are not supported; send JSON text messages")
+                data = json.loads(message['text'])
+                if not isinstance(data, dict):
+                    raise ValueError("Message must be a JSON object")
+                message_id = data.pop('id', None)
+            except ValueError as e:
+                await queue.put({'id': None, 'error': str(e)})
+            else:
+                try:
+                    await queue.put({'id': message_id, 'request': PredictionRequest.model_validate(data)})
+                except ValidationError as e:
+                    await queue.put({'id': message_id, 'error': e.errors(include_url=False, include_context=False)})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sender.cancel()
 
 @app.get("/countries")
 async def get_countries():
     """Get list of valid countries"""
-    countries = [
-        "Algeria", "Angola", "Benin", "Botswana", "Burkina Faso", "Burundi",
-        "Cabo Verde", "Cameroon", "Central African Republic", "Chad", "Comoros",
-        "Democratic Republic of the Congo", "Republic of the Congo", "Côte d'Ivoire",
-        "Djibouti", "Egypt", "Equatorial Guinea", "Eritrea", "Eswatini", "Ethiopia",
-        "Gabon", "Gambia", "Ghana", "Guinea", "Guinea-Bissau", "Kenya", "Lesotho",
-        "Liberia", "Libya", "Madagascar", "Malawi", "Mali", "Mauritania", "Mauritius",
-        "Morocco", "Mozambique", "Namibia", "Niger", "Nigeria", "Rwanda",
-        "Sao Tome and Principe", "Senegal", "Seychelles", "Sierra Leone", "Somalia",
-        "South Africa", "South Sudan", "Sudan", "Tanzania", "Togo", "Tunisia",
-        "Uganda", "Zambia", "Zimbabwe"
-    ]
-    return {"countries": countries}
+    return {"countries": COUNTRIES}
+
+@app.get("/regions")
+async def get_regions():
+    """Regions accepted by POST /predict/aggregate and their countries"""
+    return {"regions": REGIONS}
+
+@app.get("/observations")
+async def get_observation(
+    age: int = Query(..., ge=30, le=100, description="Age in years; matched by age group"),
+    sex: str = Query(..., description="Sex: 'Men' or 'Women'"),
+    year: int = Query(..., description="Survey year"),
+    country: str = Query(..., min_length=2, max_length=100, description="Country name")
+):
+    """Observed NCD-RisC estimates for one country, year, sex and age group (404 if not observed)"""
+    sex_code, country_code = query_codes(sex, country)
+    if observation_store is None:
+        raise HTTPException(status_code=503, detail="Observation store not loaded")
+    
+    observed = observation_store.lookup(country_code, year, sex_code, int(age_groups_encoded(age)))
+    if observed is None:
+        raise HTTPException(status_code=404, detail="No observation for these inputs")
+    return observed
+
+@app.get("/observations/series")
+async def get_observation_series(
+    country: str = Query(..., min_length=2, max_length=100, description="Country name"),
+    sex: Optional[str] = Query(None, description="Only this sex ('Men' or 'Women')"),
+    age: Optional[int] = Query(None, ge=30, le=100, description="Only the age group of this age")
+):
+    """A country's observed estimates over time as columns, ordered by sex, age group and year"""
+    sex_code, country_code = query_codes(sex, country)
+    if observation_store is None:
+        raise HTTPException(status_code=503, detail="Observation store not loaded")
+    
+    age_code = int(age_groups_encoded(age)) if age is not None else None
+    return observation_store.series(country_code, sex_code, age_code)
+
+@app.get("/monitoring/drift")
+async def monitoring_drift():
+    """
+    Drift of production inputs and predictions against the training distribution
+    
+    PSI and total variation per input (country, sex, age group, year) and for the
+    prediction histogram, with the largest share shifts and approximate quantiles.
+    """
+    source, reference = drift_reference()
+    if reference is None:
+        raise HTTPException(status_code=503, detail="No reference distribution: the artifact has none and observations are not loaded")
+    return {"reference": source, **drift_monitor.report(reference, COUNTRIES, ['Men', 'Women'], AGE_GROUPS)}
+
+@app.get("/metrics/admission")
+async def admission_metrics():
+    """Concurrency limit, queue depth and shed counts of the prediction endpoints"""
+    return admission.metrics()
+
+# Only one profile at a time per worker
+profile_lock = asyncio.Lock()
+
+@app.get("/debug/profile", include_in_schema=False)
+async def debug_profile(
+    request: Request,
+    seconds: float = Query(5.0, gt=0, le=60, description="How long to sample"),
+    interval_ms: float = Query(5.0, ge=1, le=100, description="Sampling interval in milliseconds"),
+    format: str = Query("collapsed", pattern="^(collapsed|speedscope)$")
+):
+    """
+    Sample the stacks of this worker for `seconds` and return the profile
+    
+    Disabled (404) unless PROFILER_TOKEN is set; the token must be sent in the
+    `X-Profiler-Token` header. Requests keep being served while sampling.
+    """
+    if not PROFILER_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    # Compare bytes: compare_digest rejects str with non-ASCII characters
+    if not hmac.compare_digest(request.headers.get('x-profiler-token', '').encode(), PROFILER_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid profiler token")
+    if profile_lock.locked():
+        raise HTTPException(status_code=409, detail="A profile is already being taken")
+    
+    async with profile_lock:
+        profiler = SamplingProfiler(interval=interval_ms / 1000)
+        profiler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profiler.stop()
+    
+    headers = {
+        "X-Profile-Samples": str(profiler.sample_count),
+        "X-Profile-Seconds": f"{profiler.duration:.3f}"
+    }
+    if format == "speedscope":
+        return Response(
+            content=json.dumps(profiler.speedscope(f"worker {os.getpid()}")),
+            media_type=JSON_CONTENT_TYPE,
+            headers=headers
+        )
+    return Response(content=profiler.collapsed(), media_type="text/plain", headers=headers)
 
 if __name__ == "__main__":
     import uvicorn
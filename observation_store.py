@@ -0,0 +1,112 @@
+"""
+Read-only store of the observed NCD-RisC estimates behind the model
+
+Built once at startup from africa.csv. Every field is a numpy column and the rows are
+sorted by (country, sex, age group, year), so:
+
+- an exact (country, year, sex, age group) lookup is a single read of a dense index array
+- a country's time series, optionally for one sex and/or age group, is one or two
+  contiguous slices found through precomputed start/end offsets
+
+Requests never filter a DataFrame.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Response field -> africa.csv column
+OBSERVED_COLUMNS = {
+    'prevalence': 'Prevalence of hypertension',
+    'prevalence_lower': 'Prevalence of hypertension lower 95% uncertainty interval',
+    'prevalence_upper': 'Prevalence of hypertension upper 95% uncertainty interval',
+    'diagnosed': 'Proportion of diagnosed hypertension among all hypertension',
+    'treated': 'Proportion of treated hypertension among all hypertension',
+    'controlled': 'Proportion of controlled hypertension among all hypertension'
+}
+
+SEXES = ('Men', 'Women')
+
+class ObservationStore:
+    """Columnar observations with a composite (country, year, sex, age group) index"""
+
+    def __init__(self, frame: pd.DataFrame, countries: list, age_groups: list):
+        self.countries = countries
+        self.age_groups = age_groups
+        country_codes = {country: i for i, country in enumerate(countries)}
+        age_codes = {age: i for i, age in enumerate(age_groups)}
+
+        country = frame['Country'].map(country_codes)
+        sex = frame['Sex'].map({sex: i for i, sex in enumerate(SEXES)})
+        age = frame['Age'].map(age_codes)
+        keep = (country.notna() & sex.notna() & age.notna()).to_numpy()
+
+        columns = {
+            'country': country.to_numpy()[keep].astype(np.int16),
+            'sex': sex.to_numpy()[keep].astype(np.int8),
+            'age': age.to_numpy()[keep].astype(np.int8),
+            'year': frame['Year'].to_numpy()[keep].astype(np.int16)
+        }
+        for field, column in OBSERVED_COLUMNS.items():
+            columns[field] = frame[column].to_numpy(dtype=np.float64)[keep]
+
+        # Sort by (country, sex, age, year) so every series is contiguous
+        order = np.lexsort((columns['year'], columns['age'], columns['sex'], columns['country']))
+        self.columns = {name: values[order] for name, values in columns.items()}
+        self.n_rows = len(order)
+
+        self.first_year = int(self.columns['year'].min()) if self.n_rows else 0
+        n_years = int(self.columns['year'].max()) - self.first_year + 1 if self.n_rows else 0
+        shape = (len(countries), 2, len(age_groups))
+
+        # Dense exact-match index: (country, year, sex, age) -> row, -1 if not observed
+        self.index = np.full((len(countries), n_years, 2, len(age_groups)), -1, dtype=np.int32)
+        self.index[
+            self.columns['country'], self.columns['year'] - self.first_year, self.columns['sex'], self.columns['age']
+        ] = np.arange(self.n_rows, dtype=np.int32)
+
+        # Series offsets: rows of (country, sex, age) are [series_start, series_end)
+        series_key = np.ravel_multi_index((self.columns['country'], self.columns['sex'], self.columns['age']), shape)
+        boundaries = np.searchsorted(series_key, np.arange(np.prod(shape) + 1))
+        self.series_start = boundaries[:-1].reshape(shape)
+        self.series_end = boundaries[1:].reshape(shape)
+
+    @classmethod
+    def from_csv(cls, path: str, countries: list, age_groups: list) -> "ObservationStore":
+        usecols = ['Country', 'Sex', 'Year', 'Age', *OBSERVED_COLUMNS.values()]
+        return cls(pd.read_csv(path, usecols=usecols), countries, age_groups)
+
+    def _row(self, row: int) -> dict:
+        return {
+            'country': self.countries[self.columns['country'][row]],
+            'year': int(self.columns['year'][row]),
+            'sex': SEXES[self.columns['sex'][row]],
+            'age_group': self.age_groups[self.columns['age'][row]],
+            **{field: float(self.columns[field][row]) for field in OBSERVED_COLUMNS}
+        }
+
+    def lookup(self, country: int, year: int, sex: int, age: int) -> "dict | None":
+        """Exact match in O(1); country/sex/age are codes, None if not observed"""
+        year_offset = year - self.first_year
+        if not 0 <= year_offset < self.index.shape[1]:
+            return None
+        row = self.index[country, year_offset, sex, age]
+        return self._row(row) if row >= 0 else None
+
+    def series(self, country: int, sex: "int | None" = None, age: "int | None" = None) -> dict:
+        """All observations of a country (optionally one sex and/or age group) as columns, O(k)"""
+        sexes = range(2) if sex is None else [sex]
+        if age is None:
+            # Every age group of a sex is contiguous
+            slices = [(self.series_start[country, s, 0], self.series_end[country, s, -1]) for s in sexes]
+        else:
+            slices = [(self.series_start[country, s, age], self.series_end[country, s, age]) for s in sexes]
+        rows = np.concatenate([np.arange(start, end) for start, end in slices])
+
+        return {
+            'country': self.countries[country],
+            'count': int(len(rows)),
+            'year': self.columns['year'][rows].tolist(),
+            'sex': [SEXES[code] for code in self.columns['sex'][rows]],
+            'age_group': [self.age_groups[code] for code in self.columns['age'][rows]],
+            **{field: self.columns[field][rows].tolist() for field in OBSERVED_COLUMNS}
+        }
@@ -0,0 +1,182 @@
+"""
+Non-blocking JSON logging for the API, with rate limits, sampling and correlation IDs
+
+Callers never format or write a record. The QueueHandler attached to the API logger runs
+its filters and enqueues the raw record (bounded, dropping when full). A QueueListener
+thread formats it as one JSON line and writes it to stdout. So a slow or blocked stdout
+costs the request path nothing, and a flood of records costs one filter check each.
+
+Filters, applied in the calling thread before anything is queued:
+- CorrelationFilter stamps the current request's correlation ID (set by
+  CorrelationIdMiddleware from X-Request-ID, or generated) onto the record
+- RateLimitFilter lets at most `burst` records per message template through per
+  `interval` seconds. The first record after a suppressed stretch carries `suppressed`,
+  the number of records dropped. Warnings and errors are never rate limited: during an
+  incident they are the records that matter.
+- records logged with extra={'sample': True} (the per-request access log) are kept with
+  probability `sample_rate`. Warnings and errors are never sampled.
+
+Records are formatted later, on the listener thread, so log arguments must not be
+mutated after the call.
+"""
+
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import time
+
+# Correlation ID of the request being handled, None outside requests
+correlation_id = contextvars.ContextVar('correlation_id', default=None)
+
+# LogRecord attributes that are not user fields passed with extra=
+RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'sample', 'correlation_id', 'taskName'}
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message, correlation ID and extra fields"""
+
+    def format(self, record) -> str:
+        entry = {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created)) + f'.{int(record.msecs):03d}Z',
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        if getattr(record, 'correlation_id', None):
+            entry['correlation_id'] = record.correlation_id
+        entry.update({key: value for key, value in vars(record).items() if key not in RECORD_ATTRIBUTES})
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class CorrelationFilter(logging.Filter):
+    """Copy the request's correlation ID onto the record while still in the request's context"""
+
+    def filter(self, record) -> bool:
+        record.correlation_id = correlation_id.get()
+        return True
+
+class RateLimitFilter(logging.Filter):
+    """Per-template token bucket for info and debug records: `burst` per `interval` seconds, then count the rest"""
+
+    def __init__(self, burst: int = 20, interval: float = 1.0, sample_rate: float = 1.0):
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+        self.sample_rate = sample_rate
+        self._windows = {}  # (logger, level, template) -> [window start, passed, suppressed]
+        self._lock = threading.Lock()
+
+    def filter(self, record) -> bool:
+        if getattr(record, 'sample', False) and record.levelno < logging.WARNING and random.random() >= self.sample_rate:
+            return False
+        if record.levelno >= logging.WARNING:
+            return True
+
+        key = (record.name, record.levelno, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                suppressed = window[2] if window is not None else 0
+                window = self._windows[key] = [now, 0, 0]
+                if suppressed:
+                    record.suppressed = suppressed
+            if window[1] >= self.burst:
+                window[2] += 1
+                return False
+            window[1] += 1
+        return True
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that enqueues the raw record and drops it if the queue is full"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Formatting happens on the listener thread
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+def configure_logging(name: str, level=None, burst=None, sample_rate=None, queue_size=None, stream=None):
+    """
+    Attach the queue-backed JSON pipeline to logger `name`; returns (logger, listener)
+
+    Settings default to the LOG_LEVEL, LOG_RATE_LIMIT (records per template per second),
+    LOG_SAMPLE_RATE and LOG_QUEUE_SIZE environment variables. Start the listener to
+    begin writing; queued records wait until it runs.
+    """
+    level = level or os.environ.get('LOG_LEVEL', 'INFO')
+    burst = burst if burst is not None else int(os.environ.get('LOG_RATE_LIMIT', 20))
+    sample_rate = sample_rate if sample_rate is not None else float(os.environ.get('LOG_SAMPLE_RATE', 1.0))
+    queue_size = queue_size or int(os.environ.get('LOG_QUEUE_SIZE', 10000))
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JsonFormatter())
+    log_queue = queue.Queue(maxsize=queue_size)
+    handler = NonBlockingQueueHandler(log_queue)
+    handler.addFilter(CorrelationFilter())
+    handler.addFilter(RateLimitFilter(burst=burst, sample_rate=sample_rate))
+
+    logger = logging.getLogger(name)
+    logger.handlers[:] = [handler]
+    logger.setLevel(level)
+    logger.propagate = False
+    return logger, logging.handlers.QueueListener(log_queue, output)
+
+class CorrelationIdMiddleware:
+    """
+    ASGI middleware: one correlation ID per request, echoed in X-Request-ID, plus an access log
+
+    Incoming X-Request-ID headers are reused (truncated to 64 characters), otherwise a
+    random ID is generated. The access log record ('request') is sampled; responses with
+    status 500 or above are logged as errors and never sampled.
+    """
+
+    header = b'x-request-id'
+
+    def __init__(self, app, logger):
+        self.app = app
+        self.logger = logger
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] not in ('http', 'websocket'):
+            return await self.app(scope, receive, send)
+
+        request_id = next((value.decode('latin-1')[:64] for key, value in scope['headers'] if key == self.header), None)
+        token = correlation_id.set(request_id or os.urandom(8).hex())
+        start_time = time.perf_counter()
+        status = None
+
+        async def send_with_id(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                message['headers'] = [*message.get('headers', []), (self.header, correlation_id.get().encode('latin-1'))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            if scope['type'] == 'http':
+                level = logging.ERROR if status is None or status >= 500 else logging.INFO
+                self.logger.log(level, 'request', extra={
+                    'sample': True,
+                    'method': scope['method'],
+                    'path': scope['path'],
+                    'status': status,
+                    'duration_ms': round((time.perf_counter() - start_time) * 1000, 3)
+                })
+            correlation_id.reset(token)
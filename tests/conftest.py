@@ -0,0 +1,73 @@
+"""
+Shared fixtures: a small model artifact trained on africa.csv in the same
+format the API loads from hypertension_model.pkl
+"""
+
+import os
+import pickle
+import sys
+
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.preprocessing import StandardScaler
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SUMMATIVE_DIR = os.path.join(REPO_ROOT, 'linear_regression_model', 'summative')
+DATA_PATH = os.path.join(SUMMATIVE_DIR, 'multivariate_regression', 'africa.csv')
+
+for path in (REPO_ROOT, os.path.join(SUMMATIVE_DIR, 'API'), os.path.join(SUMMATIVE_DIR, 'multivariate_regression')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+AGE_ORDER = ['30-34', '35-39', '40-44', '45-49', '50-54', '55-59', '60-64', '65-69', '70-74', '75-79', '80+']
+
+
+def build_model_data():
+    """Train a small Random Forest on africa.csv and package it like the notebook does"""
+    data = pd.read_csv(DATA_PATH)[['Country', 'Sex', 'Year', 'Age', 'Prevalence of hypertension']]
+    sex_map = {'male': 0, 'female': 1, 'Men': 0, 'Women': 1}
+    age_map = {age: i for i, age in enumerate(AGE_ORDER)}
+    data['Sex_binary'] = data['Sex'].map(sex_map)
+    data['Age_encoded'] = data['Age'].map(age_map)
+    data = pd.get_dummies(data, columns=['Country'], drop_first=True).drop(columns=['Sex', 'Age'])
+
+    X = data.drop(columns=['Prevalence of hypertension'])
+    y = data['Prevalence of hypertension'].values
+    scaler = StandardScaler()
+    model = RandomForestRegressor(n_estimators=10, max_depth=8, random_state=42)
+    model.fit(scaler.fit_transform(X), y)
+
+    return {
+        'model': model,
+        'scaler': scaler,
+        'feature_names': X.columns.tolist(),
+        'model_name': 'Random Forest',
+        'r2_score': model.score(scaler.transform(X), y),
+        'age_mapping': age_map,
+        'sex_mapping': sex_map
+    }
+
+
+@pytest.fixture(scope='session')
+def model_data():
+    return build_model_data()
+
+
+@pytest.fixture(scope='session')
+def model_path(model_data, tmp_path_factory):
+    path = tmp_path_factory.mktemp('model') / 'hypertension_model.pkl'
+    with open(path, 'wb') as file:
+        pickle.dump(model_data, file)
+    return str(path)
+
+
+@pytest.fixture
+def client(model_path, monkeypatch):
+    """TestClient for main.app with the fixture model as MODEL_PATH"""
+    from fastapi.testclient import TestClient
+    import main
+
+    monkeypatch.setattr(main, 'MODEL_PATH', model_path)
+    with TestClient(main.app) as test_client:
+        yield test_client
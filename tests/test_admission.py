@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Test admission control and load shedding on the prediction endpoints
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import main
+from admission_control import AdmissionController, Overloaded
+
+PAYLOAD = {'age': 45, 'sex': 'Women', 'year': 2020, 'country': 'Kenya'}
+
+
+def test_queue_full_and_deadline_are_shed():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=1, max_queue=1, queue_timeout=0.05)
+        release = asyncio.Event()
+
+        async def hold():
+            async with controller.admit():
+                await release.wait()
+
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        assert controller.queued == 1
+
+        with pytest.raises(Overloaded) as shed:
+            async with controller.admit():
+                pass
+        assert shed.value.retry_after >= 1
+
+        with pytest.raises(Overloaded):
+            await waiter  # waited longer than queue_timeout
+        release.set()
+        await holder
+        return controller.metrics()
+
+    metrics = asyncio.run(scenario())
+    assert metrics['shed_queue_full'] == 1
+    assert metrics['shed_deadline'] == 1
+    assert metrics['admitted'] == 1
+    assert metrics['in_flight'] == 0 and metrics['queued'] == 0
+
+
+def test_overloaded_predict_returns_503(client, monkeypatch):
+    monkeypatch.setattr(main, 'admission', AdmissionController(max_concurrency=1, max_queue=0, queue_timeout=1.0))
+    make_prediction = main.make_prediction
+
+    def slow_prediction(**kwargs):
+        time.sleep(0.3)
+        return make_prediction(**kwargs)
+
+    monkeypatch.setattr(main, 'make_prediction', slow_prediction)
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        responses = list(pool.map(lambda _: client.post('/predict', json=PAYLOAD), range(4)))
+
+    statuses = sorted(response.status_code for response in responses)
+    assert statuses[0] == 200 and 503 in statuses
+    shed = next(response for response in responses if response.status_code == 503)
+    assert int(shed.headers['Retry-After']) >= 1
+
+    metrics = client.get('/metrics/admission').json()
+    assert metrics['shed_queue_full'] == statuses.count(503)
+    assert metrics['admitted'] == statuses.count(200)
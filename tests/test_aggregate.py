@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Test POST /predict/aggregate against per-country /predict calls
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import DATA_PATH
+import main
+
+TRAINED = set(pd.read_csv(DATA_PATH)['Country'])
+QUERY = {'region': 'west africa', 'year': 2025, 'sex': 'Women', 'min_age': 50}
+
+
+def single_predictions(client, countries, ages, sexes=('Women',), year=2025):
+    """(country, sex, age group) array of POST /predict results"""
+    return np.array([[[
+        client.post('/predict', json={'age': age, 'sex': sex, 'year': year, 'country': country}).json()['prediction']
+        for age in ages] for sex in sexes] for country in countries])
+
+
+def test_equal_weights_match_single_predictions(client):
+    body = client.post('/predict/aggregate', json=QUERY).json()
+    countries = [country for country in main.REGIONS['West Africa'] if country in TRAINED]
+    expected = single_predictions(client, countries, range(50, 85, 5))
+
+    assert body['region'] == 'West Africa'
+    assert body['age_groups'] == ['50-54', '55-59', '60-64', '65-69', '70-74', '75-79', '80+']
+    assert body['rows'] == expected.size
+    assert body['prevalence'] == pytest.approx(expected.mean())
+    assert [body['by_country'][country] for country in countries] == pytest.approx(expected.mean(axis=(1, 2)).tolist())
+
+
+def test_weights(client):
+    country_weights = {country: float(i) for i, country in enumerate(main.REGIONS['Southern Africa'])}  # Botswana gets 0
+    countries = [country for country in country_weights if country in TRAINED]
+    age_weights = {'30-34': 3.0, '35-39': 1.0}
+    body = client.post('/predict/aggregate', json={
+        'region': 'Southern Africa', 'year': 2020, 'max_age': 39,
+        'country_weights': country_weights, 'age_weights': age_weights
+    }).json()
+
+    expected = single_predictions(client, countries, (30, 35), sexes=('Men', 'Women'), year=2020)
+    weights = np.array([country_weights[country] for country in countries])[:, None, None] * np.array([3.0, 1.0])[None, None, :]
+    weights = np.broadcast_to(weights, expected.shape)
+    assert body['prevalence'] == pytest.approx((expected * weights).sum() / weights.sum())
+    assert body['by_country']['Botswana'] is None
+
+
+def test_results_are_memoized(client, monkeypatch):
+    calls = []
+    aggregate_prediction = main.aggregate_prediction
+    monkeypatch.setattr(main, 'aggregate_prediction', lambda request: calls.append(request) or aggregate_prediction(request))
+
+    first = client.post('/predict/aggregate', json={**QUERY, 'year': 2011}).json()
+    second = client.post('/predict/aggregate', json={**QUERY, 'year': 2011, 'min_age': 52}).json()
+    assert first == second
+    assert len(calls) == 1
+
+
+def test_untrained_countries_are_not_scored_as_baseline(client):
+    body = client.post('/predict/aggregate', json={**QUERY, 'region': 'Central Africa'}).json()
+    untrained = [country for country in main.REGIONS['Central Africa'] if country not in TRAINED]
+
+    assert untrained and body['untrained_countries'] == untrained
+    assert not set(untrained) & set(body['by_country'])
+    assert body['rows'] == (len(main.REGIONS['Central Africa']) - len(untrained)) * 7
+    # The baseline country itself was trained on (the fixture artifact only lists one-hot countries)
+    assert client.post('/predict/aggregate', json={**QUERY, 'region': 'North Africa'}).json()['untrained_countries'] == []
+
+
+@pytest.mark.parametrize('query', [
+    {**QUERY, 'region': 'Atlantis'},
+    {**QUERY, 'min_age': 70, 'max_age': 60},
+    {**QUERY, 'country_weights': {'Ghana': 1.0}},
+    {**QUERY, 'age_weights': {'50-54': 1.0}},
+    {**QUERY, 'age_weights': {age_group: -1.0 for age_group in main.AGE_GROUPS}}
+])
+def test_invalid_queries(client, query):
+    assert client.post('/predict/aggregate', json=query).status_code == 422
+
+
+@pytest.mark.parametrize('weights', ['country_weights', 'age_weights'])
+@pytest.mark.parametrize('weight', ['Infinity', 'NaN'])
+def test_non_finite_weights(client, weights, weight):
+    keys = main.REGIONS['West Africa'] if weights == 'country_weights' else main.AGE_GROUPS
+    body = json.dumps({**QUERY, weights: {key: 1.0 for key in keys}})
+    body = body.replace('1.0}', f'{weight}}}')  # JSON extension Python's parser accepts
+    response = client.post('/predict/aggregate', content=body, headers={'content-type': 'application/json'})
+    assert response.status_code == 422
+
+
+def test_regions_cover_every_country(client):
+    regions = client.get('/regions').json()['regions']
+    subregions = [country for region, countries in regions.items() if region != 'Africa' for country in countries]
+    assert sorted(subregions) == sorted(main.COUNTRIES)
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Test /predict/batch content negotiation (JSON rows, msgpack and Arrow columns)
+"""
+
+import numpy as np
+import pytest
+
+import main
+
+ROWS = [
+    {'age': 45, 'sex': 'Men', 'year': 2020, 'country': 'Nigeria'},
+    {'age': 85, 'sex': 'Women', 'year': 2019, 'country': 'Kenya'},
+    {'age': 33, 'sex': 'Women', 'year': 2016, 'country': 'Algeria'}
+]
+
+COLUMNS = {
+    'age': [45, 85, 33],
+    'sex': [0, 1, 1],
+    'year': [2020, 2019, 2016],
+    'country': [main.COUNTRIES.index(row['country']) for row in ROWS]
+}
+
+
+def test_json_batch_matches_single_predictions(client):
+    response = client.post('/predict/batch', json={'rows': ROWS})
+    assert response.status_code == 200
+    body = response.json()
+
+    singles = [client.post('/predict', json=row).json()['prediction'] for row in ROWS]
+    assert np.allclose(body['predictions'], singles)
+    assert body['age_groups'] == ['45-49', '80+', '30-34']
+
+
+def test_msgpack_batch(client):
+    msgpack = pytest.importorskip('msgpack')
+    expected = client.post('/predict/batch', json={'rows': ROWS}).json()['predictions']
+
+    response = client.post('/predict/batch', content=msgpack.packb(COLUMNS), headers={'content-type': 'application/msgpack'})
+    assert response.status_code == 200
+    assert response.headers['content-type'] == 'application/msgpack'
+    payload = msgpack.unpackb(response.content)
+    assert np.allclose(np.frombuffer(payload['prediction'], dtype=payload['dtype']), expected)
+
+    # Accept header switches the response format
+    response = client.post('/predict/batch', content=msgpack.packb(COLUMNS),
+                           headers={'content-type': 'application/msgpack', 'accept': 'application/json'})
+    assert np.allclose(response.json()['predictions'], expected)
+
+
+def test_arrow_batch(client):
+    pa = pytest.importorskip('pyarrow')
+    expected = client.post('/predict/batch', json={'rows': ROWS}).json()['predictions']
+
+    table = pa.table({name: np.asarray(values, dtype=np.int32) for name, values in COLUMNS.items()})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+
+    response = client.post('/predict/batch', content=sink.getvalue().to_pybytes(),
+                           headers={'content-type': main.ARROW_CONTENT_TYPE})
+    assert response.status_code == 200
+    predictions = pa.ipc.open_stream(response.content).read_all().column('prediction').to_numpy()
+    assert np.allclose(predictions, expected)
+
+
+def test_binary_range_errors(client):
+    msgpack = pytest.importorskip('msgpack')
+    bad = dict(COLUMNS, age=[45, 20, 33])
+    response = client.post('/predict/batch', content=msgpack.packb(bad), headers={'content-type': 'application/msgpack'})
+    assert response.status_code == 422
+
+
+def test_malformed_binary_bodies(client):
+    msgpack = pytest.importorskip('msgpack')
+    pytest.importorskip('pyarrow')
+    packed = msgpack.packb(COLUMNS)
+
+    response = client.post('/predict/batch', content=packed[:-5], headers={'content-type': 'application/msgpack'})
+    assert response.status_code == 400
+
+    response = client.post('/predict/batch', content=msgpack.packb(dict(COLUMNS, sex=['Men', 'Women', 'Women'])),
+                           headers={'content-type': 'application/msgpack'})
+    assert response.status_code == 422
+    assert response.json()['detail'][0]['loc'] == ['body', 'sex']
+
+    response = client.post('/predict/batch', content=b'not an arrow stream',
+                           headers={'content-type': main.ARROW_CONTENT_TYPE})
+    assert response.status_code == 400
+
+
+def test_unsupported_content_type(client):
+    response = client.post('/predict/batch', content=b'age,sex', headers={'content-type': 'text/plain'})
+    assert response.status_code == 415
+
+
+def test_column_validation_mask_and_errors():
+    raw_columns = {
+        'age': [45, 25, 'abc', 50],
+        'sex': ['men', 'WOMEN', 'Women', 'x'],
+        'year': [2020, 2020, 2020, 2040],
+        'country': ["côte d'ivoire", 'Kenya', 'Atlantis', 'Ghana']
+    }
+    columns, valid, errors = main.validate_columns(raw_columns, lambda row, name: ('body', name, row))
+
+    assert valid.tolist() == [True, False, False, False]
+    assert columns['country'][0] == main.COUNTRIES.index("Côte d'Ivoire")
+    assert columns['sex'].tolist()[:3] == [0, 1, 1]
+    assert [(error['loc'][2], error['loc'][1], error['type']) for error in errors] == [
+        (1, 'age', 'greater_than_equal'),
+        (2, 'age', 'int_parsing'),
+        (2, 'country', 'value_error'),
+        (3, 'year', 'less_than_equal'),
+        (3, 'sex', 'value_error')
+    ]
+
+
+def test_json_columns_skip_invalid_rows(client):
+    payload = {
+        'age': [45, 25],
+        'sex': ['Men', 'Women'],
+        'year': [2020, 2020],
+        'country': ['Nigeria', 'Kenya']
+    }
+    response = client.post('/predict/batch', json=payload)
+    assert response.status_code == 422
+    assert response.json()['detail'][0]['loc'] == ['body', 'age', 1]
+
+    response = client.post('/predict/batch?on_error=skip', json=payload)
+    assert response.status_code == 200
+    body = response.json()
+    assert body['predictions'][0] is not None and body['predictions'][1] is None
+    assert body['errors'][0]['loc'] == ['body', 'age', 1]
+
+
+@pytest.mark.parametrize('value', ['Infinity', '-Infinity', 'NaN'])
+def test_skip_non_finite_inputs(client, value):
+    # Python's JSON parser accepts these literals; the errors must still serialize
+    body = ('{"rows": [{"age": %s, "sex": "Men", "year": 2020, "country": "Nigeria"},'
+            ' {"age": 45, "sex": "Men", "year": %s, "country": "Kenya"},'
+            ' {"age": 45, "sex": "Women", "year": 2020, "country": "Kenya"}]}' % (value, value))
+    response = client.post('/predict/batch?on_error=skip', content=body, headers={'content-type': 'application/json'})
+    assert response.status_code == 200
+    result = response.json()
+    assert result['predictions'][:2] == [None, None] and result['predictions'][2] is not None
+    assert [error['input'] for error in result['errors']] == [None, None]
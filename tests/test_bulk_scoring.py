@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Test the chunked bulk scoring command in API/prediction.py
+"""
+
+import numpy as np
+import pandas as pd
+
+import prediction
+
+
+def test_score_file(model_path, tmp_path):
+    """Scored output keeps every input row, in order, with NaN for invalid rows"""
+    rows = pd.DataFrame({
+        'age': [45, 82, 25, 60, 33, 70],
+        'sex': ['male', 'Women', 'female', 'invalid', 'MEN', 'women'],
+        'country': ['Nigeria', 'Kenya', 'Ghana', 'Egypt', 'Algeria', 'Atlantis'],
+        'year': [2020, 2018, 2020, 2019, 2016, 2017]
+    })
+    input_path = tmp_path / 'input.csv'
+    output_path = tmp_path / 'output.csv'
+    rows.to_csv(input_path, index=False)
+
+    n_rows = prediction.score_file(str(input_path), str(output_path), model_path=model_path, chunksize=2, workers=2)
+    scored = pd.read_csv(output_path)
+
+    assert n_rows == len(rows)
+    assert scored['age'].tolist() == rows['age'].tolist()
+    assert scored['age_group'].tolist()[:2] == ['45-49', '80+']
+    assert scored['prediction'].notna().tolist() == [True, True, False, False, True, False]
+    predictions = scored['prediction'].dropna()
+    assert np.all((predictions > 0) & (predictions < 1))
+
+
+def test_encode_chunk(model_data):
+    """Vectorized encoding matches the column layout used in training"""
+    feature_names = model_data['feature_names']
+    encoder = prediction.load_encoder(model_data)
+    chunk = pd.DataFrame({'age': [57], 'sex': ['Women'], 'country': ['Kenya'], 'year': [2019]})
+
+    features, valid, age_encoded = prediction.encode_chunk(chunk, encoder)
+
+    assert valid.tolist() == [True]
+    assert age_encoded.tolist() == [5]
+    assert features[0, feature_names.index('Year')] == 2019
+    assert features[0, feature_names.index('Sex_binary')] == 1
+    assert features[0, feature_names.index('Age_encoded')] == 5
+    assert features[0, feature_names.index('Country_Kenya')] == 1
+    assert features[0].sum() == 2019 + 1 + 5 + 1
+
+
+def test_encode_chunk_country_case(model_data):
+    """Country names match case-insensitively, like make_prediction"""
+    encoder = prediction.load_encoder(model_data)
+    chunk = pd.DataFrame({'age': [57, 57], 'sex': ['Women', 'Women'], 'country': ['Kenya', ' kENYA'], 'year': [2019, 2019]})
+
+    features, valid, _ = prediction.encode_chunk(chunk, encoder)
+
+    assert valid.tolist() == [True, True]
+    assert np.array_equal(features[0], features[1])
+
+
+def test_make_prediction_reuses_the_loaded_model(model_path, monkeypatch):
+    monkeypatch.setattr(prediction, 'MODEL_PATHS', [model_path])
+    monkeypatch.setattr(prediction, '_model_cache', {})
+    loads = []
+    load_model = prediction.load_model
+    monkeypatch.setattr(prediction, 'load_model', lambda path=None: loads.append(path) or load_model(path))
+
+    first = prediction.make_prediction(57, 'Women', 'Kenya', 2019)
+    second = prediction.make_prediction(45, 'men', 'nigeria', 2020)
+
+    assert 'error' not in first and 'error' not in second
+    assert len(loads) == 1
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Test the cacheable GET /predict endpoint (ETag, Cache-Control, 304, LRU)
+"""
+
+import main
+
+PARAMS = {'age': 45, 'sex': 'Women', 'year': 2020, 'country': 'Kenya'}
+
+
+def test_get_matches_post_and_is_cacheable(client):
+    response = client.get('/predict', params=PARAMS)
+    assert response.status_code == 200
+    assert response.headers['ETag'].startswith('"')
+    assert 'max-age=' in response.headers['Cache-Control']
+
+    posted = client.post('/predict', json=PARAMS).json()
+    assert response.json()['prediction'] == posted['prediction']
+    assert response.json()['age_group'] == posted['age_group']
+
+
+def test_etag_depends_on_normalized_inputs(client):
+    etag = client.get('/predict', params=PARAMS).headers['ETag']
+    # Same age group, different spelling of sex/country: same representation
+    same = client.get('/predict', params={**PARAMS, 'age': 49, 'sex': 'women', 'country': 'KENYA'})
+    assert same.headers['ETag'] == etag
+    assert client.get('/predict', params={**PARAMS, 'age': 50}).headers['ETag'] != etag
+
+
+def test_conditional_and_repeat_requests_skip_the_model(client, monkeypatch):
+    etag = client.get('/predict', params=PARAMS).headers['ETag']
+
+    calls = []
+    make_prediction = main.make_prediction
+    monkeypatch.setattr(main, 'make_prediction', lambda **kwargs: calls.append(kwargs) or make_prediction(**kwargs))
+
+    not_modified = client.get('/predict', params=PARAMS, headers={'If-None-Match': f'"other", W/{etag}'})
+    assert not_modified.status_code == 304
+    assert not_modified.headers['ETag'] == etag
+    assert not_modified.content == b''
+
+    assert client.get('/predict', params=PARAMS).status_code == 200
+    assert calls == []
+
+    client.get('/predict', params={**PARAMS, 'year': 2019})
+    assert len(calls) == 1
+
+
+def test_invalid_query_is_422(client):
+    response = client.get('/predict', params={**PARAMS, 'country': 'Atlantis'})
+    assert response.status_code == 422
+    assert response.json()['detail'][0]['loc'] == ['query', 'country']
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test that explain=true contributions add up to the prediction, for trees and linear models
+"""
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import PolynomialFeatures
+
+import main
+from contributions import GROUPS, ContributionExplainer
+from feature_encoder import FeatureEncoder
+
+PAYLOAD = {'age': 52, 'sex': 'Women', 'year': 2019, 'country': 'Ghana'}
+ROWS = [
+    {'age': 45, 'sex': 'Men', 'year': 2020, 'country': 'Nigeria'},
+    {'age': 85, 'sex': 'Women', 'year': 2019, 'country': 'Kenya'},
+    {'age': 33, 'sex': 'Women', 'year': 2016, 'country': 'Algeria'}
+]
+
+
+def random_features(model_data, n_rows=500, seed=0):
+    encoder = FeatureEncoder(model_data['feature_names'])
+    rng = np.random.default_rng(seed)
+    features = encoder.encode_batch(
+        rng.integers(1990, 2031, n_rows), rng.integers(0, 2, n_rows), rng.integers(0, 11, n_rows),
+        rng.integers(-1, len(encoder.countries), n_rows)
+    )
+    return encoder, (features - model_data['scaler'].mean_) / model_data['scaler'].scale_
+
+
+@pytest.mark.parametrize('kind', ['forest', 'linear'])
+def test_contributions_sum_to_prediction(model_data, kind):
+    encoder, features = random_features(model_data)
+    model = model_data['model'] if kind == 'forest' else LinearRegression().fit(features, features[:, 0] * 0.1)
+
+    explainer = ContributionExplainer.for_model(model, encoder)
+    contributions = explainer.explain(features)
+    assert contributions.shape == (len(features), len(GROUPS))
+    assert np.allclose(explainer.baseline + contributions.sum(axis=1), model.predict(features))
+    assert explainer.group_names == ['year', 'sex', 'age_group', 'country']
+
+
+def test_unsupported_models(model_data):
+    encoder, features = random_features(model_data, n_rows=50)
+    pipeline = make_pipeline(PolynomialFeatures(degree=2), LinearRegression()).fit(features, features[:, 0])
+    multi_output = RandomForestRegressor(n_estimators=2, random_state=0).fit(features, features[:, :2])
+    assert ContributionExplainer.for_model(pipeline, encoder) is None
+    assert ContributionExplainer.for_model(multi_output, encoder) is None
+
+
+def test_predict_explain(client):
+    plain = client.post('/predict', json=PAYLOAD).json()
+    body = client.post('/predict?explain=true', json=PAYLOAD).json()
+    assert 'explanation' not in plain
+    assert body['prediction'] == plain['prediction']
+
+    explanation = body['explanation']
+    assert set(explanation['contributions']) == {'year', 'sex', 'age_group', 'country'}
+    assert explanation['baseline'] + sum(explanation['contributions'].values()) == pytest.approx(body['prediction'])
+
+
+def test_batch_explain_matches_single(client):
+    body = client.post('/predict/batch?explain=true', json={'rows': ROWS}).json()
+    for i, row in enumerate(ROWS):
+        single = client.post('/predict?explain=true', json=row).json()['explanation']
+        assert body['explanation']['baseline'] == single['baseline']
+        for name, value in single['contributions'].items():
+            assert body['explanation']['contributions'][name][i] == pytest.approx(value)
+
+
+def test_batch_explain_arrow(client):
+    pa = pytest.importorskip('pyarrow')
+    response = client.post('/predict/batch?explain=true', json={'rows': ROWS},
+                           headers={'accept': main.ARROW_CONTENT_TYPE})
+    table = pa.ipc.open_stream(response.content).read_all()
+    baseline = float(table.schema.metadata[b'baseline'])
+    total = baseline + sum(table.column(f'contribution_{name}').to_numpy() for name in ('year', 'sex', 'age_group', 'country'))
+    assert np.allclose(total, table.column('prediction').to_numpy())
+
+
+def test_explain_unavailable(client, monkeypatch):
+    monkeypatch.setitem(main.feature_index, 'explainer', None)
+    assert client.post('/predict?explain=true', json=PAYLOAD).status_code == 400
+    assert client.post('/predict/batch?explain=true', json={'rows': ROWS}).status_code == 400
+    assert client.post('/predict', json=PAYLOAD).status_code == 200
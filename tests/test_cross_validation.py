@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Test the k-fold cross-validation engine used by model_comparison.py --cv
+"""
+
+import numpy as np
+from sklearn.linear_model import LinearRegression
+from sklearn.preprocessing import StandardScaler
+from sklearn.tree import DecisionTreeRegressor
+
+from conftest import DATA_PATH
+import cross_validation
+import model_comparison
+
+
+def load_encoded():
+    africa = model_comparison.load_data(DATA_PATH)
+    X, y = model_comparison.encode_features(africa)
+    return np.asarray(X, dtype=float), y, africa['Country'].to_numpy()
+
+
+def test_gram_models_match_row_fits():
+    """Gram-sum fits give the same held-out metrics as refitting on scaled rows"""
+    X, y, countries = load_encoded()
+    for groups in (None, countries):
+        folds = cross_validation.make_folds(len(y), 3, groups)
+        gram_results = cross_validation.fit_gram_models(X, y, folds)
+
+        train_index, test_index = folds[0]
+        scaler = StandardScaler()
+        X_train = scaler.fit_transform(X[train_index])
+        X_test = scaler.transform(X[test_index])
+
+        sklearn_model = LinearRegression().fit(X_train, y[train_index])
+        scratch_model = model_comparison.LinearRegressionFromScratch().fit(X_train, y[train_index])
+        for name, model in (('Linear Regression (sklearn)', sklearn_model), ('Linear Regression (from scratch)', scratch_model)):
+            expected = cross_validation.fold_metrics(y[test_index], model.predict(X_test))
+            assert np.isclose(gram_results[name][0]['r2'], expected['r2'])
+            assert np.isclose(gram_results[name][0]['rmse'], expected['rmse'])
+
+
+def test_cross_validate_models_summary(monkeypatch):
+    X, y, countries = load_encoded()
+    monkeypatch.setattr(cross_validation, 'create_models', lambda: {
+        'Linear Regression (from scratch)': model_comparison.LinearRegressionFromScratch(),
+        'Linear Regression (sklearn)': LinearRegression(),
+        'Decision Tree': DecisionTreeRegressor(random_state=42, max_depth=5)
+    })
+
+    results = cross_validation.cross_validate_models(X, y, groups=countries, n_splits=4, n_jobs=1)
+
+    assert results['grouped'] and results['n_splits'] == 4
+    assert set(results['summary']) == {'Linear Regression (from scratch)', 'Linear Regression (sklearn)', 'Decision Tree'}
+    assert all(len(folds) == 4 for folds in results['folds'].values())
+    for stats in results['summary'].values():
+        assert 0 < stats['r2_mean'] <= 1 and stats['r2_std'] >= 0
+    assert results['wall_seconds'] > 0
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Test POST /predict/csv: chunked parsing, multipart and raw uploads, invalid rows
+"""
+
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import main
+from csv_upload import CsvChunker
+
+
+def make_csv(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'patient_id': [f'p{i}' for i in range(n_rows)],
+        'Age': rng.integers(30, 101, n_rows),
+        'Sex': np.array(['Men', 'Women'])[rng.integers(0, 2, n_rows)],
+        'Year': rng.integers(2000, 2031, n_rows),
+        'Country': np.array(main.COUNTRIES)[rng.integers(0, len(main.COUNTRIES), n_rows)]
+    }).to_csv(index=False).encode()
+
+
+def test_chunker_keeps_lines_whole():
+    data = make_csv(200)
+    chunker = CsvChunker(chunk_bytes=300)
+    blocks = [block for i in range(0, len(data), 37) for block in chunker.feed(data[i:i + 37])] + chunker.finish()
+
+    assert len(blocks) > 5
+    assert all(block.startswith(chunker.header) and block.endswith(b'\n') for block in blocks)
+    assert b''.join(block[len(chunker.header):] for block in blocks) == data[len(chunker.header):]
+
+
+@pytest.mark.parametrize('upload', ['multipart', 'raw'])
+def test_scored_csv_matches_batch(client, monkeypatch, upload):
+    monkeypatch.setattr(main, 'CSV_CHUNK_BYTES', 1024)  # many blocks
+    data = make_csv(500)
+    if upload == 'multipart':
+        response = client.post('/predict/csv', files={'file': ('patients.csv', data, 'text/csv')})
+    else:
+        response = client.post('/predict/csv', content=data, headers={'content-type': 'text/csv'})
+    assert response.status_code == 200
+    assert response.headers['x-rows'] == '500' and response.headers['x-invalid-rows'] == '0'
+    assert float(response.headers['x-rows-per-second']) > 0
+
+    scored = pd.read_csv(io.BytesIO(response.content))
+    source = pd.read_csv(io.BytesIO(data))
+    assert list(scored.columns) == list(source.columns) + ['prediction', 'age_group', 'error']
+    assert (scored['patient_id'] == source['patient_id']).all()
+
+    expected = client.post('/predict/batch', json={
+        name.lower(): source[name].tolist() for name in ('Age', 'Sex', 'Year', 'Country')
+    }).json()['predictions']
+    assert np.allclose(scored['prediction'], expected)
+
+
+def test_invalid_rows_are_reported(client):
+    data = b'age,sex,year,country\n45,Men,2020,Nigeria\n20,Men,2020,Nigeria\n50,Women,2020,Atlantis\n'
+    response = client.post('/predict/csv', files={'file': ('patients.csv', data, 'text/csv')})
+    scored = pd.read_csv(io.BytesIO(response.content), keep_default_na=False)
+
+    assert response.headers['x-invalid-rows'] == '2'
+    assert scored['prediction'].tolist()[1:] == ['', '']
+    assert scored['error'].tolist()[0] == ''
+    assert scored['error'][1].startswith('age:') and scored['error'][2].startswith('country:')
+
+
+@pytest.mark.parametrize('data, headers, status', [
+    (b'age,sex,year\n45,Men,2020\n', {'content-type': 'text/csv'}, 422),
+    (b'', {'content-type': 'text/csv'}, 422),
+    (b'{}', {'content-type': 'application/json'}, 415)
+])
+def test_rejected_uploads(client, data, headers, status):
+    assert client.post('/predict/csv', content=data, headers=headers).status_code == status
+
+
+def test_multipart_without_file_field(client):
+    response = client.post('/predict/csv', files={'upload': ('patients.csv', make_csv(3), 'text/csv')})
+    assert response.status_code == 400
+
+
+def test_trailing_commas_and_ragged_rows(client):
+    data = (b'age,sex,year,country\n45,Men,2020,Nigeria,\n50,Women,2020,Kenya,\n'
+            b'55,Men,2020\n60,Women,2020,Ghana,extra\n65,Men,2020,"Cabo Verde"\n')
+    response = client.post('/predict/csv', content=data, headers={'content-type': 'text/csv'})
+    scored = pd.read_csv(io.BytesIO(response.content), keep_default_na=False)
+
+    assert response.status_code == 200
+    assert list(scored.columns) == ['age', 'sex', 'year', 'country', 'prediction', 'age_group', 'error']
+    assert scored['country'].tolist() == ['Nigeria', 'Kenya', '', 'Ghana', 'Cabo Verde']
+    assert response.headers['x-invalid-rows'] == '2'
+    assert scored['error'].tolist() == ['', '', 'row has 3 fields, the header has 4',
+                                        'row has 5 fields, the header has 4', '']
+    expected = client.post('/predict', json={'age': 45, 'sex': 'Men', 'year': 2020, 'country': 'Nigeria'}).json()
+    assert float(scored['prediction'][0]) == pytest.approx(expected['prediction'])
+    assert scored['age_group'].tolist() == ['45-49', '50-54', '', '', '65-69']
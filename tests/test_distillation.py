@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Test distilling the Random Forest into a servable surrogate
+"""
+
+import pickle
+
+import numpy as np
+
+from conftest import DATA_PATH
+from distillation import AGE_ORDER, GRID_YEARS, choose_surrogate, distill_forest, input_grid
+
+
+def test_input_grid_covers_every_combination(model_data):
+    feature_names = model_data['feature_names']
+    grid = input_grid(feature_names)
+    n_countries = sum(name.startswith('Country_') for name in feature_names) + 1
+    assert grid.shape == (len(AGE_ORDER) * 2 * len(GRID_YEARS) * n_countries, len(feature_names))
+    # At most one country column is set per row; baseline rows have none
+    country = grid[:, [i for i, name in enumerate(feature_names) if name.startswith('Country_')]]
+    assert set(np.unique(country.sum(axis=1))) == {0, 1}
+    assert len(np.unique(grid, axis=0)) == len(grid)
+
+
+def test_choose_surrogate_needs_both_tolerances():
+    report = {
+        'Teacher': {'teacher_rmse': 0.0, 'test_r2': 0.97, 'single_ms': 10.0},
+        'fast but unfaithful': {'teacher_rmse': 0.05, 'test_r2': 0.98, 'single_ms': 0.1},
+        'faithful': {'teacher_rmse': 0.001, 'test_r2': 0.965, 'single_ms': 0.5}
+    }
+    assert choose_surrogate(report) == 'faithful'
+
+
+def test_distilled_artifact_is_servable(tmp_path):
+    output_path = tmp_path / 'distilled.pkl'
+    best_name, report, _ = distill_forest(DATA_PATH, str(output_path))
+
+    with open(output_path, 'rb') as file:
+        artifact = pickle.load(file)
+    assert artifact['model_name'] == f"Distilled {best_name}"
+    assert {'model', 'scaler', 'feature_names', 'age_mapping', 'sex_mapping'} <= set(artifact)
+    assert report[best_name]['bytes'] < report['Teacher']['bytes']
+    assert report[best_name]['teacher_rmse'] < 0.01
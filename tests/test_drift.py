@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Test the production drift sketches and /monitoring/drift
+"""
+
+import numpy as np
+
+import main
+from drift_monitor import DriftMonitor, histogram_quantiles, psi
+
+
+def test_observe_and_batch_agree():
+    single, batch = DriftMonitor(54, 11), DriftMonitor(54, 11)
+    rng = np.random.default_rng(0)
+    country, sex, age = rng.integers(0, 54, 500), rng.integers(0, 2, 500), rng.integers(0, 11, 500)
+    year, predictions = rng.integers(1990, 2031, 500), rng.uniform(-0.1, 1.1, 500)
+
+    for row in range(500):
+        single.observe(int(country[row]), int(sex[row]), int(age[row]), int(year[row]), float(predictions[row]))
+    batch.observe_batch(country, sex, age, year, predictions)
+
+    for name in ('country', 'sex', 'age', 'year', 'predictions'):
+        assert getattr(single, name) == getattr(batch, name)
+    assert single.count == batch.count == 500
+
+
+def test_psi_and_quantiles():
+    assert psi([10, 20, 30], [1, 2, 3]) < 1e-9
+    assert psi([10, 10], [19, 1]) > 0.25
+    counts = np.zeros(100)
+    counts[[10, 50, 90]] = 1
+    assert histogram_quantiles(counts, quantiles=(0.5,))['p50'] == 0.505
+
+
+def test_drift_endpoint_reports_shift(client, monkeypatch):
+    monkeypatch.setattr(main, 'drift_monitor', DriftMonitor(len(main.COUNTRIES), len(main.AGE_GROUPS)))
+    for age in (32, 47, 62, 77):
+        client.post('/predict', json={'age': age, 'sex': 'Women', 'year': 2017, 'country': 'Kenya'})
+    client.get('/predict', params={'age': 47, 'sex': 'Women', 'year': 2030, 'country': 'Kenya'})
+    client.post('/predict/batch', json={'age': [50, 55], 'sex': ['Women', 'Women'], 'year': [2017, 2017], 'country': ['Kenya', 'Kenya']})
+
+    report = client.get('/monitoring/drift').json()
+    assert report['reference'] == 'observations'  # the fixture artifact has no training_distribution
+    assert report['requests'] == 7
+    country = report['inputs']['country']
+    assert country['psi'] > 1 and next(iter(country['largest_shifts'])) == 'Kenya'
+    assert report['inputs']['sex']['largest_shifts']['Women'] > 0.4
+    assert abs(report['inputs']['year']['unseen_share'] - 1 / 7) < 1e-9  # 2030 is not in the data
+    assert report['predictions']['production_quantiles']['p50'] is not None
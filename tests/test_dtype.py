@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Test the float32 dtype policy: training keeps float32 end to end and serving
+in float32 matches float64 predictions
+"""
+
+import numpy as np
+
+import main
+from conftest import DATA_PATH
+from model_comparison import LinearRegressionFromScratch, load_and_prepare_data
+
+
+def test_float32_training_pipeline():
+    X_train, X_test, y_train, _, _, _ = load_and_prepare_data(DATA_PATH, dtype=np.float32)
+    assert X_train.dtype == np.float32 and X_test.dtype == np.float32
+    assert y_train.dtype == np.float32
+
+    model = LinearRegressionFromScratch(learning_rate=0.01, max_iterations=50).fit(X_train, y_train)
+    assert model.weights.dtype == np.float32
+    assert model.predict(X_test).dtype == np.float32
+
+
+def test_float32_serving_matches_float64(model_data, monkeypatch):
+    rng = np.random.default_rng(0)
+    n_rows = 2000
+    age = rng.integers(30, 101, n_rows)
+    sex = rng.integers(0, 2, n_rows)
+    year = rng.integers(2015, 2020, n_rows)
+    country = rng.integers(0, len(main.COUNTRIES), n_rows)
+
+    monkeypatch.setattr(main, 'model_data', model_data)
+    monkeypatch.setattr(main, 'feature_index', main.build_feature_index(model_data))
+    wide = main.predict_columns(age, sex, year, country)
+
+    monkeypatch.setattr(main, 'model_data', dict(model_data, dtype='float32'))
+    monkeypatch.setattr(main, 'feature_index', main.build_feature_index(main.model_data))
+    assert main.feature_index['dtype'] == np.float32
+    narrow = main.predict_columns(age, sex, year, country)
+
+    assert np.abs(wide - narrow).max() < 1e-3
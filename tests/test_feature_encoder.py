@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Test the FeatureEncoder shared by training and serving
+"""
+
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+import model_comparison
+from conftest import DATA_PATH
+from feature_encoder import FeatureEncoder
+
+
+@pytest.fixture(scope='module')
+def africa():
+    return model_comparison.load_data(DATA_PATH)
+
+
+def test_fit_matches_get_dummies(africa):
+    expected = africa.assign(
+        Sex_binary=africa['Sex'].map(model_comparison.SEX_MAP), Age_encoded=africa['Age'].map(model_comparison.AGE_MAP)
+    )
+    expected = pd.get_dummies(expected, columns=['Country'], drop_first=True).drop(
+        columns=['Sex', 'Age', model_comparison.TARGET]
+    )
+
+    encoder = model_comparison.fit_encoder(africa)
+    assert encoder.feature_names == expected.columns.tolist()
+    assert np.array_equal(encoder.encode_frame(africa), expected.to_numpy(dtype=float))
+
+
+def test_row_batch_and_state_agree(africa):
+    encoder = model_comparison.fit_encoder(africa, dtype=np.float32)
+    rng = np.random.default_rng(0)
+    year, sex, age = rng.integers(1990, 2031, 200), rng.integers(0, 2, 200), rng.integers(0, 11, 200)
+    country = rng.integers(-1, len(encoder.countries), 200)  # -1: unknown, encoded like the baseline
+
+    batch = encoder.encode_batch(year, sex, age, country)
+    assert batch.dtype == np.float32
+    for row in range(200):
+        assert np.array_equal(encoder.encode_row(year[row], sex[row], age[row], country[row])[0], batch[row])
+
+    for restored in (FeatureEncoder(**encoder.to_dict()), pickle.loads(pickle.dumps(encoder))):
+        assert np.array_equal(restored.encode_batch(year, sex, age, country), batch)
+    assert encoder.country_codes(['kenya', ' Kenya ', 'Atlantis']).tolist() == [encoder.country_code('Kenya')] * 2 + [-1]
+
+
+def test_api_uses_artifact_encoder(model_data, tmp_path, monkeypatch):
+    """An artifact with a saved encoder predicts exactly like one rebuilt from feature_names"""
+    payload = {'age': 63, 'sex': 'Women', 'year': 2018, 'country': 'Ghana'}
+    batch = {'age': [35, 80], 'sex': ['Men', 'Women'], 'year': [2016, 2019], 'country': ['Algeria', 'Kenya']}
+    columns = ['Country', 'Sex', 'Year', 'Age', model_comparison.TARGET]
+    encoder = FeatureEncoder.fit(pd.read_csv(DATA_PATH)[columns], model_comparison.TARGET)
+    assert encoder.feature_names == model_data['feature_names']
+
+    responses = []
+    for data in (model_data, {**model_data, 'feature_encoder': encoder.to_dict()}):
+        path = tmp_path / f"model_{len(responses)}.pkl"
+        path.write_bytes(pickle.dumps(data))
+        monkeypatch.setattr(main, 'MODEL_PATH', str(path))
+        with TestClient(main.app) as client:
+            responses.append((client.post('/predict', json=payload).json()['prediction'],
+                              client.post('/predict/batch', json=batch).json()['predictions']))
+    assert responses[0] == responses[1]
+    assert isinstance(main.feature_index['encoder'], FeatureEncoder)
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Test the on-disk fit memoization behind model_comparison --fit-cache
+"""
+
+import os
+
+import numpy as np
+import pytest
+from sklearn.tree import DecisionTreeRegressor
+
+import model_comparison
+from conftest import DATA_PATH
+from fit_cache import FitCache, hash_arrays
+
+
+def test_key_tracks_data_and_hyperparameters(tmp_path):
+    cache = FitCache(str(tmp_path))
+    X, y = np.ones((10, 3)), np.arange(10.0)
+    data_hash = hash_arrays(X, y)
+    key = cache.key(DecisionTreeRegressor(max_depth=3), data_hash)
+
+    assert key == cache.key(DecisionTreeRegressor(max_depth=3), hash_arrays(X.copy(), y.copy()))
+    assert key != cache.key(DecisionTreeRegressor(max_depth=4), data_hash)
+    assert key != cache.key(DecisionTreeRegressor(max_depth=3), hash_arrays(X.astype(np.float32), y))
+    assert key != cache.key(model_comparison.LinearRegressionFromScratch(), data_hash)
+
+
+# Empty, garbage, truncated (None) and a pickle of a class that was since removed
+@pytest.mark.parametrize('content', [b'', b'not a pickle', None, b'cremoved_module\nFittedModel\n.'])
+def test_unreadable_entries_are_misses(tmp_path, content):
+    cache = FitCache(str(tmp_path))
+    cache.store('a', np.zeros(1000))
+    with open(cache._path('a'), 'rb') as file:
+        data = file.read()
+    with open(cache._path('a'), 'wb') as file:
+        file.write(data[:len(data) // 2] if content is None else content)  # None: truncated
+
+    assert cache.load('a') is None
+    assert cache.misses == 1 and cache.hits == 0
+    assert not os.path.exists(cache._path('a'))
+
+
+def test_prune_evicts_least_recently_used(tmp_path):
+    cache = FitCache(str(tmp_path), max_bytes=10 ** 9)
+    for i, key in enumerate(('a', 'b', 'c')):
+        cache.store(key, np.zeros(10_000))
+        os.utime(cache._path(key), (i, i))
+    assert cache.load('a') is not None  # a becomes the most recently used
+
+    size = cache.entries()[0][1]
+    assert cache.prune(2 * size) == 1
+    assert cache.load('b') is None
+    assert cache.load('c') is not None and cache.load('a') is not None
+    assert cache.clear() == 2
+
+
+def test_train_models_reuses_fits(tmp_path):
+    X_train, X_test, y_train, y_test, _, _ = model_comparison.load_and_prepare_data(DATA_PATH)
+    cache = FitCache(str(tmp_path))
+
+    first = model_comparison.train_models(X_train, X_test, y_train, y_test, fit_cache=cache)
+    assert cache.hits == 0 and len(cache.entries()) == len(first)
+    second = model_comparison.train_models(X_train, X_test, y_train, y_test, fit_cache=cache)
+
+    assert cache.hits == len(first)
+    for name in first:
+        assert np.array_equal(first[name]['predictions'], second[name]['predictions'])
+    assert second['Linear Regression (from scratch)']['loss_history'] == first['Linear Regression (from scratch)']['loss_history']
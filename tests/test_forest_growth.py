@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Test growing the Random Forest with out-of-bag early stopping
+"""
+
+import pytest
+
+from conftest import DATA_PATH
+from forest_growth import grow_forest
+from model_comparison import load_and_prepare_data
+
+
+@pytest.fixture(scope='module')
+def split():
+    X_train, X_test, y_train, y_test, _, _ = load_and_prepare_data(DATA_PATH)
+    return X_train, y_train
+
+
+def test_growth_stops_when_gain_is_small(split):
+    forest, curve = grow_forest(*split, step=5, min_gain=0.01, max_trees=60)
+
+    assert [point['trees'] for point in curve] == list(range(5, 5 * len(curve) + 1, 5))
+    assert len(forest.estimators_) == curve[-1]['trees'] < 60
+    assert curve[-1]['oob_r2'] - curve[-2]['oob_r2'] < 0.01
+    assert not forest.warm_start and not forest.oob_score
+    assert not hasattr(forest, 'oob_prediction_') and not hasattr(forest, 'oob_score_')
+
+
+def test_growth_is_capped(split):
+    forest, curve = grow_forest(*split, step=4, min_gain=float('-inf'), max_trees=10)
+    assert [point['trees'] for point in curve] == [4, 8, 10]
+    assert len(forest.estimators_) == 10
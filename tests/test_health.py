@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Test warmup and the precomputed liveness/readiness probes
+"""
+
+import main
+
+
+def test_ready_after_warmup(client):
+    response = client.get('/health/ready')
+    assert response.status_code == 200
+    body = response.json()
+    assert body['status'] == 'ready'
+    assert body['warmup']['batch_rows'] == 11 * 2 * len(main.COUNTRIES)
+    assert body['warmup']['warm_batch_ms'] > 0
+
+    health = client.get('/health').json()
+    assert health['status'] == 'healthy'
+    assert health['model_loaded'] is True
+    assert client.get('/health/live').status_code == 200
+
+
+def test_not_ready_without_model(monkeypatch, tmp_path):
+    from fastapi.testclient import TestClient
+
+    monkeypatch.setattr(main, 'MODEL_PATH', str(tmp_path / 'missing.pkl'))
+    monkeypatch.setattr(main, 'model_data', None)
+    monkeypatch.setattr(main, 'service_state', dict(main.service_state))
+    main.refresh_service_state(ready=False, model_loaded=False)
+
+    with TestClient(main.app) as client:
+        assert client.get('/health/live').status_code == 200
+        assert client.get('/health/ready').status_code == 503
+        assert client.get('/health').json()['status'] == 'unhealthy'
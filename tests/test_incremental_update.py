@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Test the incremental update of a saved linear model with new survey years
+"""
+
+import copy
+import pickle
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.linear_model import LinearRegression
+from sklearn.preprocessing import StandardScaler
+
+from conftest import DATA_PATH
+import incremental_update
+import model_comparison
+
+
+def build_linear_artifact(path):
+    """Artifact of a linear model trained up to 2018, written by save_best_model like model_comparison.py"""
+    africa = model_comparison.load_data(DATA_PATH)
+    africa = africa[africa['Year'] <= 2018]
+    encoder = model_comparison.fit_encoder(africa)
+    X, y = model_comparison.encode_features(africa, encoder=encoder)
+    scaler = StandardScaler()
+    model = LinearRegression().fit(scaler.fit_transform(X), y)
+    model_comparison.save_best_model({'Linear Regression (sklearn)': {'model': model, 'r2': 0.0}}, scaler, encoder,
+                                     output_path=path, max_year=int(africa['Year'].max()))
+    return X
+
+
+def test_rescale_keeps_raw_predictions(tmp_path):
+    X = build_linear_artifact(tmp_path / 'model.pkl')
+    model_data = joblib.load(tmp_path / 'model.pkl')
+
+    new_scaler = copy.deepcopy(model_data['scaler']).partial_fit(X.iloc[:500] * 1.1)
+    model = copy.deepcopy(model_data['model'])
+    incremental_update.rescale_linear_model(model, model_data['scaler'], new_scaler)
+
+    before = model_data['model'].predict(model_data['scaler'].transform(X))
+    after = model.predict(new_scaler.transform(X))
+    assert np.allclose(before, after)
+
+
+def test_incremental_update_writes_next_version(tmp_path):
+    build_linear_artifact(tmp_path / 'model.pkl')
+    assert joblib.load(tmp_path / 'model.pkl')['max_year'] == 2018
+
+    output_path, report = incremental_update.incremental_update(
+        str(tmp_path / 'model.pkl'), DATA_PATH, base_data_path=DATA_PATH
+    )
+
+    with open(output_path, 'rb') as file:
+        updated = pickle.load(file)
+    assert output_path.endswith('model_v2.pkl')
+    assert updated['version'] == 2 and updated['max_year'] == 2019
+    assert abs(report['drift']['r2_gap']) < 0.05
+    assert report['drift']['mean_abs_diff'] < 0.05
+
+
+def test_missing_max_year_requires_since_year(tmp_path):
+    build_linear_artifact(tmp_path / 'model.pkl')
+    model_data = joblib.load(tmp_path / 'model.pkl')
+    del model_data['max_year']
+    joblib.dump(model_data, tmp_path / 'model.pkl')
+
+    with pytest.raises(ValueError, match='max_year'):
+        incremental_update.incremental_update(str(tmp_path / 'model.pkl'), DATA_PATH)
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Test the multi-output indicators model and POST /predict/indicators
+"""
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from sklearn.linear_model import LinearRegression
+
+import main
+from conftest import DATA_PATH
+from model_comparison import INDICATORS, load_and_prepare_data, save_best_model
+from multi_output import compare_with_separate_models
+
+PAYLOAD = {'age': 52, 'sex': 'Women', 'year': 2018, 'country': 'Ghana'}
+
+
+@pytest.fixture(scope='module')
+def indicators_split():
+    return load_and_prepare_data(DATA_PATH, targets=INDICATORS.values())
+
+
+def test_indicators_are_targets_not_features(indicators_split):
+    X_train, _, y_train, _, _, encoder = indicators_split
+    assert y_train.shape[1] == len(INDICATORS)
+    assert not set(INDICATORS.values()) & set(encoder.feature_names)
+    assert X_train.shape[1] == encoder.n_features
+
+
+def test_one_pass_matches_separate_models(indicators_split):
+    X_train, X_test, y_train, y_test, _, _ = indicators_split
+    model = LinearRegression().fit(X_train, y_train)
+    report = compare_with_separate_models(model, X_train, X_test, y_train, y_test)
+    assert np.allclose(report['multi_r2'], report['separate_r2'])
+    assert report['multi_bytes'] < report['separate_bytes']
+
+
+def test_indicators_endpoint(client, indicators_split, tmp_path, monkeypatch):
+    assert client.post('/predict/indicators', json=PAYLOAD).status_code == 503  # no indicators artifact
+
+    X_train, X_test, y_train, y_test, scaler, encoder = indicators_split
+    model = LinearRegression().fit(X_train, y_train)
+    path = str(tmp_path / 'indicators.pkl')
+    save_best_model({'Linear Regression (sklearn)': {'model': model, 'r2': model.score(X_test, y_test)}},
+                    scaler, encoder, output_path=path, indicators=INDICATORS)
+    monkeypatch.setattr(main, 'INDICATORS_MODEL_PATH', path)
+
+    with TestClient(main.app) as indicators_client:
+        response = indicators_client.post('/predict/indicators', json=PAYLOAD)
+    assert response.status_code == 200
+    body = response.json()
+    assert list(body['indicators']) == list(INDICATORS)
+    assert body['age_group'] == '50-54'
+
+    row = encoder.encode_row(2018, 1, 4, encoder.country_code('Ghana'))
+    expected = model.predict(scaler.transform(row))[0]
+    assert np.allclose(list(body['indicators'].values()), expected)
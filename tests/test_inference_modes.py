@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Test that every INFERENCE_MODE serves the same predictions
+"""
+
+import threading
+
+import pytest
+
+import main
+
+PAYLOAD = {'age': 52, 'sex': 'Men', 'year': 2019, 'country': 'Ghana'}
+BATCH = {'age': [35, 70], 'sex': ['Women', 'Men'], 'year': [2010, 2025], 'country': ['Kenya', 'Nigeria']}
+
+
+@pytest.mark.parametrize('mode', ['inline', 'threadpool', 'dedicated'])
+def test_modes_agree(client, monkeypatch, mode):
+    expected = (client.post('/predict', json=PAYLOAD).json()['prediction'],
+                client.post('/predict/batch', json=BATCH).json()['predictions'])
+
+    monkeypatch.setattr(main, 'INFERENCE_MODE', mode)
+    assert client.post('/predict', json=PAYLOAD).json()['prediction'] == expected[0]
+    assert client.post('/predict/batch', json=BATCH).json()['predictions'] == expected[1]
+
+
+def test_dedicated_pool_threads(client, monkeypatch):
+    monkeypatch.setattr(main, 'INFERENCE_MODE', 'dedicated')
+    names = []
+
+    def record_thread():
+        names.append(threading.current_thread().name)
+
+    client.portal.call(main.run_inference, record_thread)
+    assert names[0].startswith('inference')
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Test single-flight, non-blocking lazy model loading after a failed startup
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+PAYLOAD = {'age': 45, 'sex': 'Women', 'year': 2020, 'country': 'Kenya'}
+
+
+@pytest.fixture
+def cold_client(model_path, monkeypatch, tmp_path):
+    """Client whose startup load fails, with load_model instrumented"""
+    monkeypatch.setattr(main, 'model_data', None)
+    monkeypatch.setattr(main, 'service_state', dict(main.service_state))
+    monkeypatch.setattr(main, 'model_load_failure', {"failures": 0, "retry_at": 0.0, "error": None})
+    monkeypatch.setattr(main, 'MODEL_PATH', str(tmp_path / 'missing.pkl'))
+    monkeypatch.setattr(main, 'MODEL_LOAD_BACKOFF', 0.3)
+
+    calls = []
+    load_model = main.load_model
+
+    def slow_load_model():
+        calls.append(time.monotonic())
+        time.sleep(0.2)
+        return load_model()
+
+    with TestClient(main.app) as client:
+        monkeypatch.setattr(main, 'load_model', slow_load_model)
+        client.calls = calls
+        yield client
+    monkeypatch.setattr(main, 'model_data', None)
+
+
+def test_failures_are_cached_with_backoff(cold_client):
+    # Startup failed: requests inside the backoff window do not retry the load
+    response = cold_client.post('/predict', json=PAYLOAD)
+    assert response.status_code == 503
+    assert int(response.headers['Retry-After']) >= 1
+    assert cold_client.calls == []
+
+    time.sleep(0.35)
+    assert cold_client.post('/predict', json=PAYLOAD).status_code == 503
+    assert len(cold_client.calls) == 1
+    assert main.model_load_failure['failures'] == 2
+
+
+def test_concurrent_requests_share_one_load(cold_client, model_path, monkeypatch):
+    time.sleep(0.35)  # let the startup failure's backoff expire
+    monkeypatch.setattr(main, 'MODEL_PATH', model_path)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        responses = list(pool.map(lambda _: cold_client.post('/predict', json=PAYLOAD), range(8)))
+
+    assert [response.status_code for response in responses] == [200] * 8
+    assert len(cold_client.calls) == 1
+    assert main.model_load_failure['failures'] == 0
+    # The event loop stayed free during the load
+    assert cold_client.get('/health/live').status_code == 200
+
+
+def test_failed_warmup_is_retried(cold_client, model_path, monkeypatch):
+    time.sleep(0.35)  # let the startup failure's backoff expire
+    monkeypatch.setattr(main, 'MODEL_PATH', model_path)
+    make_prediction = main.make_prediction
+    failures = []
+
+    def fail_first_warmup(**kwargs):
+        if not failures:
+            failures.append(kwargs)
+            raise RuntimeError("warmup failed")
+        return make_prediction(**kwargs)
+
+    monkeypatch.setattr(main, 'make_prediction', fail_first_warmup)
+    assert cold_client.post('/predict', json=PAYLOAD).status_code == 503
+    assert main.model_data is None
+    assert cold_client.get('/health/ready').status_code == 503
+
+    time.sleep(0.65)  # second backoff
+    assert cold_client.post('/predict', json=PAYLOAD).status_code == 200
+    assert len(cold_client.calls) == 2
+    assert cold_client.get('/health/ready').status_code == 200
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Test the queue-backed JSON logging: rate limits, sampling, correlation IDs, dropping
+"""
+
+import io
+import json
+import logging
+
+from structured_logging import RateLimitFilter, configure_logging
+
+
+def test_records_are_json_with_extra_fields():
+    stream = io.StringIO()
+    logger, listener = configure_logging('test_logging.json', stream=stream)
+    listener.start()
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logger.exception("Load failed", extra={'model_path': 'model.pkl'})
+    listener.stop()  # writes everything still queued
+
+    entry = json.loads(stream.getvalue())
+    assert entry['level'] == 'ERROR' and entry['message'] == 'Load failed'
+    assert entry['model_path'] == 'model.pkl'
+    assert 'ValueError: boom' in entry['exception']
+
+
+def test_rate_limit_counts_suppressed_records():
+    stream = io.StringIO()
+    logger, listener = configure_logging('test_logging.rate', burst=3, stream=stream)
+    rate_limit = next(f for f in logger.handlers[0].filters if isinstance(f, RateLimitFilter))
+    listener.start()
+    for i in range(10):
+        logger.info("repeated %d", i)
+    logger.info("other")
+    rate_limit.interval = 0  # next window
+    logger.info("repeated %d", 10)
+    listener.stop()  # writes everything still queued
+
+    messages = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [entry['message'] for entry in messages] == ['repeated 0', 'repeated 1', 'repeated 2', 'other', 'repeated 10']
+    assert messages[-1]['suppressed'] == 7
+
+
+def test_errors_are_not_rate_limited():
+    stream = io.StringIO()
+    logger, listener = configure_logging('test_logging.errors', burst=3, stream=stream)
+    listener.start()
+    for i in range(50):
+        logger.info("request")
+        logger.error("request", extra={'status': 500})
+    listener.stop()  # writes everything still queued
+
+    levels = [json.loads(line)['level'] for line in stream.getvalue().splitlines()]
+    assert levels.count('ERROR') == 50 and levels.count('INFO') == 3
+
+
+def test_sampling_skips_only_sampled_info_records():
+    stream = io.StringIO()
+    logger, listener = configure_logging('test_logging.sample', sample_rate=0.0, burst=100, stream=stream)
+    listener.start()
+    logger.info("request", extra={'sample': True})
+    logger.error("request", extra={'sample': True})
+    logger.info("startup")
+    listener.stop()  # writes everything still queued
+    assert [json.loads(line)['level'] for line in stream.getvalue().splitlines()] == ['ERROR', 'INFO']
+
+
+def test_full_queue_drops_instead_of_blocking():
+    logger, listener = configure_logging('test_logging.full', queue_size=2, burst=100, stream=io.StringIO())
+    for i in range(5):
+        logger.warning("message %d", i)  # listener not started: nothing drains the queue
+    assert logger.handlers[0].dropped == 3
+    logging.getLogger('test_logging.full').handlers.clear()
+
+
+def test_correlation_id_header(client):
+    response = client.get('/health', headers={'x-request-id': 'trace-123'})
+    assert response.headers['x-request-id'] == 'trace-123'
+    generated = client.get('/health').headers['x-request-id']
+    assert len(generated) == 16 and generated != client.get('/health').headers['x-request-id']
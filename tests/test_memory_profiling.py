@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Test the per-stage memory profiler behind --profile-memory
+"""
+
+import json
+
+import numpy as np
+
+from memory_profiling import MemoryProfiler, profile_stage
+
+
+def test_stages_record_peak_and_net(tmp_path):
+    with MemoryProfiler() as profiler:
+        with profile_stage('outer'):
+            with profile_stage('temporary'):
+                scratch = np.ones(2_000_000)  # ~16 MB, freed before the stage ends
+                del scratch
+            kept = np.ones(500_000)  # ~4 MB, still alive when the stage ends
+
+    stages = {stage['stage']: stage for stage in profiler.stages}
+    assert stages['temporary']['peak_bytes'] >= 16_000_000
+    assert stages['temporary']['net_bytes'] < 1_000_000
+    # The parent's peak includes its child's
+    assert stages['outer']['peak_bytes'] >= stages['temporary']['peak_bytes']
+    assert stages['outer']['net_bytes'] >= 4_000_000
+    assert profiler.ranked_stages()[0]['stage'] == 'outer'
+
+    path = tmp_path / 'profile.json'
+    profiler.write_json(path, label='test')
+    report = json.loads(path.read_text())
+    assert [stage['stage'] for stage in report['stages']] == ['outer', 'temporary']
+    del kept
+
+
+def test_profile_stage_is_noop_when_inactive():
+    with profile_stage('unprofiled'):
+        pass
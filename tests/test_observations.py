@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Test the indexed observation store and the /observations endpoints
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import main
+from conftest import DATA_PATH
+from observation_store import ObservationStore
+
+
+@pytest.fixture(scope='module')
+def store():
+    return ObservationStore.from_csv(DATA_PATH, main.COUNTRIES, main.AGE_GROUPS)
+
+
+def test_lookup_matches_dataframe(store):
+    data = pd.read_csv(DATA_PATH)
+    for _, row in data.sample(50, random_state=0).iterrows():
+        observed = store.lookup(
+            main.COUNTRY_CODES[row['Country'].casefold()], row['Year'],
+            main.SEX_CODES[row['Sex'].lower()], main.AGE_GROUPS.index(row['Age'])
+        )
+        assert observed['prevalence'] == row['Prevalence of hypertension']
+        assert (observed['country'], observed['year'], observed['sex'], observed['age_group']) == \
+            (row['Country'], row['Year'], row['Sex'], row['Age'])
+
+    assert store.lookup(main.COUNTRY_CODES['kenya'], 2030, 0, 0) is None
+    assert store.lookup(main.COUNTRY_CODES['kenya'], 2017, 0, len(main.AGE_GROUPS) - 1) is None  # no 80+ rows
+
+
+def test_series_is_sorted_slice(store):
+    data = pd.read_csv(DATA_PATH)
+    kenya = data[data['Country'] == 'Kenya']
+    series = store.series(main.COUNTRY_CODES['kenya'])
+    assert series['count'] == len(kenya)
+
+    women = store.series(main.COUNTRY_CODES['kenya'], sex=1, age=3)
+    expected = kenya[(kenya['Sex'] == 'Women') & (kenya['Age'] == '45-49')].sort_values('Year')
+    assert women['year'] == expected['Year'].tolist()
+    assert np.allclose(women['prevalence'], expected['Prevalence of hypertension'])
+
+    by_age = store.series(main.COUNTRY_CODES['kenya'], age=3)
+    assert by_age['count'] == 2 * len(expected)
+
+
+def test_observation_endpoints(client):
+    response = client.get('/observations', params={'age': 47, 'sex': 'women', 'year': 2017, 'country': 'kenya'})
+    assert response.status_code == 200
+    assert response.json()['age_group'] == '45-49'
+    assert client.get('/observations', params={'age': 47, 'sex': 'Women', 'year': 2001, 'country': 'Kenya'}).status_code == 404
+
+    series = client.get('/observations/series', params={'country': 'Kenya', 'sex': 'Men'}).json()
+    assert set(series['sex']) == {'Men'}
+
+
+def test_observed_attached_to_predictions(client):
+    payload = {'age': 47, 'sex': 'Women', 'year': 2017, 'country': 'Kenya'}
+    assert 'observed' not in client.post('/predict', json=payload).json()
+
+    posted = client.post('/predict', params={'include_observed': 'true'}, json=payload).json()
+    fetched = client.get('/predict', params={**payload, 'include_observed': 'true'}).json()
+    assert posted['observed'] == fetched['observed']
+    assert posted['observed']['year'] == 2017
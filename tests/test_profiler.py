@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Test the protected /debug/profile sampling endpoint
+"""
+
+import threading
+
+import main
+
+PAYLOAD = {'age': 45, 'sex': 'Women', 'year': 2020, 'country': 'Kenya'}
+
+
+def test_profile_disabled_by_default(client, monkeypatch):
+    monkeypatch.setattr(main, 'PROFILER_TOKEN', None)
+    assert client.get('/debug/profile', params={'seconds': 0.1}).status_code == 404
+
+
+def test_profile_requires_token(client, monkeypatch):
+    monkeypatch.setattr(main, 'PROFILER_TOKEN', 'secret')
+    response = client.get('/debug/profile', params={'seconds': 0.1}, headers={'X-Profiler-Token': 'wrong'})
+    assert response.status_code == 403
+
+
+def test_profile_rejects_non_ascii_token(client, monkeypatch):
+    monkeypatch.setattr(main, 'PROFILER_TOKEN', 'secret')
+    response = client.get('/debug/profile', params={'seconds': 0.1}, headers={'X-Profiler-Token': 'sécret'.encode('latin-1')})
+    assert response.status_code == 403
+
+
+def test_profile_samples_predictions(client, monkeypatch):
+    monkeypatch.setattr(main, 'PROFILER_TOKEN', 'secret')
+    result = {}
+
+    def take_profile():
+        result['response'] = client.get(
+            '/debug/profile', params={'seconds': 1, 'interval_ms': 1}, headers={'X-Profiler-Token': 'secret'}
+        )
+
+    profile_thread = threading.Thread(target=take_profile)
+    profile_thread.start()
+    while profile_thread.is_alive():
+        assert client.post('/predict', json=PAYLOAD).status_code == 200
+    profile_thread.join()
+
+    response = result['response']
+    assert response.status_code == 200
+    assert int(response.headers['X-Profile-Samples']) > 0
+    lines = response.text.splitlines()
+    assert all(line.rsplit(' ', 1)[1].isdigit() for line in lines)
+    assert any('make_prediction (main.py' in line for line in lines)
+
+    speedscope = client.get(
+        '/debug/profile', params={'seconds': 0.1, 'format': 'speedscope'}, headers={'X-Profiler-Token': 'secret'}
+    ).json()
+    profile = speedscope['profiles'][0]
+    assert profile['type'] == 'sampled'
+    assert len(profile['samples']) == len(profile['weights'])
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Test the /ws/predict streaming channel: ordering, deltas, coalescing and errors
+"""
+
+import asyncio
+
+import main
+
+PAYLOAD = {'age': 52, 'sex': 'Men', 'year': 2019, 'country': 'Ghana'}
+
+
+def test_stream_matches_post_predict(client):
+    expected = client.post('/predict', json=PAYLOAD).json()
+    with client.websocket_connect('/ws/predict') as websocket:
+        websocket.send_json({'id': 1, **PAYLOAD})
+        reply = websocket.receive_json()
+    assert reply == {'id': 1, 'prediction': expected['prediction'], 'age_group': '50-54',
+                     'model_used': expected['model_used']}
+
+
+def test_stream_sends_only_changes(client):
+    with client.websocket_connect('/ws/predict') as websocket:
+        websocket.send_json({'id': 1, **PAYLOAD})
+        first = websocket.receive_json()
+        websocket.send_json({'id': 2, **PAYLOAD, 'age': 54})
+        assert websocket.receive_json() == {'id': 2}
+        websocket.send_json({'id': 3, **PAYLOAD, 'age': 75})
+        changed = websocket.receive_json()
+    assert changed['age_group'] == '75-79'
+    assert 'model_used' not in changed
+    assert changed.get('prediction', first['prediction']) == client.post(
+        '/predict', json={**PAYLOAD, 'age': 75}).json()['prediction']
+
+
+def test_stream_errors_keep_order(client):
+    with client.websocket_connect('/ws/predict') as websocket:
+        websocket.send_text('not json')
+        websocket.send_json({'id': 'a', **PAYLOAD, 'country': 'Atlantis'})
+        websocket.send_json({'id': 'b', **PAYLOAD})
+        replies = [websocket.receive_json() for _ in range(3)]
+    assert replies[0]['id'] is None and 'error' in replies[0]
+    assert replies[1]['id'] == 'a' and replies[1]['error'][0]['loc'] == ['country']
+    assert replies[2]['id'] == 'b' and 'prediction' in replies[2]
+
+
+def test_binary_frames_get_an_error_reply(client):
+    with client.websocket_connect('/ws/predict') as websocket:
+        websocket.send_bytes(b'{"age": 52}')
+        websocket.send_json({'id': 1, **PAYLOAD})
+        replies = [websocket.receive_json() for _ in range(2)]
+    assert replies[0]['id'] is None and 'Binary frames' in replies[0]['error']
+    assert replies[1]['id'] == 1 and 'prediction' in replies[1]
+
+
+def test_stream_reports_failed_predictions(client, monkeypatch):
+    stream_prediction = main.stream_prediction
+
+    async def fail_for_kenya(request):
+        if request.country == 'Kenya':
+            raise RuntimeError("boom")
+        return await stream_prediction(request)
+
+    monkeypatch.setattr(main, 'stream_prediction', fail_for_kenya)
+    with client.websocket_connect('/ws/predict') as websocket:
+        websocket.send_json({'id': 1, **PAYLOAD, 'country': 'Kenya'})
+        websocket.send_json({'id': 2, **PAYLOAD})
+        replies = [websocket.receive_json() for _ in range(2)]
+    assert replies[0] == {'id': 1, 'error': 'Internal server error: boom'}
+    assert replies[1]['id'] == 2 and 'prediction' in replies[1]
+
+
+def test_queue_coalesces_oldest_requests():
+    async def fill():
+        queue = main.StreamQueue(max_pending=1, max_slots=10)
+        for message_id in range(1, 4):
+            await queue.put({'id': message_id, 'request': object()})
+        await queue.put({'id': 4, 'error': 'invalid'})
+        await queue.put({'id': 5, 'request': object()})
+        await queue.put({'id': 6, 'request': object()})
+        return queue
+
+    queue = asyncio.run(fill())
+    assert [entry.get('skipped', entry.get('id')) for entry in queue] == [[1, 2, 3], 4, [5], 6]
+    assert len(queue) == 4
+
+
+def test_queue_does_not_merge_into_sent_slots():
+    async def run():
+        queue = main.StreamQueue(max_pending=1, max_slots=10)
+        await queue.put({'id': 1, 'request': object()})
+        await queue.put({'id': 2, 'request': object()})
+        sent = await queue.get()
+        await queue.put({'id': 3, 'request': object()})
+        return sent, queue
+
+    sent, queue = asyncio.run(run())
+    assert sent == {'skipped': [1]}
+    assert [entry.get('skipped', entry.get('id')) for entry in queue] == [[2], 3]
+
+
+def test_full_queue_waits_for_the_sender():
+    async def run():
+        queue = main.StreamQueue(max_pending=1, max_slots=3)
+        for message_id in range(3):
+            await queue.put({'id': message_id, 'error': 'invalid'})
+        put = asyncio.create_task(queue.put({'id': 3, 'error': 'invalid'}))
+        await asyncio.sleep(0.01)
+        blocked = not put.done()
+        first = await queue.get()
+        await asyncio.wait_for(put, 1)
+        return blocked, first, [entry['id'] for entry in queue]
+
+    blocked, first, remaining = asyncio.run(run())
+    assert blocked and first['id'] == 0
+    assert remaining == [1, 2, 3]
+
+
+def test_skipped_runs_are_capped(monkeypatch):
+    monkeypatch.setattr(main.StreamQueue, 'MAX_SKIPPED', 2)
+
+    async def fill():
+        queue = main.StreamQueue(max_pending=1, max_slots=10)
+        for message_id in range(6):
+            await queue.put({'id': message_id, 'request': object()})
+        return queue
+
+    assert [entry.get('skipped', entry.get('id')) for entry in asyncio.run(fill())] == [[0, 1], [2, 3], [4], 5]